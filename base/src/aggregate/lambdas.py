@@ -0,0 +1,39 @@
+from singleton_injector import injector
+from src.commons import entities
+from src.aggregate import stack, storage
+from src.minicourse import storage as minicourse_storage
+from src.problem import storage as problem_storage
+from src.video import storage as video_storage
+
+
+@injector
+class ConsumeStreamsLambda(entities.Lambda):
+    def __init__(
+        self,
+        scope: stack.AggregateStack,
+        aggregate_table: storage.AggregateTable,
+        minicourse_table: minicourse_storage.MinicourseTable,
+        minicourse_detail_table: minicourse_storage.MinicourseDetailTable,
+        video_table: video_storage.VideoTable,
+        problem_table: problem_storage.ProblemTable,
+        evaluation_table: problem_storage.ProblemEvaluationTable,
+    ):
+        super().__init__(
+            scope=scope,
+            id="ConsumeStreamsLambda",
+            source="modding/aggregate/consume_streams",
+            env={
+                **aggregate_table.get_env_name_var(),
+                **minicourse_detail_table.get_env_name_var(),
+                **minicourse_table.get_env_name_var(),
+                **video_table.get_env_name_var(),
+                **problem_table.get_env_name_var(),
+                **evaluation_table.get_env_name_var(),
+            },
+            timeout_seconds=60,
+        )
+
+        self.grant_table(table=aggregate_table, read=True, write=True)
+        self.grant_table(table=minicourse_detail_table, read=True, write=True)
+        for table in [minicourse_table, video_table, problem_table, evaluation_table]:
+            self.consume_table_stream(table)
@@ -0,0 +1,17 @@
+from src.commons import entities
+from singleton_injector import injector
+
+
+@injector
+class AggregateStack(entities.Stack):
+    def __init__(self):
+        super().__init__(id="AggregateStack", name="AggregateStack")
+
+
+### Entity lambdas read the aggregates while the stream consumer reads the
+### entity tables, the table lives apart so the stacks do not depend on each
+### other
+@injector
+class AggregateStorageStack(entities.Stack):
+    def __init__(self):
+        super().__init__(id="AggregateStorageStack", name="AggregateStorageStack")
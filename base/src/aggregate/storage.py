@@ -0,0 +1,20 @@
+from aws_cdk.aws_dynamodb import Attribute, AttributeType
+from src.commons import entities
+from singleton_injector import injector
+from src.aggregate import stack
+
+######################################
+##         DYNAMODB TABLES          ##
+######################################
+
+
+@injector
+class AggregateTable(entities.Table):
+    def __init__(self, scope: stack.AggregateStorageStack):
+        super().__init__(
+            scope=scope,
+            entity_name="Aggregate",
+            partition_key=Attribute(name="id", type=AttributeType.STRING),
+            sort_key=None,
+            time_to_live_attribute="expires_at",
+        )
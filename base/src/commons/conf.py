@@ -7,10 +7,15 @@ from src.commons.file_finder import FileFinder
 class _Settings(BaseSettings):
     aws_region: str
     aws_account: str
+    ### Set once backfill_active_indexes has run on every table, handlers then
+    ### read the sparse active indexes and the full copies are dropped
+    active_indexes_backfilled: bool = False
 
 
 _SETTINGS = _Settings()
 
+ACTIVE_INDEXES_BACKFILLED = _SETTINGS.active_indexes_backfilled
+
 
 environment = core.Environment(
     account=_SETTINGS.aws_account, region=_SETTINGS.aws_region
@@ -5,11 +5,13 @@ from typing import Any, Dict, List, Optional
 from aws_cdk import (
     core,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as _event_sources,
     aws_s3 as _s3,
     aws_dynamodb as _dynamodb,
     aws_apigateway as _apigateway,
     aws_iam as _iam,
     aws_ssm as _ssm,
+    aws_sqs as _sqs,
 )
 import src.commons.conf as app_conf
 from src.commons.http import HttpMethods
@@ -47,6 +49,8 @@ class Stack(core.Stack):
 
 
 class Table(_dynamodb.Table):
+    ACTIVE_PREFIX = "active_"
+
     def __init__(
         self,
         scope: core.Stack,
@@ -55,6 +59,7 @@ class Table(_dynamodb.Table):
         sort_key: Optional[_dynamodb.Attribute] = _dynamodb.Attribute(
             name="username", type=_dynamodb.AttributeType.STRING
         ),
+        time_to_live_attribute: Optional[str] = None,
     ):
         super().__init__(
             scope=scope,
@@ -65,6 +70,7 @@ class Table(_dynamodb.Table):
             billing_mode=_dynamodb.BillingMode.PAY_PER_REQUEST,
             stream=_dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=core.RemovalPolicy.DESTROY,
+            time_to_live_attribute=time_to_live_attribute,
         )
         self.entity_name = entity_name
         self.index_names = dict()
@@ -85,15 +91,41 @@ class Table(_dynamodb.Table):
         name: str,
         partition_key: _dynamodb.Attribute,
         sort_key: _dynamodb.Attribute = None,
+        active_only: bool = False,
+        fallback: Optional[str] = None,
     ) -> None:
+        ### Active only indexes are sparse, their partition key is a copy of the
+        ### attribute that only active items carry so deleted rows are not read.
+        ### Until existing rows are backfilled handlers read the fallback index
+        if active_only:
+            partition_key = _dynamodb.Attribute(
+                name=f"{self.ACTIVE_PREFIX}{partition_key.name}",
+                type=partition_key.type,
+            )
         index_name = (
             f"{partition_key.name}{f'_{sort_key.name}' if sort_key else ''}_index"
         )
         self.add_global_secondary_index(
             index_name=index_name, partition_key=partition_key, sort_key=sort_key
         )
+        if active_only and fallback and not app_conf.ACTIVE_INDEXES_BACKFILLED:
+            index_name = self.index_names[fallback]
         self.index_names[name] = index_name
 
+    def add_fallback_index(
+        self,
+        name: str,
+        partition_key: _dynamodb.Attribute,
+        sort_key: _dynamodb.Attribute = None,
+    ) -> Optional[str]:
+        ### Full index read before the backfill, dropped on the deploy after it
+        if app_conf.ACTIVE_INDEXES_BACKFILLED:
+            return None
+        self.add_secundary_index(
+            name=name, partition_key=partition_key, sort_key=sort_key
+        )
+        return name
+
 
 ######################################
 ##            S3 BUCKET             ##
@@ -207,6 +239,10 @@ class ConstructableSecureStringParam:
 ######################################
 
 
+STREAM_RETRY_ATTEMPTS = 5
+STREAM_FAILURES_RETENTION = core.Duration.days(14)
+
+
 class Lambda(_lambda.Function):
     def __init__(
         self,
@@ -263,6 +299,33 @@ class Lambda(_lambda.Function):
         else:
             param.grant_write(self)
 
+    def consume_table_stream(self, table: Table, batch_size: int = 100) -> None:
+        ### Failed batches are split and retried, one bad record does not stop
+        ### the shard, the stream read permission is granted by the source.
+        ### Records still failing are sent to the failures queue of the lambda
+        self.add_event_source(
+            _event_sources.DynamoEventSource(
+                table,
+                starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                batch_size=batch_size,
+                bisect_batch_on_error=True,
+                retry_attempts=STREAM_RETRY_ATTEMPTS,
+                on_failure=_event_sources.SqsDlq(self.stream_failures_queue),
+            )
+        )
+
+    @property
+    def stream_failures_queue(self) -> _sqs.Queue:
+        ### One queue for all the streams the lambda consumes
+        queue = self.node.try_find_child("StreamFailuresQueue")
+        if queue is None:
+            queue = _sqs.Queue(
+                scope=self,
+                id="StreamFailuresQueue",
+                retention_period=STREAM_FAILURES_RETENTION,
+            )
+        return queue
+
     def add_allow_policy(self, actions: List[PolicyAction]) -> None:
         self.add_to_role_policy(
             statement=_iam.PolicyStatement(
@@ -2,6 +2,8 @@ from asyncore import write
 from singleton_injector import injector
 from src.commons import entities
 from src.minicourse import stack as minicourse_stack, storage as minicourse_storage
+from src.video import storage as video_storage
+from src.aggregate import storage as aggregate_storage
 
 
 @injector
@@ -37,6 +39,9 @@ class GetMinicourseLambda(entities.Lambda):
         scope: minicourse_stack.MinicourseStack,
         minicourse_table: minicourse_storage.MinicourseTable,
         minicourse_bucket: minicourse_storage.MinicourseBucket,
+        minicourse_detail_table: minicourse_storage.MinicourseDetailTable,
+        video_bucket: video_storage.VideoBucket,
+        aggregate_table: aggregate_storage.AggregateTable,
     ):
         super().__init__(
             scope=scope,
@@ -46,6 +51,10 @@ class GetMinicourseLambda(entities.Lambda):
                 **minicourse_table.get_env_name_var(),
                 **minicourse_bucket.get_env_name_var(),
                 **minicourse_table.get_index_names(),
+                **minicourse_detail_table.get_env_name_var(),
+                **video_bucket.get_env_name_var(),
+                **aggregate_table.get_env_name_var(),
+                "VIDEO_DOWNLOAD_EXPIRE_TIME": "300",
                 "THUMB_DOWNLOAD_EXPIRE_TIME": "300",
                 "THUMB_UPLOAD_EXPIRE_TIME": "300",
                 "MULTIPLE_MINICOURSE_RETRIVAL_LIMIT": "10",
@@ -53,7 +62,10 @@ class GetMinicourseLambda(entities.Lambda):
         )
 
         self.grant_table(table=minicourse_table, read=True, write=True)
+        self.grant_table(table=minicourse_detail_table, read=True)
         self.grant_bucket(minicourse_bucket, read=True, write=True)
+        self.grant_bucket(video_bucket, read=True)
+        self.grant_table(table=aggregate_table, read=True)
 
 
 @injector
@@ -100,15 +112,20 @@ class GetCategoriesLambda(entities.Lambda):
         self,
         scope: minicourse_stack.MinicourseStack,
         category_table: minicourse_storage.CategoryTable,
+        aggregate_table: aggregate_storage.AggregateTable,
     ):
         super().__init__(
             scope=scope,
             id="GetCategoriesLambda",
             source="modding/minicourse/category/get_category",
-            env={**category_table.get_env_name_var()},
+            env={
+                **category_table.get_env_name_var(),
+                **aggregate_table.get_env_name_var(),
+            },
         )
 
         self.grant_table(table=category_table, read=True, write=True)
+        self.grant_table(table=aggregate_table, read=True)
 
 
 @injector
@@ -29,10 +29,18 @@ class MinicourseTable(entities.Table):
             partition_key=Attribute(name="id", type=AttributeType.STRING),
         )
 
+        fallback = self.add_fallback_index(
+            name="MinicourseCategoryFull",
+            partition_key=Attribute(name="category_id", type=AttributeType.STRING),
+            sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+        )
+
         self.add_secundary_index(
             name="MinicourseCategory",
             partition_key=Attribute(name="category_id", type=AttributeType.STRING),
             sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+            active_only=True,
+            fallback=fallback,
         )
 
         self.add_secundary_index(
@@ -50,3 +58,14 @@ class CategoryTable(entities.Table):
             entity_name="Category",
             partition_key=Attribute(name="id", type=AttributeType.STRING),
         )
+
+
+@injector
+class MinicourseDetailTable(entities.Table):
+    def __init__(self, scope: minicourse_stack.MinicourseStack):
+        super().__init__(
+            scope=scope,
+            entity_name="MinicourseDetail",
+            partition_key=Attribute(name="id", type=AttributeType.STRING),
+            sort_key=Attribute(name="row", type=AttributeType.STRING),
+        )
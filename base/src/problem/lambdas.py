@@ -1,6 +1,7 @@
 from singleton_injector import injector
 from src.commons import entities
 from src.problem import stack, storage
+from src.aggregate import storage as aggregate_storage
 from src.minicourse import storage as minicourse_storage
 
 
@@ -141,7 +142,10 @@ class CreateProblemEvaluationLambda(entities.Lambda):
         scope: stack.ProblemStack,
         problem_table: storage.ProblemTable,
         problem_bucket: storage.ProblemBucket,
+        problem_test_case_table: storage.ProblemTestCaseTable,
         problem_evaluation_table: storage.ProblemEvaluationTable,
+        admission_table: storage.AdmissionTable,
+        evaluation_queue_table: storage.EvaluationQueueTable,
         instance_username: EvaluationInstanceUsernameParam,
         instance_public_dns: EvaluationInstancePublicDNSParam,
         instance_private_key: EvaluationInstancePrivateKeyParam,
@@ -153,17 +157,26 @@ class CreateProblemEvaluationLambda(entities.Lambda):
             env={
                 **problem_table.get_env_name_var(),
                 **problem_bucket.get_env_name_var(),
+                **problem_test_case_table.get_env_name_var(),
                 **problem_evaluation_table.get_env_name_var(),
+                **admission_table.get_env_name_var(),
+                **evaluation_queue_table.get_env_name_var(),
+                **evaluation_queue_table.get_index_names(),
                 instance_username.env_name: instance_username.path,
                 instance_public_dns.env_name: instance_public_dns.path,
                 instance_private_key.env_name: instance_private_key.path,
+                "CASES_CACHE_MAX_BYTES": "268435456",
+                "SANDBOX_SLOTS": "4",
             },
             timeout_seconds=60,
         )
 
         self.grant_table(table=problem_table, read=True, write=True)
         self.grant_bucket(problem_bucket, read=True, write=True)
+        self.grant_table(table=problem_test_case_table, read=True)
         self.grant_table(table=problem_evaluation_table, read=True, write=True)
+        self.grant_table(table=admission_table, read=True, write=True)
+        self.grant_table(table=evaluation_queue_table, read=True, write=True)
 
         self.grant_param(instance_username, read=True)
         self.grant_param(instance_public_dns, read=True)
@@ -210,15 +223,24 @@ class GetProblemLambda(entities.Lambda):
         self,
         scope: stack.ProblemStack,
         problem_table: storage.ProblemTable,
+        problem_test_case_table: storage.ProblemTestCaseTable,
+        aggregate_table: aggregate_storage.AggregateTable,
     ):
         super().__init__(
             scope=scope,
             id="GetProblemLambda",
             source="modding/problem/get_problem",
-            env={**problem_table.get_env_name_var(), **problem_table.get_index_names()},
+            env={
+                **problem_table.get_env_name_var(),
+                **problem_table.get_index_names(),
+                **problem_test_case_table.get_env_name_var(),
+                **aggregate_table.get_env_name_var(),
+            },
         )
 
         self.grant_table(table=problem_table, read=True, write=True)
+        self.grant_table(table=problem_test_case_table, read=True)
+        self.grant_table(table=aggregate_table, read=True)
 
 
 @injector
@@ -248,6 +270,7 @@ class UploadProblemTestCaseLambda(entities.Lambda):
         scope: stack.ProblemStack,
         problem_table: storage.ProblemTable,
         problem_bucket: storage.ProblemBucket,
+        problem_test_case_table: storage.ProblemTestCaseTable,
     ):
         super().__init__(
             scope=scope,
@@ -256,12 +279,14 @@ class UploadProblemTestCaseLambda(entities.Lambda):
             env={
                 **problem_table.get_env_name_var(),
                 **problem_bucket.get_env_name_var(),
+                **problem_test_case_table.get_env_name_var(),
                 "UPLOAD_URL_EXPIRE_TIME": "300",
             },
         )
 
         self.grant_table(table=problem_table, read=True, write=True)
         self.grant_bucket(problem_bucket, read=True, write=True)
+        self.grant_table(table=problem_test_case_table, read=True, write=True)
 
 
 @injector
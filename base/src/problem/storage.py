@@ -29,10 +29,29 @@ class ProblemTable(entities.Table):
             partition_key=Attribute(name="id", type=AttributeType.STRING),
         )
 
+        fallback = self.add_fallback_index(
+            name="ProblemMinicourseFull",
+            partition_key=Attribute(name="minicourse_id", type=AttributeType.STRING),
+            sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+        )
+
         self.add_secundary_index(
             name="ProblemMinicourse",
             partition_key=Attribute(name="minicourse_id", type=AttributeType.STRING),
             sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+            active_only=True,
+            fallback=fallback,
+        )
+
+
+@injector
+class ProblemTestCaseTable(entities.Table):
+    def __init__(self, scope: stack.ProblemStack):
+        super().__init__(
+            scope=scope,
+            entity_name="ProblemTestCase",
+            partition_key=Attribute(name="problem_id", type=AttributeType.STRING),
+            sort_key=Attribute(name="case_index", type=AttributeType.NUMBER),
         )
 
 
@@ -50,3 +69,42 @@ class ProblemEvaluationTable(entities.Table):
             partition_key=Attribute(name="problem_id", type=AttributeType.STRING),
             sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
         )
+
+        ### Keyed by problem_id#username so a user history is read by key
+        self.add_secundary_index(
+            name="EvaluationProblemUsername",
+            partition_key=Attribute(
+                name="problem_id_username", type=AttributeType.STRING
+            ),
+            sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+            active_only=True,
+            fallback="EvaluationProblem",
+        )
+
+
+@injector
+class AdmissionTable(entities.Table):
+    def __init__(self, scope: stack.ProblemStack):
+        super().__init__(
+            scope=scope,
+            entity_name="Admission",
+            partition_key=Attribute(name="id", type=AttributeType.STRING),
+            sort_key=None,
+        )
+
+
+@injector
+class EvaluationQueueTable(entities.Table):
+    def __init__(self, scope: stack.ProblemStack):
+        super().__init__(
+            scope=scope,
+            entity_name="EvaluationQueue",
+            partition_key=Attribute(name="id", type=AttributeType.STRING),
+            sort_key=None,
+        )
+
+        self.add_secundary_index(
+            name="EvaluationQueueState",
+            partition_key=Attribute(name="state", type=AttributeType.STRING),
+            sort_key=Attribute(name="due_at", type=AttributeType.NUMBER),
+        )
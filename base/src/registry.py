@@ -1,3 +1,4 @@
 from src.video import rest_api
 from src.minicourse import rest_api
 from src.problem import rest_api
+from src.aggregate import lambdas
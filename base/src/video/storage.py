@@ -29,8 +29,16 @@ class VideoTable(entities.Table):
             partition_key=Attribute(name="id", type=AttributeType.STRING),
         )
 
+        fallback = self.add_fallback_index(
+            name="VideoMinicourseFull",
+            partition_key=Attribute(name="minicourse_id", type=AttributeType.STRING),
+            sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+        )
+
         self.add_secundary_index(
             name="VideoMinicourse",
             partition_key=Attribute(name="minicourse_id", type=AttributeType.STRING),
             sort_key=Attribute(name="creation_date", type=AttributeType.NUMBER),
+            active_only=True,
+            fallback=fallback,
         )
@@ -0,0 +1,72 @@
+from typing import Any, Dict
+from modding.aggregate import counters, details
+from modding.common import logging, settings, stream
+from modding.problem import models as problem_models
+
+
+class _Settings(settings.Settings):
+    aggregate_table_name: str
+    minicourse_detail_table_name: str
+    minicourse_table_name: str
+    video_table_name: str
+    problem_table_name: str
+    problem_evaluation_table_name: str
+
+
+_SETTINGS = _Settings()
+_LOGGER = logging.Logger()
+
+
+def is_solved(image: Dict[str, Any]) -> bool:
+    return (
+        counters.is_active(image)
+        and image.get("veredict") == problem_models.ProblemVeredict.SOLVED.value
+    )
+
+
+AGGREGATE_COUNTERS = counters.AggregateCounters(_SETTINGS.aggregate_table_name)
+
+COUNTER_RULES = {
+    _SETTINGS.minicourse_table_name: [
+        counters.CounterRule(counters.CATEGORY_KIND, "category_id", "minicourse_count"),
+    ],
+    _SETTINGS.video_table_name: [
+        counters.CounterRule(counters.MINICOURSE_KIND, "minicourse_id", "video_count"),
+    ],
+    _SETTINGS.problem_table_name: [
+        counters.CounterRule(
+            counters.MINICOURSE_KIND, "minicourse_id", "problem_count"
+        ),
+    ],
+    _SETTINGS.problem_evaluation_table_name: [
+        counters.CounterRule(counters.PROBLEM_KIND, "problem_id", "submission_count"),
+        counters.CounterRule(
+            counters.PROBLEM_KIND, "problem_id", "solved_count", is_solved
+        ),
+    ],
+}
+
+DETAIL_SECTIONS = {
+    _SETTINGS.minicourse_table_name: details.MINICOURSE_SECTION,
+    _SETTINGS.video_table_name: details.VIDEO_SECTION,
+    _SETTINGS.problem_table_name: details.PROBLEM_SECTION,
+}
+
+COURSE_DETAILS = details.CourseDetails(_SETTINGS.minicourse_detail_table_name)
+
+STREAM_CONSUMER = stream.StreamConsumer()
+for table_name in COUNTER_RULES:
+    STREAM_CONSUMER.register(
+        table_name, AGGREGATE_COUNTERS.consumer(COUNTER_RULES[table_name])
+    )
+for table_name in DETAIL_SECTIONS:
+    STREAM_CONSUMER.register(
+        table_name, COURSE_DETAILS.consumer(DETAIL_SECTIONS[table_name])
+    )
+
+
+def handler(event: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    ### Errors are raised so the batch is retried instead of losing counts
+    consumed = STREAM_CONSUMER.consume(event)
+    _LOGGER.info("Consumed %s stream records" % (consumed))
+    return {"consumed": consumed}
@@ -0,0 +1,158 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from modding.common import aws_cli, model, stream
+import time
+
+
+AGGREGATE_SEPARATOR = "#"
+
+CATEGORY_KIND = "category"
+MINICOURSE_KIND = "minicourse"
+PROBLEM_KIND = "problem"
+
+### Counters kept for each kind of aggregate, read by the entity handlers
+COUNTERS = {
+    CATEGORY_KIND: ["minicourse_count"],
+    MINICOURSE_KIND: ["video_count", "problem_count"],
+    PROBLEM_KIND: ["submission_count", "solved_count"],
+}
+
+### Stream events already counted on an aggregate are marked on the same
+### table, markers live longer than the stream keeps records
+APPLIED_KIND = "applied"
+APPLIED_TTL_SECONDS = 2 * 24 * 60 * 60
+EXPIRES_FIELD = "expires_at"
+
+
+def aggregate_id(kind: str, id: str) -> str:
+    return f"{kind}{AGGREGATE_SEPARATOR}{id}"
+
+
+def applied_id(event_id: str, id: str) -> str:
+    return aggregate_id(APPLIED_KIND, f"{event_id}{AGGREGATE_SEPARATOR}{id}")
+
+
+def is_active(image: Dict[str, Any]) -> bool:
+    return image.get("data_state") == model.DataState.ACTIVE.value
+
+
+class CounterRule:
+    ### One counter of a parent aggregate, an item of the child table counts
+    ### while the predicate holds for it
+
+    def __init__(
+        self,
+        kind: str,
+        parent_field: str,
+        counter: str,
+        predicate: Callable[[Dict[str, Any]], bool] = is_active,
+    ):
+        self.kind = kind
+        self.parent_field = parent_field
+        self.counter = counter
+        self.predicate = predicate
+
+    def contribution(self, image: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not image or not image.get(self.parent_field):
+            return None
+        if not self.predicate(image):
+            return None
+        return aggregate_id(self.kind, image.get(self.parent_field))
+
+
+def deltas(
+    records: List[stream.StreamRecord], rules: List[CounterRule]
+) -> Dict[str, Dict[str, Dict[str, int]]]:
+    ### Counter amounts of every aggregate by stream event. Old and new images
+    ### are compared, moving an item to another parent or changing its state
+    ### only changes the counters involved
+    result: Dict[str, Dict[str, Dict[str, int]]] = dict()
+    for record in records:
+        for rule in rules:
+            old, new = rule.contribution(record.old), rule.contribution(record.new)
+            if old == new:
+                continue
+            for id, amount in [(old, -1), (new, 1)]:
+                if id:
+                    counters = result.setdefault(id, dict())
+                    counters = counters.setdefault(record.event_id, dict())
+                    counters[rule.counter] = counters.get(rule.counter, 0) + amount
+    return {
+        id: {
+            event_id: {counter: amount for counter, amount in counters.items()}
+            for event_id, counters in events.items()
+            if any(counters.values())
+        }
+        for id, events in result.items()
+        if any(any(counters.values()) for counters in events.values())
+    }
+
+
+class AggregateCounters:
+    ### Counters of an entity kept on one item, id is kind#entity id. Stream
+    ### batches are delivered at least once, so every event is marked on the
+    ### same transaction that counts it and is never counted twice
+
+    ### The marker puts and the update of the counters
+    TRANSACTION_EVENTS = aws_cli.AwsCustomClient.DynamoDB.TRANSACTION_SIZE - 1
+
+    def __init__(self, table_name: str, clock: Callable[[], float] = time.time):
+        self.table = aws_cli.AwsCustomClient.dynamo(table_name)
+        self.clock = clock
+
+    def __count(self, id: str, events: List[Tuple[str, Dict[str, int]]]) -> None:
+        totals: Dict[str, int] = dict()
+        for _, counters in events:
+            for counter, amount in counters.items():
+                totals[counter] = totals.get(counter, 0) + amount
+        expires_at = int(self.clock()) + APPLIED_TTL_SECONDS
+        operations = [
+            {
+                "Put": {
+                    "Item": {"id": applied_id(event_id, id), EXPIRES_FIELD: expires_at},
+                    "ConditionExpression": "attribute_not_exists(#id)",
+                    "ExpressionAttributeNames": {"#id": "id"},
+                }
+            }
+            for event_id, _ in events
+        ]
+        adds = {counter: amount for counter, amount in totals.items() if amount}
+        if adds:
+            operations.append(self.table.update_operation({"id": id}, {}, adds=adds))
+        self.table.transact_write_items(operations)
+
+    def apply(self, changes: Dict[str, Dict[str, Dict[str, int]]]) -> None:
+        ### One transaction per aggregate for the whole batch. When an earlier
+        ### try of the batch counted some of its events they are sent one by
+        ### one, the ones already marked are skipped
+        for id in changes:
+            events = list(changes[id].items())
+            for start in range(0, len(events), self.TRANSACTION_EVENTS):
+                chunk = events[start : start + self.TRANSACTION_EVENTS]
+                try:
+                    self.__count(id, chunk)
+                except aws_cli.AwsCustomClient.DynamoDB.TransactionCanceled:
+                    for event in chunk:
+                        try:
+                            self.__count(id, [event])
+                        except aws_cli.AwsCustomClient.DynamoDB.TransactionCanceled:
+                            pass
+
+    def consumer(
+        self, rules: List[CounterRule]
+    ) -> Callable[[List[stream.StreamRecord]], None]:
+        def consume(records: List[stream.StreamRecord]) -> None:
+            self.apply(deltas(records, rules))
+
+        return consume
+
+    def get(self, kind: str, id: str) -> Dict[str, int]:
+        ### Counters of the kind in one read, nothing counted yet is 0. They
+        ### are counted from the table streams and can lag the last writes
+        counters = COUNTERS[kind]
+        item = (
+            self.table.get_item_no_filters(
+                {"id": aggregate_id(kind, id)}, fields=counters
+            )
+            or {}
+        )
+        return {counter: int(item.get(counter) or 0) for counter in counters}
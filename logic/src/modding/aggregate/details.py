@@ -0,0 +1,161 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+import pydantic
+from modding.aggregate import counters
+from modding.common import aws_cli, model, stream
+from modding.minicourse import models as minicourse_models
+from modding.problem import models as problem_models
+from modding.video import models as video_models
+
+
+ATTRIBUTE_SEPARATOR = "#"
+ROW_FIELD = "row"
+VALUE_FIELD = "value"
+
+
+class DetailSection:
+    ### Rows of one table kept on the detail of their parent while active.
+    ### Each row is an item of the parent partition, its sort key is name#row
+    ### id, or just name when single, so rows are set and removed blindly
+
+    def __init__(
+        self,
+        name: str,
+        parent_field: str,
+        model_cls: Type[pydantic.BaseModel],
+        single: bool = False,
+        excluded: Tuple[str, ...] = (),
+        sort_key: Callable[[Dict[str, Any]], Any] = lambda row: row.get("id"),
+    ):
+        self.name = name
+        self.parent_field = parent_field
+        self.model_cls = model_cls
+        self.single = single
+        self.excluded = excluded
+        self.sort_key = sort_key
+
+    def attribute(self, image: Dict[str, Any]) -> str:
+        if self.single:
+            return self.name
+        return f"{self.name}{ATTRIBUTE_SEPARATOR}{image.get('id')}"
+
+    def target(self, image: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+        if not image or not image.get(self.parent_field):
+            return None
+        if not counters.is_active(image):
+            return None
+        return (image.get(self.parent_field), self.attribute(image))
+
+    def project(self, image: Dict[str, Any]) -> Dict[str, Any]:
+        ### Stored with dynamodb types, they are only turned into json on reads
+        return {
+            name: image[name]
+            for name in self.model_cls.__fields__
+            if name in image and name not in self.excluded
+        }
+
+    def rows(self, detail: Dict[str, Any]) -> Any:
+        ### Detail rows by sort key
+        if self.single:
+            row = detail.get(self.name)
+            return model.serialize_trusted(self.model_cls, row, partial=True)
+        prefix = f"{self.name}{ATTRIBUTE_SEPARATOR}"
+        rows = [
+            model.serialize_trusted(self.model_cls, detail[key], partial=True)
+            for key in detail
+            if key.startswith(prefix)
+        ]
+        return sorted(rows, key=self.sort_key)
+
+
+def changes(
+    records: List[stream.StreamRecord], section: DetailSection
+) -> Dict[str, Dict[str, Optional[Dict[str, Any]]]]:
+    ### Records are applied in stream order, the last one of a row wins. None
+    ### removes the row, a row moved to another parent leaves the old one
+    result: Dict[str, Dict[str, Optional[Dict[str, Any]]]] = dict()
+    for record in records:
+        old, new = section.target(record.old), section.target(record.new)
+        if old and old != new:
+            result.setdefault(old[0], dict())[old[1]] = None
+        if new:
+            result.setdefault(new[0], dict())[new[1]] = section.project(record.new)
+    return result
+
+
+VIDEO_SECTIONS = [section.value for section in video_models.VideoSections]
+
+
+def video_position(video: Dict[str, Any]) -> Tuple[int, int, int]:
+    return (
+        (
+            VIDEO_SECTIONS.index(video.get("section"))
+            if video.get("section") in VIDEO_SECTIONS
+            else len(VIDEO_SECTIONS)
+        ),
+        video.get("order") or 0,
+        video.get("creation_date") or 0,
+    )
+
+
+MINICOURSE_SECTION = DetailSection(
+    "minicourse", "id", minicourse_models.Minicourse, single=True
+)
+VIDEO_SECTION = DetailSection(
+    "videos", "minicourse_id", video_models.Video, sort_key=video_position
+)
+PROBLEM_SECTION = DetailSection(
+    "problems",
+    "minicourse_id",
+    problem_models.Problem,
+    excluded=("test_case",),
+    sort_key=lambda problem: (
+        problem.get("difficulty") or 0,
+        problem.get("creation_date") or 0,
+    ),
+)
+
+
+class CourseDetails:
+    ### Materialized detail of every minicourse kept under its id, one item per
+    ### row so the detail is not bound by the item size. The course page is
+    ### one query
+
+    def __init__(
+        self,
+        table_name: str,
+        sections: Tuple[DetailSection, ...] = (VIDEO_SECTION, PROBLEM_SECTION),
+        main: DetailSection = MINICOURSE_SECTION,
+    ):
+        self.table = aws_cli.AwsCustomClient.dynamo(table_name)
+        self.main = main
+        self.sections = [main, *sections]
+
+    def apply(self, rows: Dict[str, Dict[str, Optional[Dict[str, Any]]]]) -> None:
+        ### One batch write for the whole batch, rows are coalesced already
+        items, delete_keys = [], []
+        for id in rows:
+            for key, row in rows[id].items():
+                if row is None:
+                    delete_keys.append({"id": id, ROW_FIELD: key})
+                else:
+                    items.append({"id": id, ROW_FIELD: key, VALUE_FIELD: row})
+        if items or delete_keys:
+            self.table.batch_write_items(items, delete_keys)
+
+    def consumer(
+        self, section: DetailSection
+    ) -> Callable[[List[stream.StreamRecord]], None]:
+        def consume(records: List[stream.StreamRecord]) -> None:
+            self.apply(changes(records, section))
+
+        return consume
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        ### Details whose minicourse was removed are not found
+        rows = {
+            item[ROW_FIELD]: item.get(VALUE_FIELD)
+            for item in self.table.query_items({"id": id}, dict())
+        }
+        if self.main.name not in rows:
+            return None
+        return {section.name: section.rows(rows) for section in self.sections}
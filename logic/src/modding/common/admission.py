@@ -0,0 +1,156 @@
+import decimal
+import math
+import time
+from typing import Callable, Dict, Optional
+from boto3.dynamodb.conditions import Attr
+from modding.common import aws_cli, exception
+
+
+GLOBAL_BUCKET = "global"
+USER_BUCKET_PREFIX = "user#"
+ARRIVAL_FIELD = "arrival_at"
+
+
+class RateLimited(exception.LoggingErrorException):
+    def __init__(self, bucket: str, retry_after: int):
+        super().__init__(
+            "Rate limit reached for %s, retry after %s seconds" % (bucket, retry_after)
+        )
+        self.retry_after = retry_after
+
+
+class MissingUsername(exception.LoggingErrorException):
+    def __init__(self):
+        super().__init__("Requests without a username can not be admitted")
+
+
+class TokenBucket:
+    ### Kept as the time the next token is due, the bucket is full when it is
+    ### in the past and empty when it is more than the burst ahead. Taking a
+    ### token moves it an interval forward, which an update can add atomically
+
+    def __init__(self, capacity: int, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+    @property
+    def interval(self) -> float:
+        return 1 / self.refill_per_second
+
+    @property
+    def burst(self) -> float:
+        return (self.capacity - 1) * self.interval
+
+    def admits(self, arrival_at: float, now: float) -> bool:
+        return arrival_at - now <= self.burst
+
+    def retry_after(self, arrival_at: float, now: float) -> int:
+        return max(math.ceil(arrival_at - self.burst - now), 1)
+
+
+def _number(value: float) -> decimal.Decimal:
+    return decimal.Decimal(str(value))
+
+
+class AdmissionController:
+    ### Token buckets shared by every lambda through a dynamodb table, each warm
+    ### lambda keeps the last state it saw so requests that would certainly be
+    ### rejected never reach the table. Tokens are taken with one conditional
+    ### update per bucket, the refill is the condition on the due time
+
+    def __init__(
+        self,
+        table_name: str,
+        user_bucket: TokenBucket,
+        global_bucket: TokenBucket,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.table = aws_cli.AwsCustomClient.dynamo(table_name)
+        self.user_bucket = user_bucket
+        self.global_bucket = global_bucket
+        self.clock = clock
+        self.__known: Dict[str, float] = dict()
+
+    def __check_known(self, key: str, bucket: TokenBucket, now: float) -> None:
+        arrival_at = self.__known.get(key)
+        if arrival_at is not None and not bucket.admits(arrival_at, now):
+            raise RateLimited(key, bucket.retry_after(arrival_at, now))
+
+    def __take_full(self, key: str, bucket: TokenBucket, now: float) -> Optional[float]:
+        ### The due time is in the past, the bucket refilled completely
+        try:
+            item = self.table.update_item(
+                {"id": key},
+                {ARRIVAL_FIELD: _number(now + bucket.interval)},
+                condition=(
+                    Attr(ARRIVAL_FIELD).not_exists()
+                    | Attr(ARRIVAL_FIELD).lt(_number(now))
+                ),
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            return None
+        return float(item.get(ARRIVAL_FIELD))
+
+    def __take_partial(
+        self, key: str, bucket: TokenBucket, now: float
+    ) -> Optional[float]:
+        ### Some tokens are still due, one is left while they are within burst
+        try:
+            item = self.table.update_item(
+                {"id": key},
+                dict(),
+                condition=Attr(ARRIVAL_FIELD).between(
+                    _number(now), _number(now + bucket.burst)
+                ),
+                adds={ARRIVAL_FIELD: _number(bucket.interval)},
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            return None
+        return float(item.get(ARRIVAL_FIELD))
+
+    def __take(self, key: str, bucket: TokenBucket) -> None:
+        ### The state last seen picks the update more likely to hold, the other
+        ### one is tried when it does not. Both failing means no token is left
+        now = self.clock()
+        takes = [self.__take_full, self.__take_partial]
+        if self.__known.get(key, now - 1) >= now:
+            takes.reverse()
+        for take in takes:
+            arrival_at = take(key, bucket, now)
+            if arrival_at is not None:
+                self.__known[key] = arrival_at
+                return None
+
+        item = self.table.get_item_no_filters({"id": key}) or dict()
+        arrival_at = float(item.get(ARRIVAL_FIELD) or now)
+        self.__known[key] = arrival_at
+        raise RateLimited(key, bucket.retry_after(arrival_at, now))
+
+    def __give_back(self, key: str, bucket: TokenBucket) -> None:
+        try:
+            item = self.table.update_item(
+                {"id": key},
+                dict(),
+                condition=Attr(ARRIVAL_FIELD).exists(),
+                adds={ARRIVAL_FIELD: _number(-bucket.interval)},
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            return None
+        self.__known[key] = float(item.get(ARRIVAL_FIELD))
+
+    def admit(self, username: Optional[str]) -> None:
+        ### Anonymous requests would all share one user bucket
+        if not username:
+            raise MissingUsername()
+        now = self.clock()
+        user_key = f"{USER_BUCKET_PREFIX}{username}"
+        self.__check_known(user_key, self.user_bucket, now)
+        self.__check_known(GLOBAL_BUCKET, self.global_bucket, now)
+
+        self.__take(user_key, self.user_bucket)
+        try:
+            self.__take(GLOBAL_BUCKET, self.global_bucket)
+        except RateLimited:
+            ### Requests rejected by the global bucket do not count for the user
+            self.__give_back(user_key, self.user_bucket)
+            raise
@@ -0,0 +1,30 @@
+import collections.abc
+from typing import Any
+from modding.common import aws_cli, repo
+
+
+class AsyncRepository:
+    ### Awaitable view of a repository, its methods run on the shared executor
+    ### so independent calls of a request can be awaited together. Lazy results
+    ### are read there too, so the event loop never waits on the network.
+    ### Workers use their own boto3 resources, the repository guards its
+    ### cache with a lock
+
+    def __init__(self, repository: repo.Repository):
+        self.repository = repository
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.repository, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            result = attribute(*args, **kwargs)
+            if isinstance(result, collections.abc.Iterator):
+                return list(result)
+            return result
+
+        async def awaitable(*args: Any, **kwargs: Any) -> Any:
+            return await aws_cli.AwsCustomClient.run_async(call, *args, **kwargs)
+
+        return awaitable
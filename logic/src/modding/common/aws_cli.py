@@ -1,16 +1,88 @@
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from concurrent import futures
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+import asyncio
 import boto3
+import functools
+import inspect
 import json
+import queue
+import threading
+import time
 from boto3.dynamodb.conditions import Key, Attr, ComparisonCondition
 import pydantic
 from modding.common import exception
 from modding.utils import jwt
 
-
 AUTH0_CLAIMS_PREFIX = "http://claims/"
 
 
 class AwsCustomClient:
+    class Clients:
+        ### Process wide boto3 clients, each one is created the first time a
+        ### wrapper uses it and shared by all of them after that. Low level
+        ### clients are thread safe, resources are not, so each thread gets
+        ### its own resource, released with the thread
+        CLIENT = "client"
+        RESOURCE = "resource"
+        ### Same as the botocore connection pool, more threads would only wait
+        ASYNC_WORKERS = 10
+
+        __created: Dict[str, Any] = dict()
+        __local = threading.local()
+        __executor: Optional[futures.ThreadPoolExecutor] = None
+        __lock = threading.Lock()
+
+        @classmethod
+        def get(cls, kind: str, service: str) -> Any:
+            created = cls.__created
+            if kind == cls.RESOURCE:
+                created = getattr(cls.__local, "resources", None)
+                if created is None:
+                    created = cls.__local.resources = dict()
+            if created.get(service) is None:
+                ### Creating clients on the default session is not thread safe
+                with cls.__lock:
+                    if created.get(service) is None:
+                        factory = (
+                            boto3.resource if kind == cls.RESOURCE else boto3.client
+                        )
+                        created[service] = factory(service)
+            return created[service]
+
+        @classmethod
+        def client(cls, service: str) -> Any:
+            return cls.get(cls.CLIENT, service)
+
+        @classmethod
+        def resource(cls, service: str) -> Any:
+            return cls.get(cls.RESOURCE, service)
+
+        @classmethod
+        def executor(cls) -> futures.ThreadPoolExecutor:
+            if cls.__executor is None:
+                with cls.__lock:
+                    if cls.__executor is None:
+                        cls.__executor = futures.ThreadPoolExecutor(
+                            max_workers=cls.ASYNC_WORKERS
+                        )
+            return cls.__executor
+
+        @classmethod
+        def clear(cls) -> None:
+            with cls.__lock:
+                cls.__created.clear()
+                cls.__local = threading.local()
+
     class ApiGateway:
         class NoAuthorizationHeader(exception.LoggingErrorException):
             def __init__(self):
@@ -86,6 +158,9 @@ class AwsCustomClient:
                 cls.__token_actions(parsed_event.headers, **kwargs)
 
                 handled = handler(parsed_event, args[1])
+                if inspect.isawaitable(handled):
+                    ### Async handlers run on their own loop for the invocation
+                    handled = asyncio.run(handled)
                 return handled
 
             return wrapper
@@ -94,9 +169,12 @@ class AwsCustomClient:
         PUT_EXPIRE_TIME = 300
 
         def __init__(self, bucket_name: str):
-            self.client = boto3.client("s3")
             self.bucket_name = bucket_name
 
+        @property
+        def client(self) -> Any:
+            return AwsCustomClient.Clients.client("s3")
+
         def put_file_presigned_url(self, object_name: str, expire: int) -> str:
             result = self.client.generate_presigned_url(
                 ClientMethod="put_object",
@@ -125,27 +203,102 @@ class AwsCustomClient:
             data = result.get("Body").read().decode("utf-8")
             return data
 
+        def get_file_stream(self, object_name: str) -> Any:
+            result = self.client.get_object(Bucket=self.bucket_name, Key=object_name)
+            return result.get("Body")
+
+        def put_file_content(self, object_name: str, content: str) -> None:
+            self.client.put_object(
+                Bucket=self.bucket_name, Key=object_name, Body=content.encode("utf-8")
+            )
+
     class DynamoDB:
+        class ConditionalCheckFailed(Exception):
+            def __init__(self):
+                super().__init__("Condition of the write was not met")
+
+        class UnprocessedBatch(exception.LoggingErrorException):
+            def __init__(self, table_name: str):
+                super().__init__(
+                    "Batch on table %s still had unprocessed keys" % (table_name)
+                )
+
+        class TransactionCanceled(Exception):
+            def __init__(self, index: int):
+                super().__init__("Condition of the write %s was not met" % (index))
+                self.index = index
+
+        BATCH_GET_SIZE = 100
+        TRANSACTION_SIZE = 100
+        BATCH_WRITE_SIZE = 25
+        BATCH_WRITE_WORKERS = 4
+        BATCH_MAX_TRIES = 5
+        BATCH_BACKOFF_SECONDS = 0.05
+        KEY_QUERY_WORKERS = 10
+        UPDATE_WORKERS = 10
+        SCAN_QUEUE_TIMEOUT_SECONDS = 0.1
+
         def __init__(self, table_name: str):
-            self.resource = boto3.resource("dynamodb")
-            self.table = self.resource.Table(table_name)
+            self.table_name = table_name
+            self.__local = threading.local()
+            self.__schema: Optional[Dict[str, Any]] = None
+
+        @property
+        def resource(self) -> Any:
+            return AwsCustomClient.Clients.resource("dynamodb")
+
+        @property
+        def table(self) -> Any:
+            ### Built on the resource of the calling thread
+            table = getattr(self.__local, "table", None)
+            if table is None:
+                table = self.resource.Table(self.table_name)
+                self.__local.table = table
+            return table
+
+        def key_names(self, index_name: Optional[str] = None) -> List[str]:
+            ### Attributes of a start key, the table keys and the ones of the
+            ### index. The schema is described once per table
+            if self.__schema is None:
+                response = self.resource.meta.client.describe_table(
+                    TableName=self.table_name
+                )
+                self.__schema = response.get("Table")
+            schemas = [self.__schema.get("KeySchema")] + [
+                index.get("KeySchema")
+                for index in self.__schema.get("GlobalSecondaryIndexes") or []
+                if index.get("IndexName") == index_name
+            ]
+            return list(
+                dict.fromkeys(
+                    key["AttributeName"] for schema in schemas for key in schema
+                )
+            )
 
-        def query_items(
-            self,
-            keys: Dict[str, Any],
-            filters: Dict[str, Tuple[str, str]],
-            index_name: str = None,
-        ) -> Optional[Dict[str, Any]]:
+        @staticmethod
+        def __key_conditions(keys: Dict[str, Any]) -> Any:
+            ### Sort keys can be given as (comparison, value), between takes a
+            ### (low, high) tuple as value
             key_conditions = None
-            filter_conditions = None
             for key in keys:
                 value = keys[key]
-                condition = Key(key).eq(value)
+                if isinstance(value, tuple):
+                    comparison, value = value
+                    operator = getattr(Key(key), comparison)
+                    condition = (
+                        operator(*value) if comparison == "between" else operator(value)
+                    )
+                else:
+                    condition = Key(key).eq(value)
                 if key_conditions:
                     key_conditions = key_conditions & condition
                 else:
                     key_conditions = condition
+            return key_conditions
 
+        @staticmethod
+        def __filter_conditions(filters: Dict[str, Tuple[str, str]]) -> Any:
+            filter_conditions = None
             for filter in filters:
                 comparison, value = filters[filter]
                 operator: ComparisonCondition = getattr(Attr(filter), comparison)
@@ -154,52 +307,510 @@ class AwsCustomClient:
                     filter_conditions &= condition
                 else:
                     filter_conditions = condition
+            return filter_conditions
 
-            params = {
-                **({"IndexName": index_name} if index_name else {}),
-                "KeyConditionExpression": key_conditions,
-                "FilterExpression": filter_conditions,
+        @staticmethod
+        def __projection(fields: Optional[List[str]]) -> Dict[str, Any]:
+            ### Placeholders avoid clashes with dynamodb reserved words, they do
+            ### not collide with the #n names boto3 generates for conditions
+            if not fields:
+                return dict()
+            names = {f"#p{index}": field for index, field in enumerate(fields)}
+            return {
+                "ProjectionExpression": ", ".join(names),
+                "ExpressionAttributeNames": names,
             }
 
-            return self.table.query(**params).get("Items") or None
+        @staticmethod
+        def __paginate(
+            operation: Callable[..., Dict[str, Any]], params: Dict[str, Any]
+        ) -> Iterator[List[Dict[str, Any]]]:
+            ### Follows LastEvaluatedKey until the last page, one page at a time
+            while True:
+                response = operation(**params)
+                yield response.get("Items") or []
+                last_key = response.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                params = {**params, "ExclusiveStartKey": last_key}
 
-        def scan_items(
-            self, filters: Dict[str, Tuple[str, str]]
-        ) -> Optional[Dict[str, Any]]:
-            filter_conditions = None
-            for filter in filters:
-                comparison, value = filters[filter]
-                operator: ComparisonCondition = getattr(Attr(filter), comparison)
-                condition = operator(value)
-                if filter_conditions:
-                    filter_conditions &= condition
-                else:
-                    filter_conditions = condition
+        @staticmethod
+        def __limit_items(
+            pages: Iterator[List[Dict[str, Any]]], limit: Optional[int]
+        ) -> Iterator[Dict[str, Any]]:
+            if limit is not None and limit <= 0:
+                return
+            count = 0
+            for page in pages:
+                for item in page:
+                    yield item
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+
+        def __query_params(
+            self,
+            keys: Dict[str, Any],
+            filters: Dict[str, Tuple[str, str]],
+            index_name: str = None,
+            fields: Optional[List[str]] = None,
+            ascending: bool = True,
+        ) -> Dict[str, Any]:
+            filter_conditions = self.__filter_conditions(filters)
+            return {
+                **({"IndexName": index_name} if index_name else {}),
+                "KeyConditionExpression": self.__key_conditions(keys),
+                **({} if ascending else {"ScanIndexForward": False}),
+                **(
+                    {"FilterExpression": filter_conditions} if filter_conditions else {}
+                ),
+                **self.__projection(fields),
+            }
 
-            return (
-                self.table.scan(FilterExpression=filter_conditions).get("Items") or None
+        def query_pages(
+            self,
+            keys: Dict[str, Any],
+            filters: Dict[str, Tuple[str, str]],
+            index_name: str = None,
+            fields: Optional[List[str]] = None,
+            ascending: bool = True,
+            page_size: Optional[int] = None,
+        ) -> Iterator[List[Dict[str, Any]]]:
+            params = {
+                **self.__query_params(
+                    keys,
+                    filters,
+                    index_name=index_name,
+                    fields=fields,
+                    ascending=ascending,
+                ),
+                **({"Limit": page_size} if page_size else {}),
+            }
+            return self.__paginate(self.table.query, params)
+
+        def query_items(
+            self,
+            keys: Dict[str, Any],
+            filters: Dict[str, Tuple[str, str]],
+            index_name: str = None,
+            limit: Optional[int] = None,
+            fields: Optional[List[str]] = None,
+            ascending: bool = True,
+        ) -> Iterator[Dict[str, Any]]:
+            ### Without filters every read item is returned, so only limit items
+            ### are asked for, with them dynamodb limits before filtering
+            pages = self.query_pages(
+                keys,
+                filters,
+                index_name=index_name,
+                fields=fields,
+                ascending=ascending,
+                page_size=None if filters else limit,
             )
+            return self.__limit_items(pages, limit)
+
+        def query_page(
+            self,
+            keys: Dict[str, Any],
+            filters: Dict[str, Tuple[str, str]],
+            index_name: str = None,
+            limit: Optional[int] = None,
+            start_key: Optional[Dict[str, Any]] = None,
+            fields: Optional[List[str]] = None,
+            ascending: bool = True,
+        ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+            params = {
+                **self.__query_params(
+                    keys,
+                    filters,
+                    index_name=index_name,
+                    fields=fields,
+                    ascending=ascending,
+                ),
+                **({"Limit": limit} if limit else {}),
+                **({"ExclusiveStartKey": start_key} if start_key else {}),
+            }
+            response = self.table.query(**params)
+            return response.get("Items") or [], response.get("LastEvaluatedKey")
+
+        def scan_pages(
+            self,
+            filters: Dict[str, Tuple[str, str]],
+            fields: Optional[List[str]] = None,
+        ) -> Iterator[List[Dict[str, Any]]]:
+            filter_conditions = self.__filter_conditions(filters)
+            params = {
+                **(
+                    {"FilterExpression": filter_conditions} if filter_conditions else {}
+                ),
+                **self.__projection(fields),
+            }
+            return self.__paginate(self.table.scan, params)
+
+        def __offer(
+            self, pages: queue.Queue, value: Any, stop: threading.Event
+        ) -> bool:
+            ### Gives up when the consumer stopped reading so workers never hang
+            while not stop.is_set():
+                try:
+                    pages.put(value, timeout=self.SCAN_QUEUE_TIMEOUT_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def __scan_segment(
+            self,
+            client: Any,
+            params: Dict[str, Any],
+            segment: int,
+            total_segments: int,
+            pages: queue.Queue,
+            stop: threading.Event,
+        ) -> None:
+            segment_params = {
+                **params,
+                "TableName": self.table_name,
+                "Segment": segment,
+                "TotalSegments": total_segments,
+            }
+            try:
+                for page in self.__paginate(client.scan, segment_params):
+                    if not self.__offer(pages, page, stop):
+                        return None
+            except Exception as e:
+                self.__offer(pages, e, stop)
+            finally:
+                self.__offer(pages, None, stop)
+
+        def parallel_scan_pages(
+            self,
+            filters: Dict[str, Tuple[str, str]],
+            segments: int,
+            fields: Optional[List[str]] = None,
+        ) -> Iterator[List[Dict[str, Any]]]:
+            ### Every segment is scanned by its own worker on the shared low level
+            ### client, pages are yielded as soon as any segment returns one
+            filter_conditions = self.__filter_conditions(filters)
+            params = {
+                **(
+                    {"FilterExpression": filter_conditions} if filter_conditions else {}
+                ),
+                **self.__projection(fields),
+            }
+            client = self.resource.meta.client
+            pages = queue.Queue(maxsize=segments * 2)
+            stop = threading.Event()
+            executor = futures.ThreadPoolExecutor(max_workers=segments)
+            for segment in range(segments):
+                executor.submit(
+                    self.__scan_segment, client, params, segment, segments, pages, stop
+                )
+
+            try:
+                finished = 0
+                while finished < segments:
+                    page = pages.get()
+                    if page is None:
+                        finished += 1
+                    elif isinstance(page, Exception):
+                        raise page
+                    else:
+                        yield page
+            finally:
+                stop.set()
+                executor.shutdown(wait=False)
+
+        def scan_items(
+            self,
+            filters: Dict[str, Tuple[str, str]],
+            limit: Optional[int] = None,
+            fields: Optional[List[str]] = None,
+            segments: int = 1,
+        ) -> Iterator[Dict[str, Any]]:
+            if segments > 1:
+                pages = self.parallel_scan_pages(filters, segments, fields=fields)
+            else:
+                pages = self.scan_pages(filters, fields=fields)
+            return self.__limit_items(pages, limit)
 
         def get_item(
-            self, keys: Dict[str, Any], filters: Dict[str, Tuple[str, str]]
+            self, keys: Dict[str, Any], fields: Optional[List[str]] = None
         ) -> Optional[Dict[str, Any]]:
-            response = self.query_items(keys, filters)
-            return response[0] if response else None
+            ### Key only query for when just the partition key is known, without
+            ### filters Limit=1 reads a single item
+            items, _ = self.query_page(keys, dict(), limit=1, fields=fields)
+            return items[0] if items else None
+
+        def batch_get_items(self, keys: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            ### Items come back in any order, unprocessed keys are retried with
+            ### exponential backoff
+            result = []
+            for start in range(0, len(keys), self.BATCH_GET_SIZE):
+                chunk = keys[start : start + self.BATCH_GET_SIZE]
+                pending = {self.table_name: {"Keys": chunk}}
+                for tries in range(self.BATCH_MAX_TRIES):
+                    response = self.resource.batch_get_item(RequestItems=pending)
+                    result.extend(
+                        (response.get("Responses") or {}).get(self.table_name) or []
+                    )
+                    pending = response.get("UnprocessedKeys") or {}
+                    if not pending:
+                        break
+                    time.sleep(self.BATCH_BACKOFF_SECONDS * 2**tries)
+                if pending:
+                    raise self.UnprocessedBatch(self.table_name)
+            return result
+
+        def __batch_write_chunk(
+            self, client: Any, requests: List[Dict[str, Any]]
+        ) -> None:
+            pending = {self.table_name: requests}
+            for tries in range(self.BATCH_MAX_TRIES):
+                response = client.batch_write_item(RequestItems=pending)
+                pending = response.get("UnprocessedItems") or {}
+                if not pending:
+                    return None
+                time.sleep(self.BATCH_BACKOFF_SECONDS * 2**tries)
+            raise self.UnprocessedBatch(self.table_name)
+
+        def batch_put_items(self, items: List[Dict[str, Any]]) -> None:
+            self.batch_write_items(items)
+
+        def batch_write_items(
+            self,
+            items: List[Dict[str, Any]],
+            delete_keys: Optional[List[Dict[str, Any]]] = None,
+        ) -> None:
+            ### Chunks are written concurrently on the shared low level client,
+            ### unprocessed items are retried with exponential backoff
+            requests = [{"PutRequest": {"Item": item}} for item in items]
+            requests += [{"DeleteRequest": {"Key": key}} for key in delete_keys or []]
+            chunks = [
+                requests[start : start + self.BATCH_WRITE_SIZE]
+                for start in range(0, len(requests), self.BATCH_WRITE_SIZE)
+            ]
+            write_chunk = functools.partial(
+                self.__batch_write_chunk, self.resource.meta.client
+            )
+            with futures.ThreadPoolExecutor(
+                max_workers=self.BATCH_WRITE_WORKERS
+            ) as executor:
+                for _ in executor.map(write_chunk, chunks):
+                    pass
+
+        def get_items(
+            self, keys: List[Dict[str, Any]]
+        ) -> List[Optional[Dict[str, Any]]]:
+            ### Concurrent key only queries for when just the partition keys are
+            ### known, the low level client is shared because it is thread safe
+            client = self.resource.meta.client
+
+            def first(key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                response = client.query(
+                    TableName=self.table_name,
+                    KeyConditionExpression=self.__key_conditions(key),
+                    Limit=1,
+                )
+                items = response.get("Items") or []
+                return items[0] if items else None
+
+            with futures.ThreadPoolExecutor(
+                max_workers=self.KEY_QUERY_WORKERS
+            ) as executor:
+                return list(executor.map(first, keys))
 
         def get_item_no_filters(
-            self, values: Dict[str, Any]
+            self, values: Dict[str, Any], fields: Optional[List[str]] = None
         ) -> Optional[Dict[str, Any]]:
-            return self.table.get_item(Key=values).get("Item") or None
+            params = self.__projection(fields)
+            return self.table.get_item(Key=values, **params).get("Item") or None
+
+        def put_item(self, item: Dict[str, Any], condition: Any = None) -> None:
+            params = {"ConditionExpression": condition} if condition else {}
+            try:
+                self.table.put_item(Item=item, **params)
+            except self.resource.meta.client.exceptions.ConditionalCheckFailedException:
+                raise self.ConditionalCheckFailed()
 
-        def put_item(self, item: Dict[str, Any]) -> None:
-            self.table.put_item(Item=item)
+        @staticmethod
+        def __update_expression(
+            values: Dict[str, Any],
+            increments: Dict[str, Tuple[int, int]],
+            appends: Dict[str, List[Any]],
+            removes: List[str],
+            adds: Dict[str, int],
+        ) -> Dict[str, Any]:
+            ### Increments are (start, amount), start is used when the attribute
+            ### does not exist yet, appends create the list when it is missing.
+            ### Adds are plain ADD counters, missing attributes count from zero
+            clauses, names, placeholders = [], dict(), dict()
+            for field in values:
+                name, value = f"#u{len(names)}", f":u{len(names)}"
+                clauses.append(f"{name} = {value}")
+                names[name], placeholders[value] = field, values[field]
+            for field in increments:
+                name, value = f"#u{len(names)}", f":u{len(names)}"
+                start, amount = increments[field]
+                clauses.append(f"{name} = if_not_exists({name}, {value}s) + {value}")
+                names[name], placeholders[value] = field, amount
+                placeholders[f"{value}s"] = start
+            for field in appends:
+                name, value = f"#u{len(names)}", f":u{len(names)}"
+                clauses.append(
+                    f"{name} = list_append(if_not_exists({name}, :empty), {value})"
+                )
+                names[name], placeholders[value] = field, appends[field]
+                placeholders[":empty"] = []
+            added = []
+            for field in adds:
+                name, value = f"#u{len(names)}", f":u{len(names)}"
+                added.append(f"{name} {value}")
+                names[name], placeholders[value] = field, adds[field]
+            removed = []
+            for field in removes:
+                name = f"#u{len(names)}"
+                removed.append(name)
+                names[name] = field
+            sections = [
+                f"{action} " + ", ".join(parts)
+                for action, parts in [
+                    ("SET", clauses),
+                    ("ADD", added),
+                    ("REMOVE", removed),
+                ]
+                if parts
+            ]
+            return {
+                "UpdateExpression": " ".join(sections),
+                "ExpressionAttributeNames": names,
+                **({"ExpressionAttributeValues": placeholders} if placeholders else {}),
+            }
+
+        def update_item(
+            self,
+            key: Dict[str, Any],
+            values: Dict[str, Any],
+            condition: Any = None,
+            increments: Dict[str, Tuple[int, int]] = None,
+            appends: Dict[str, List[Any]] = None,
+            removes: List[str] = None,
+            adds: Dict[str, int] = None,
+        ) -> Dict[str, Any]:
+            ### Sets only the given attributes and returns the whole new item
+            params = {
+                "Key": key,
+                **self.__update_expression(
+                    values, increments or {}, appends or {}, removes or [], adds or {}
+                ),
+                "ReturnValues": "ALL_NEW",
+                **({"ConditionExpression": condition} if condition else {}),
+            }
+            try:
+                response = self.table.update_item(**params)
+            except self.resource.meta.client.exceptions.ConditionalCheckFailedException:
+                raise self.ConditionalCheckFailed()
+            return response.get("Attributes") or dict()
+
+        def update_items(self, updates: List[Dict[str, Any]]) -> List[bool]:
+            ### Concurrent updates, each one given as update_item arguments.
+            ### Tells for every update whether its condition held, the low
+            ### level client is shared because it is thread safe
+            client = self.resource.meta.client
+
+            def update(params: Dict[str, Any]) -> bool:
+                request = {
+                    "TableName": self.table_name,
+                    "Key": params["key"],
+                    **self.__update_expression(
+                        params.get("values") or {},
+                        params.get("increments") or {},
+                        params.get("appends") or {},
+                        params.get("removes") or [],
+                        params.get("adds") or {},
+                    ),
+                    **(
+                        {"ConditionExpression": params["condition"]}
+                        if params.get("condition")
+                        else {}
+                    ),
+                }
+                try:
+                    client.update_item(**request)
+                except client.exceptions.ConditionalCheckFailedException:
+                    return False
+                return True
+
+            with futures.ThreadPoolExecutor(
+                max_workers=self.UPDATE_WORKERS
+            ) as executor:
+                return list(executor.map(update, updates))
 
         def delete_item(self, key: Dict[str, Any]) -> None:
             self.table.delete_item(Key=key)
 
+        def update_operation(
+            self,
+            key: Dict[str, Any],
+            values: Dict[str, Any],
+            condition: Optional[str] = None,
+            increments: Dict[str, Tuple[int, int]] = None,
+            appends: Dict[str, List[Any]] = None,
+            removes: List[str] = None,
+            adds: Dict[str, int] = None,
+        ) -> Dict[str, Any]:
+            ### Update of a transaction, same expressions update_item writes
+            return {
+                "Update": {
+                    "Key": key,
+                    **self.__update_expression(
+                        values,
+                        increments or {},
+                        appends or {},
+                        removes or [],
+                        adds or {},
+                    ),
+                    **({"ConditionExpression": condition} if condition else {}),
+                }
+            }
+
+        def transact_write_items(self, operations: List[Dict[str, Any]]) -> None:
+            ### Puts and updates, {"Put": ...} or {"Update": ...}, written all or
+            ### none in chunks of the transaction size. boto3 only fills
+            ### condition placeholders at the top level of a request, so
+            ### operations come with plain expressions
+            client = self.resource.meta.client
+            for start in range(0, len(operations), self.TRANSACTION_SIZE):
+                chunk = operations[start : start + self.TRANSACTION_SIZE]
+                try:
+                    client.transact_write_items(
+                        TransactItems=[
+                            {
+                                action: {"TableName": self.table_name, **operation}
+                                for action, operation in item.items()
+                            }
+                            for item in chunk
+                        ]
+                    )
+                except client.exceptions.TransactionCanceledException as e:
+                    reasons = e.response.get("CancellationReasons") or []
+                    failed = [
+                        index
+                        for index, reason in enumerate(reasons)
+                        if reason.get("Code") == "ConditionalCheckFailed"
+                    ]
+                    if not failed:
+                        raise
+                    raise self.TransactionCanceled(start + failed[0])
+
+        def transact_put_items(self, puts: List[Dict[str, Any]]) -> None:
+            ### Conditional puts written all or none
+            self.transact_write_items([{"Put": put} for put in puts])
+
     class SSMParams:
-        def __init__(self):
-            self.client = boto3.client("ssm")
+        @property
+        def client(self) -> Any:
+            return AwsCustomClient.Clients.client("ssm")
 
         def get_secure_params(self, path: str) -> str:
             param = self.client.get_parameter(Name=path)
@@ -209,9 +820,12 @@ class AwsCustomClient:
         CHARSET = "UTF-8"
 
         def __init__(self, email_source_address: str):
-            self.client = boto3.client("ses")
             self.source_address = email_source_address
 
+        @property
+        def client(self) -> Any:
+            return AwsCustomClient.Clients.client("ses")
+
         def verify_address(self) -> Any:
             response = self.client.verify_email_identity(
                 EmailAddress=self.source_address
@@ -241,6 +855,18 @@ class AwsCustomClient:
             )
             return response
 
+    @classmethod
+    def run_async(
+        cls, function: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Awaitable[Any]:
+        ### Blocking boto3 calls are awaited on the shared executor so calls of
+        ### one request can run together. Low level clients are shared, every
+        ### worker thread uses its own resources and tables
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(
+            cls.Clients.executor(), functools.partial(function, *args, **kwargs)
+        )
+
     @classmethod
     def s3(cls, bucket_name: str) -> S3:
         return cls.S3(bucket_name)
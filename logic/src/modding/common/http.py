@@ -1,6 +1,6 @@
 import enum
 import json
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 
 class HttpCodes(enum.Enum):
@@ -8,15 +8,21 @@ class HttpCodes(enum.Enum):
     ACCEPTED = 300
     ERROR = 500
     BAD_REQUEST = 400
+    TOO_MANY_REQUESTS = 429
 
 
-def get_response(code: HttpCodes, body: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+def get_response(
+    code: HttpCodes,
+    body: Union[Dict[str, Any], str],
+    headers: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     return {
         "statusCode": code.value,
         "body": json.dumps(body),
         "headers": {
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Credentials": True,
+            **(headers or {}),
         },
     }
 
@@ -29,6 +35,18 @@ def get_standard_error_response() -> Dict[str, Any]:
     return get_response(HttpCodes.ERROR, "Error")
 
 
+def get_retry_after_response(retry_after: int) -> Dict[str, Any]:
+    return get_response(
+        HttpCodes.TOO_MANY_REQUESTS,
+        {"message": "Too many requests", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def get_bad_request_response(message: str) -> Dict[str, Any]:
+    return get_response(HttpCodes.BAD_REQUEST, {"message": message})
+
+
 def parse_body(event: Dict[str, Any]) -> Dict[str, Any]:
     body = event.get("body") or str()
     return json.loads(body)
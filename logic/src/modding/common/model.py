@@ -1,6 +1,20 @@
+import decimal
 import enum
-from typing import Optional
+import inspect
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 import pydantic
+from pydantic import fields as pydantic_fields
+
+
+SEQUENCE_SHAPES = {
+    pydantic_fields.SHAPE_LIST,
+    pydantic_fields.SHAPE_SET,
+    pydantic_fields.SHAPE_SEQUENCE,
+    pydantic_fields.SHAPE_TUPLE_ELLIPSIS,
+}
+MAPPING_SHAPES = {pydantic_fields.SHAPE_DICT, pydantic_fields.SHAPE_MAPPING}
+
+_CONVERTERS: Dict[Tuple[type, bool], Dict[str, Callable[[Any], Any]]] = dict()
 
 
 class DataState(enum.Enum):
@@ -18,6 +32,25 @@ class CommonModel(pydantic.BaseModel):
     class Config:
         use_enum_values = True
 
+    @classmethod
+    def parse_partial(cls, obj: Dict[str, Any]) -> "CommonModel":
+        ### Validates only the fields present, used for projected items
+        values, errors = dict(), []
+        for name in set(obj) & set(cls.__fields__):
+            value, error = cls.__fields__[name].validate(
+                obj[name], values, loc=name, cls=cls
+            )
+            if error:
+                errors.append(error)
+            values[name] = value
+        if errors:
+            raise pydantic.ValidationError(errors, cls)
+        return cls.construct(_fields_set=set(values), **values)
+
+    @classmethod
+    def parse_trusted(cls, obj: Dict[str, Any]) -> "CommonModel":
+        return construct_trusted(cls, obj)
+
 
 class Model(CommonModel):
     visible: bool = False
@@ -25,3 +58,96 @@ class Model(CommonModel):
 
 class ModelShown(CommonModel):
     id: str
+
+
+def _plain(value: Any) -> Any:
+    ### Dynamodb numbers come as Decimal, they are turned into json numbers
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {key: _plain(value[key]) for key in value}
+    if isinstance(value, (list, tuple, set)):
+        return [_plain(element) for element in value]
+    return value
+
+
+def _field_converter(
+    field: pydantic_fields.ModelField, serialize: bool
+) -> Optional[Callable[[Any], Any]]:
+    type_ = field.type_
+    if inspect.isclass(type_) and issubclass(type_, pydantic.BaseModel):
+        if serialize:
+            convert = lambda value: serialize_trusted(type_, value)
+        else:
+            convert = lambda value: construct_trusted(type_, value)
+    elif type_ is int:
+        convert = int
+    elif type_ is float:
+        convert = float
+    elif type_ is str or type_ is bool:
+        return None
+    else:
+        convert = _plain
+
+    if field.shape == pydantic_fields.SHAPE_SINGLETON:
+        return convert
+    if field.shape in SEQUENCE_SHAPES:
+        return lambda value: [convert(element) for element in value]
+    if field.shape in MAPPING_SHAPES:
+        return lambda value: {key: convert(value[key]) for key in value}
+    return _plain
+
+
+def _converters(
+    cls: Type[pydantic.BaseModel], serialize: bool
+) -> Dict[str, Callable[[Any], Any]]:
+    ### Built once per model, fields that need no conversion are left out
+    key = (cls, serialize)
+    if key not in _CONVERTERS:
+        converters = dict()
+        for name, field in cls.__fields__.items():
+            converter = _field_converter(field, serialize)
+            if converter:
+                converters[name] = converter
+        _CONVERTERS[key] = converters
+    return _CONVERTERS[key]
+
+
+def construct_trusted(
+    cls: Type[pydantic.BaseModel], obj: Dict[str, Any]
+) -> pydantic.BaseModel:
+    ### Rows written by the service are not validated again, only the types
+    ### dynamodb changes are converted, attributes out of the model are dropped.
+    ### Same steps as construct, without its per call keyword handling
+    converters = _converters(cls, False)
+    values, fields_set = dict(), set()
+    for name, field in cls.__fields__.items():
+        if name in obj:
+            value, convert = obj[name], converters.get(name)
+            values[name] = convert(value) if convert and value is not None else value
+            fields_set.add(name)
+        else:
+            values[name] = field.get_default()
+    entity = cls.__new__(cls)
+    object.__setattr__(entity, "__dict__", values)
+    object.__setattr__(entity, "__fields_set__", fields_set)
+    entity._init_private_attributes()
+    return entity
+
+
+def serialize_trusted(
+    cls: Type[pydantic.BaseModel], obj: Dict[str, Any], partial: bool = False
+) -> Dict[str, Any]:
+    ### Same output as construct_trusted(...).dict() without building models,
+    ### partial leaves out the missing fields as exclude_unset does
+    converters = _converters(cls, True)
+    result = dict()
+    for name, field in cls.__fields__.items():
+        if name in obj:
+            value, convert = obj[name], converters.get(name)
+            result[name] = convert(value) if convert and value is not None else value
+        elif not partial:
+            result[name] = _plain(field.get_default())
+    return result
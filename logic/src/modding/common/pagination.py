@@ -0,0 +1,74 @@
+import base64
+import binascii
+import decimal
+import json
+from typing import Any, Dict, Iterable, Optional
+from modding.common import exception
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+
+
+class InvalidPagination(exception.LoggingErrorException):
+    pass
+
+
+class InvalidCursor(InvalidPagination):
+    def __init__(self):
+        super().__init__("The provided pagination cursor is not valid")
+
+
+class InvalidLimit(InvalidPagination):
+    def __init__(self, limit: Any):
+        super().__init__("The provided pagination limit %s is not valid" % (limit))
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def encode_cursor(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    ### Cursors are opaque for clients, they carry the dynamodb last evaluated key
+    if not last_key:
+        return None
+    serializable = {key: _to_json_value(last_key[key]) for key in last_key}
+    encoded = json.dumps(serializable, sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(encoded).decode("utf-8")
+
+
+def decode_cursor(
+    cursor: Optional[str], key_names: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, Any]]:
+    ### With the key names of the table and index, a cursor holding anything
+    ### else is rejected before it reaches dynamodb as a start key
+    if not cursor:
+        return None
+    try:
+        decoded = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("utf-8")),
+            parse_float=decimal.Decimal,
+        )
+    except (binascii.Error, ValueError):
+        raise InvalidCursor()
+    if not isinstance(decoded, dict):
+        raise InvalidCursor()
+    if key_names is not None and set(decoded) != set(key_names):
+        raise InvalidCursor()
+    if not all(
+        isinstance(value, (str, int, decimal.Decimal)) and not isinstance(value, bool)
+        for value in decoded.values()
+    ):
+        raise InvalidCursor()
+    return decoded
+
+
+def clean_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidLimit(limit)
+    return min(max(limit, 1), MAX_LIMIT)
@@ -1,6 +1,7 @@
 import copy
-from typing import Any, Dict, List
-from modding.common import exception, aws_cli, model
+from boto3.dynamodb.conditions import Attr
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from modding.common import exception, aws_cli, cache, model, pagination
 from modding.utils import date
 
 
@@ -40,8 +41,26 @@ class Repository:
             super().__init__("Can not get content, %s" % (message))
 
     EQUAL_COMPARISON = "eq"
+    PROJECTION_KEY_FIELDS = ["id", "username", "data_state"]
+    IMMUTABLE_FIELDS = ["id", "username", "creation_date", "data_state"]
+    ACTIVE_PREFIX = "active_"
+    ### Attributes copied with the active prefix on active items only, they are
+    ### the partition keys of the sparse indexes of the table
+    ACTIVE_INDEX_KEYS: List[str] = []
+    ### Attributes built joining others, they let an index be queried with a
+    ### key condition on values that would otherwise need a filter
+    COMPOSITE_KEYS: Dict[str, List[str]] = {}
+    COMPOSITE_SEPARATOR = "#"
+    ITEM_CACHE_KIND = "item"
+    QUERY_CACHE_KIND = "query"
 
-    def __init__(self, name: str, table_name: str, bucket_name: str) -> None:
+    def __init__(
+        self,
+        name: str,
+        table_name: str,
+        bucket_name: str,
+        items_cache: cache.TTLCache = None,
+    ) -> None:
         self.NotFoundEntityException = lambda entity_id: self._NotFoundEntityException(
             id=entity_id, entity=name
         )
@@ -50,66 +69,308 @@ class Repository:
         self.s3 = aws_cli.AwsCustomClient.s3(bucket_name)
         self.__model: model.Model = model.Model
         self._username: str = None
+        self.items_cache = items_cache
 
     def set_model(self, _model: model.Model) -> None:
         self.__model = _model
 
     def set_username(self, username: str) -> None:
+        ### Set by the pre handler before the request runs, workers only read it
         self._username = username
 
-    def __get_item_by_id_no_exception(self, id: str) -> model.Model:
-        item = self.table.get_item(
-            {"id": id},
-            {"data_state": (self.EQUAL_COMPARISON, model.DataState.ACTIVE.value)},
+    def cache_stats(self) -> Dict[str, int]:
+        return self.items_cache.stats() if self.items_cache is not None else dict()
+
+    def __cached(self, key: Tuple[Any, ...], load: Callable[[], Any]) -> Any:
+        ### Only single items and bounded pages are cached, so queries and
+        ### scans stay lazy. Copies are returned so callers can not change the
+        ### cached models
+        if self.items_cache is None:
+            return load()
+        value = self.items_cache.get(key)
+        if value is None:
+            value = load()
+            if value is None:
+                return None
+            self.items_cache.put(key, value)
+        return copy.deepcopy(value)
+
+    @staticmethod
+    def __is_active(item: Optional[Dict[str, Any]]) -> bool:
+        return item is not None and (
+            item.get("data_state", model.DataState.ACTIVE.value)
+            == model.DataState.ACTIVE.value
         )
-        return self.__model.parse_obj(item) if item is not None else None
 
-    def get_item_by_id(self, id: str) -> model.Model:
-        item = self.__get_item_by_id_no_exception(id)
+    def __projection(self, fields: Optional[List[str]]) -> Optional[List[str]]:
+        ### Keys and state are always read, they are needed to check the items
+        if not fields:
+            return None
+        return list(dict.fromkeys([*self.PROJECTION_KEY_FIELDS, *fields]))
+
+    def __parse_item(self, item: Dict[str, Any]) -> model.Model:
+        ### Items on the table were validated before being written
+        return self.__model.parse_trusted(item)
+
+    def __get_item_by_id_no_exception(
+        self, id: str, username: str = None, fields: Optional[List[str]] = None
+    ) -> model.Model:
+        ### Tables are keyed by (id, username), a GetItem is only possible
+        ### when the owner is known, the state is checked here instead of
+        ### using a filter expression
+        projection = self.__projection(fields)
+        if username:
+            item = self.table.get_item_no_filters(
+                {"id": id, "username": username}, fields=projection
+            )
+        else:
+            item = self.table.get_item({"id": id}, fields=projection)
+        return self.__parse_item(item) if self.__is_active(item) else None
+
+    def get_item_by_id(
+        self, id: str, username: str = None, fields: Optional[List[str]] = None
+    ) -> model.Model:
+        item = self.__cached(
+            (self.ITEM_CACHE_KIND, id, username, tuple(fields or ())),
+            lambda: self.__get_item_by_id_no_exception(id, username, fields),
+        )
         if item is not None:
             return item
         else:
             raise self.NotFoundEntityException(id)
 
-    def query_items(
-        self, keys: Dict[str, Any], index_name: str = None
+    def get_items_by_ids(
+        self, ids: List[str], usernames: List[str] = None
     ) -> List[model.Model]:
+        ### Same order as ids, with the owners the full keys are read with
+        ### BatchGetItem, without them every id needs its own key only query
+        if usernames is not None:
+            keys = list(
+                {
+                    (id, username): {"id": id, "username": username}
+                    for id, username in zip(ids, usernames)
+                }.values()
+            )
+            items = self.table.batch_get_items(keys)
+        else:
+            items = self.table.get_items([{"id": id} for id in dict.fromkeys(ids)])
+
+        found = {item.get("id"): item for item in items if self.__is_active(item)}
         result = []
+        for id in ids:
+            if id not in found:
+                raise self.NotFoundEntityException(id)
+            result.append(self.__parse_item(found.get(id)))
+        return result
+
+    def __query_conditions(
+        self,
+        keys: Dict[str, Any],
+        index_name: Optional[str],
+        by_username: bool,
+        sort_key: Optional[Dict[str, Tuple[str, Any]]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, str]]]:
+        ### Sparse indexes only hold active items, the state filter is not needed
+        filters = dict()
+        if by_username:
+            composite = self.__composite_key(keys, index_name)
+            if composite:
+                keys, by_username = composite, False
+        if index_name and index_name.startswith(self.ACTIVE_PREFIX):
+            active_keys = set(self.ACTIVE_INDEX_KEYS)
+            keys = {
+                (f"{self.ACTIVE_PREFIX}{key}" if key in active_keys else key): value
+                for key, value in keys.items()
+            }
+        else:
+            filters["data_state"] = (
+                self.EQUAL_COMPARISON,
+                model.DataState.ACTIVE.value,
+            )
+        if by_username:
+            filters["username"] = (self.EQUAL_COMPARISON, self._username)
+        return {**keys, **(sort_key or {})}, filters
+
+    def __composite_key(
+        self, keys: Dict[str, Any], index_name: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        ### The owner is part of the key when the index is on a composite of
+        ### the given keys and the username
+        values = {**keys, "username": self._username}
+        for name, parts in self.COMPOSITE_KEYS.items():
+            on_index = index_name and (
+                index_name.startswith(name)
+                or index_name.startswith(f"{self.ACTIVE_PREFIX}{name}")
+            )
+            if on_index and set(parts) == set(values):
+                return self.__composite_attributes(values)
+        return None
+
+    def __composite_attributes(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            name: self.COMPOSITE_SEPARATOR.join(str(values[part]) for part in parts)
+            for name, parts in self.COMPOSITE_KEYS.items()
+            if all(values.get(part) is not None for part in parts)
+        }
+
+    def __derived_attributes(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        attributes = self.__composite_attributes(values)
+        attributes.update(self.__active_attributes({**values, **attributes}))
+        return attributes
+
+    def _to_item(self, entity: model.Model) -> Dict[str, Any]:
+        ### None fields are left out instead of stored as NULL, counters and
+        ### index keys can not be NULL
+        item = entity.dict(exclude_none=True)
+        item.update(self.__derived_attributes(item))
+        return item
+
+    def __active_attributes(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        if values.get("data_state") == model.DataState.INACTIVE.value:
+            return dict()
+        return {
+            f"{self.ACTIVE_PREFIX}{key}": values[key]
+            for key in self.ACTIVE_INDEX_KEYS
+            if values.get(key) is not None
+        }
+
+    def __parse_items(self, items: Iterator[Dict[str, Any]]) -> Iterator[model.Model]:
+        for item in items:
+            yield self.__parse_item(item)
+
+    def query_items(
+        self,
+        keys: Dict[str, Any],
+        index_name: str = None,
+        limit: int = None,
+        fields: Optional[List[str]] = None,
+        sort_key: Optional[Dict[str, Tuple[str, Any]]] = None,
+        ascending: bool = True,
+    ) -> Iterator[model.Model]:
+        query_keys, filters = self.__query_conditions(keys, index_name, False, sort_key)
         items = self.table.query_items(
-            keys,
-            {"data_state": (self.EQUAL_COMPARISON, model.DataState.ACTIVE.value)},
+            query_keys,
+            filters,
             index_name=index_name,
+            limit=limit,
+            fields=self.__projection(fields),
+            ascending=ascending,
         )
-        if items:
-            result = [self.__model.parse_obj(item) for item in items]
-        return result
+        return self.__parse_items(items)
 
     def query_items_by_username(
-        self, keys: Dict[str, Any], index_name: str = None
-    ) -> List[model.Model]:
-        result = []
+        self,
+        keys: Dict[str, Any],
+        index_name: str = None,
+        limit: int = None,
+        fields: Optional[List[str]] = None,
+        sort_key: Optional[Dict[str, Tuple[str, Any]]] = None,
+        ascending: bool = True,
+    ) -> Iterator[model.Model]:
+        ### Without an owner nothing is owned, the composite key can not be
+        ### built either
+        if self._username is None:
+            return iter([])
+        query_keys, filters = self.__query_conditions(keys, index_name, True, sort_key)
         items = self.table.query_items(
-            keys,
-            {
-                "data_state": (self.EQUAL_COMPARISON, model.DataState.ACTIVE.value),
-                "username": (self.EQUAL_COMPARISON, self._username),
-            },
+            query_keys,
+            filters,
             index_name=index_name,
+            limit=limit,
+            fields=self.__projection(fields),
+            ascending=ascending,
         )
-        if items:
-            result = [self.__model.parse_obj(item) for item in items]
-        return result
+        return self.__parse_items(items)
 
-    def scan_items(self, attr: Dict[str, Any]) -> List[model.Model]:
-        result = []
+    def query_page(
+        self,
+        keys: Dict[str, Any],
+        index_name: str = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        by_username: bool = False,
+        fields: Optional[List[str]] = None,
+        sort_key: Optional[Dict[str, Tuple[str, Any]]] = None,
+        ascending: bool = True,
+        serialized: bool = False,
+    ) -> Tuple[List[Union[model.Model, Dict[str, Any]]], Optional[str]]:
+        ### Serialized pages are json ready dicts, for endpoints that only
+        ### return the items and do not need the models
+        if by_username and self._username is None:
+            return [], None
+        query_keys, filters = self.__query_conditions(
+            keys, index_name, by_username, sort_key
+        )
+        page_limit = pagination.clean_limit(limit)
+        start_key = self.__start_key(cursor, index_name, query_keys)
+
+        def load() -> Tuple[List[Union[model.Model, Dict[str, Any]]], Optional[str]]:
+            ### Limit is applied by dynamodb before the filters, a page can come
+            ### with less items than asked and still have a cursor to the next one
+            items, last_key = self.table.query_page(
+                query_keys,
+                filters,
+                index_name=index_name,
+                limit=page_limit,
+                start_key=start_key,
+                fields=self.__projection(fields),
+                ascending=ascending,
+            )
+            if serialized:
+                models = [
+                    model.serialize_trusted(self.__model, item, partial=bool(fields))
+                    for item in items
+                ]
+            else:
+                models = list(self.__parse_items(items))
+            return models, pagination.encode_cursor(last_key)
+
+        return self.__cached(
+            (
+                self.QUERY_CACHE_KIND,
+                "query_page",
+                repr(query_keys),
+                repr(filters),
+                index_name,
+                page_limit,
+                cursor,
+                repr(fields),
+                ascending,
+                serialized,
+            ),
+            load,
+        )
+
+    def __start_key(
+        self, cursor: Optional[str], index_name: Optional[str], keys: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        ### A cursor only holds the keys of the table and index, on the queried
+        ### partition
+        if not cursor:
+            return None
+        start_key = pagination.decode_cursor(cursor, self.table.key_names(index_name))
+        for key, value in keys.items():
+            if not isinstance(value, tuple) and start_key.get(key) != value:
+                raise pagination.InvalidCursor()
+        return start_key
+
+    def scan_items(
+        self,
+        attr: Dict[str, Any],
+        limit: int = None,
+        fields: Optional[List[str]] = None,
+        segments: int = 1,
+    ) -> Iterator[model.Model]:
+        ### With more than one segment the table is scanned in parallel and
+        ### the items come in no particular order
         filters = copy.deepcopy(attr)
         filters.update(
             {"data_state": (self.EQUAL_COMPARISON, model.DataState.ACTIVE.value)}
         )
-        items = self.table.scan_items(filters)
-        if items:
-            result = [self.__model.parse_obj(item) for item in items]
-        return result
+        items = self.table.scan_items(
+            filters, limit=limit, fields=self.__projection(fields), segments=segments
+        )
+        return self.__parse_items(items)
 
     def put_presigned_url(self, path: str, id: str, expire_time: int) -> str:
         try:
@@ -139,26 +400,80 @@ class Repository:
             raise self.S3ContentError(e)
         return content
 
+    def get_content_stream(self, path: str, id: str) -> Any:
+        try:
+            object_with_path = f"{path}/{id}"
+            stream = self.s3.get_file_stream(object_name=object_with_path)
+        except Exception as e:
+            raise self.S3ContentError(e)
+        return stream
+
+    def put_content(self, path: str, id: str, content: str) -> None:
+        try:
+            object_with_path = f"{path}/{id}"
+            self.s3.put_file_content(object_name=object_with_path, content=content)
+        except Exception as e:
+            raise self.S3ContentError(e)
+
+    def _fill_creation_data(self, entity: model.Model, current_date: int) -> None:
+        entity.id = f"{entity.id}-{current_date}"
+        entity.creation_date = current_date
+        entity.username = self._username
+
+    def __active_condition(self) -> Any:
+        return Attr("data_state").eq(model.DataState.ACTIVE.value)
+
     def _create_data(self, entity: model.Model, current_date: int) -> None:
-        extra_creation_data = {
-            "id": f"{entity.id}-{current_date}",
-            "creation_date": current_date,
-            "username": self._username,
-        }
-        item = entity.dict()
-        item.update(extra_creation_data)
-        self.table.put_item(item)
-        entity.id = extra_creation_data.get("id")
-        entity.creation_date = extra_creation_data.get("creation_date")
-        entity.username = extra_creation_data.get("username")
+        self._fill_creation_data(entity, current_date)
+        try:
+            self.table.put_item(
+                self._to_item(entity), condition=Attr("id").not_exists()
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            raise self.NotSavingIdAlreadyExistsOnTableException(entity.id)
 
     def _update_data(self, entity: model.Model, current_date: int) -> None:
         extra_update_data = {"updated_date": current_date}
-        item = entity.dict()
+        item = self._to_item(entity)
         item.update(extra_update_data)
-        self.table.put_item(item)
+        try:
+            self.table.put_item(item, condition=self.__active_condition())
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            raise self.UpdatingNotExistentEntity(entity.id)
         entity.updated_date = extra_update_data.get("updated_date")
 
+    def _resolve_key(
+        self, id: str, username: Optional[str], not_found: Any
+    ) -> Dict[str, Any]:
+        ### Writes need the full key, without the owner it is read from the
+        ### partition with a key only query
+        if username is None:
+            item = self.table.get_item({"id": id}, fields=["id", "username"])
+            if item is None:
+                raise not_found(id)
+            username = item.get("username")
+        return {"id": id, "username": username}
+
+    def update_fields(
+        self, id: str, values: Dict[str, Any], username: str = None
+    ) -> model.Model:
+        ### Only the given fields are written, in one conditional UpdateItem
+        changes = {
+            field: values[field]
+            for field in values
+            if field not in self.IMMUTABLE_FIELDS
+        }
+        changes.update({"updated_date": date.get_unix_time_from_now()})
+        changes.update(self.__derived_attributes(changes))
+        key = self._resolve_key(id, username, self.UpdatingNotExistentEntity)
+        try:
+            item = self.table.update_item(
+                key, changes, condition=self.__active_condition()
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            raise self.UpdatingNotExistentEntity(id)
+        return self.__parse_item(item)
+
     def save_on_table(self, entity: model.Model, update: bool = False) -> None:
         current_date = date.get_unix_time_from_now()
         if update:
@@ -166,11 +481,173 @@ class Repository:
         else:
             self._create_data(entity, current_date)
 
-    def delete_data(self, id: str) -> None:
-        entity = self.__get_item_by_id_no_exception(id)
-        if entity:
-            item = entity.dict()
-            item.update({"data_state": model.DataState.INACTIVE.value})
-            self.table.put_item(item)
+    def __transact_create(self, entity: model.Model) -> Dict[str, Any]:
+        return {
+            "Item": self._to_item(entity),
+            "ConditionExpression": "attribute_not_exists(#id)",
+            "ExpressionAttributeNames": {"#id": "id"},
+        }
+
+    def increment_field(
+        self,
+        id: str,
+        field: str,
+        amount: int = 1,
+        start: Optional[int] = None,
+        username: str = None,
+    ) -> int:
+        ### Atomic counter, without start the field must already be a number
+        key = self._resolve_key(id, username, self.UpdatingNotExistentEntity)
+        condition = self.__active_condition()
+        if start is None:
+            condition &= Attr(field).attribute_type("N")
+        else:
+            self.__clear_null(key, field)
+        try:
+            item = self.table.update_item(
+                key,
+                dict(),
+                condition=condition,
+                increments={field: (start or 0, amount)},
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            raise self.UpdatingNotExistentEntity(id)
+        return int(item.get(field))
+
+    def __clear_null(self, key: Dict[str, Any], field: str) -> None:
+        ### Rows saved before None fields were left out can hold a NULL, which
+        ### if_not_exists keeps and can not be added to
+        try:
+            self.table.update_item(
+                key,
+                dict(),
+                condition=Attr(field).attribute_type("NULL"),
+                removes=[field],
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            pass
+
+    def append_to_field(
+        self, id: str, field: str, values: List[Any], username: str = None
+    ) -> model.Model:
+        key = self._resolve_key(id, username, self.UpdatingNotExistentEntity)
+        try:
+            item = self.table.update_item(
+                key,
+                {"updated_date": date.get_unix_time_from_now()},
+                condition=self.__active_condition(),
+                appends={field: values},
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            raise self.UpdatingNotExistentEntity(id)
+        return self.__parse_item(item)
+
+    def save_many(self, entities: List[model.Model], update: bool = False) -> None:
+        ### Same conditions as save_on_table. Creates are conditional puts in
+        ### transactions of the table size, an id already on the table stops
+        ### its transaction and the later ones. Updates only touch active items
+        current_date = date.get_unix_time_from_now()
+        if update:
+            self.__update_many(entities, current_date)
         else:
+            self.__create_many(entities, current_date)
+
+    def __create_many(self, entities: List[model.Model], current_date: int) -> None:
+        ids = set()
+        for entity in entities:
+            self._fill_creation_data(entity, current_date)
+            if entity.id in ids:
+                raise self.NotSavingIdAlreadyExistsOnTableException(entity.id)
+            ids.add(entity.id)
+        try:
+            self.table.transact_put_items(
+                [self.__transact_create(entity) for entity in entities]
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.TransactionCanceled as e:
+            raise self.NotSavingIdAlreadyExistsOnTableException(entities[e.index].id)
+
+    def __update_many(self, entities: List[model.Model], current_date: int) -> None:
+        updates = []
+        for entity in entities:
+            entity.updated_date = current_date
+            item = self._to_item(entity)
+            key = {"id": item.pop("id"), "username": item.pop("username", None)}
+            updates.append(
+                {"key": key, "values": item, "condition": self.__active_condition()}
+            )
+        applied = self.table.update_items(updates)
+        for entity, done in zip(entities, applied):
+            if not done:
+                raise self.UpdatingNotExistentEntity(entity.id)
+
+    def delete_many(self, ids: List[str], usernames: List[str] = None) -> None:
+        ### Deletes are soft, every entity gets the update of delete_data, all
+        ### of them at once. Without the owners the keys are read first
+        if usernames is None:
+            items = self.table.get_items([{"id": id} for id in ids])
+            for id, item in zip(ids, items):
+                if item is None:
+                    raise self.DeletingNotExistentEntity(id)
+            usernames = [item.get("username") for item in items]
+        keys = list(
+            {
+                (id, username): {"id": id, "username": username}
+                for id, username in zip(ids, usernames)
+            }.values()
+        )
+        applied = self.table.update_items([self.__deactivation(key) for key in keys])
+        for key, done in zip(keys, applied):
+            if not done:
+                raise self.DeletingNotExistentEntity(key["id"])
+
+    def backfill_active_indexes(self, segments: int = 4) -> int:
+        ### Sets the active and composite attributes missing on items written
+        ### before their indexes existed. Each item only gets the attributes it
+        ### lacks, conditioned on what was scanned, items written meanwhile win
+        active = {"data_state": (self.EQUAL_COMPARISON, model.DataState.ACTIVE.value)}
+        count = 0
+        for item in self.table.scan_items(active, segments=segments):
+            attributes = self.__derived_attributes(item)
+            changes = {
+                key: attributes[key]
+                for key in attributes
+                if item.get(key) != attributes[key]
+            }
+            if not changes:
+                continue
+            condition = self.__active_condition()
+            for key in changes:
+                condition &= (
+                    Attr(key).eq(item[key]) if key in item else Attr(key).not_exists()
+                )
+            try:
+                self.table.update_item(
+                    {"id": item["id"], "username": item.get("username")},
+                    changes,
+                    condition=condition,
+                )
+            except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+                continue
+            count += 1
+        return count
+
+    def __deactivation(self, key: Dict[str, Any]) -> Dict[str, Any]:
+        ### Update turning an active item inactive, out of the sparse indexes
+        return {
+            "key": key,
+            "values": {
+                "data_state": model.DataState.INACTIVE.value,
+                "updated_date": date.get_unix_time_from_now(),
+            },
+            "condition": self.__active_condition(),
+            "removes": [
+                f"{self.ACTIVE_PREFIX}{field}" for field in self.ACTIVE_INDEX_KEYS
+            ],
+        }
+
+    def delete_data(self, id: str, username: str = None) -> None:
+        key = self._resolve_key(id, username, self.DeletingNotExistentEntity)
+        try:
+            self.table.update_item(**self.__deactivation(key))
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
             raise self.DeletingNotExistentEntity(id)
@@ -0,0 +1,69 @@
+from typing import Any, Callable, Dict, List, Optional
+from boto3.dynamodb.types import TypeDeserializer
+
+
+_DESERIALIZER = TypeDeserializer()
+
+
+class StreamRecord:
+    INSERT = "INSERT"
+    MODIFY = "MODIFY"
+    REMOVE = "REMOVE"
+
+    def __init__(
+        self,
+        table_name: str,
+        event_name: str,
+        old: Optional[Dict[str, Any]],
+        new: Optional[Dict[str, Any]],
+        event_id: Optional[str] = None,
+    ):
+        self.table_name = table_name
+        self.event_name = event_name
+        self.old = old
+        self.new = new
+        self.event_id = event_id
+
+    @staticmethod
+    def __image(image: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not image:
+            return None
+        return {key: _DESERIALIZER.deserialize(image[key]) for key in image}
+
+    @classmethod
+    def parse(cls, record: Dict[str, Any]) -> "StreamRecord":
+        ### Source arns end with table/<table name>/stream/<label>
+        table_name = record.get("eventSourceARN", str()).split("/")[1]
+        images = record.get("dynamodb", dict())
+        return cls(
+            table_name=table_name,
+            event_name=record.get("eventName"),
+            old=cls.__image(images.get("OldImage")),
+            new=cls.__image(images.get("NewImage")),
+            event_id=record.get("eventID"),
+        )
+
+
+class StreamConsumer:
+    ### Tables streams are NEW_AND_OLD_IMAGES, handlers get every record of
+    ### their table in a batch at once, in stream order, so they can coalesce
+    ### their writes. Delivery is at least once, a failed batch is retried
+
+    def __init__(self):
+        self.__handlers: Dict[str, List[Callable[[List[StreamRecord]], None]]] = dict()
+
+    def register(
+        self, table_name: str, handler: Callable[[List[StreamRecord]], None]
+    ) -> None:
+        self.__handlers.setdefault(table_name, []).append(handler)
+
+    def consume(self, event: Dict[str, Any]) -> int:
+        records: Dict[str, List[StreamRecord]] = dict()
+        for raw_record in event.get("Records") or []:
+            record = StreamRecord.parse(raw_record)
+            records.setdefault(record.table_name, []).append(record)
+
+        for table_name in records:
+            for handler in self.__handlers.get(table_name, []):
+                handler(records[table_name])
+        return sum(len(table_records) for table_records in records.values())
@@ -17,7 +17,7 @@ CATEGORY_REPOSITORY = repository.CategoryRepository(_SETTINGS.category_table_nam
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        delete_category(**event.body)
+        delete_category(**{**event.body, "username": event.headers.get("username")})
 
         response = http.get_standard_success_response()
 
@@ -28,5 +28,5 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def delete_category(id: str, **kwargs) -> None:
-    CATEGORY_REPOSITORY.delete_data(id)
+def delete_category(id: str, username: str = None, **kwargs) -> None:
+    CATEGORY_REPOSITORY.delete_data(id, username=username)
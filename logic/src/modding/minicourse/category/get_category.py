@@ -1,11 +1,16 @@
 from typing import Any, Dict
-from modding.common import http, logging, settings
+from modding.aggregate import counters
+from modding.common import cache, http, logging, settings
 from modding.minicourse.category import repository
 from modding.common.aws_cli import AwsCustomClient as aws_client
 
 
 class _Settings(settings.Settings):
     category_table_name: str
+    aggregate_table_name: str
+    cache_max_entries: str = str(cache.DEFAULT_MAX_ENTRIES)
+    cache_ttl_seconds: str = str(cache.DEFAULT_TTL_SECONDS)
+    categories_scan_segments: str = "1"
 
 
 _SETTINGS = _Settings()
@@ -14,7 +19,12 @@ _LOGGER = logging.Logger()
 
 CATEGORY_REPOSITORY = repository.CategoryRepository(
     table_name=_SETTINGS.category_table_name,
+    items_cache=cache.TTLCache(
+        max_entries=int(_SETTINGS.cache_max_entries),
+        ttl_seconds=float(_SETTINGS.cache_ttl_seconds),
+    ),
 )
+AGGREGATE_COUNTERS = counters.AggregateCounters(_SETTINGS.aggregate_table_name)
 
 
 @aws_client.ApiGateway.pre_handler
@@ -26,16 +36,26 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]):
     except Exception as e:
         _LOGGER.error(e)
         response = http.get_standard_error_response()
+    _LOGGER.info("Category cache stats %s" % (CATEGORY_REPOSITORY.cache_stats()))
     return response
 
 
 def get_all_categories(**kwargs) -> Dict[str, Any]:
-    categories = CATEGORY_REPOSITORY.scan_items({})
+    categories = CATEGORY_REPOSITORY.scan_items(
+        {}, segments=int(_SETTINGS.categories_scan_segments)
+    )
     return {"categories": [category.dict() for category in categories]}
 
 
+def get_category_counters(id: str, **kwargs) -> Dict[str, Any]:
+    return AGGREGATE_COUNTERS.get(counters.CATEGORY_KIND, id)
+
+
 def actions(action: str, params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-    mapped_actions = {"get_all_categories": get_all_categories}
+    mapped_actions = {
+        "get_all_categories": get_all_categories,
+        "get_category_counters": get_category_counters,
+    }
 
     def empty(**kwargs):
         _LOGGER.error("No registered action given")
@@ -1,9 +1,14 @@
-from modding.common import repo
+from modding.common import cache, repo
 from modding.minicourse import models
 
 
 class CategoryRepository(repo.Repository):
-    def __init__(self, table_name: str = str()):
-        super().__init__(name="Category", table_name=table_name, bucket_name="")
+    def __init__(self, table_name: str = str(), items_cache: cache.TTLCache = None):
+        super().__init__(
+            name="Category",
+            table_name=table_name,
+            bucket_name="",
+            items_cache=items_cache,
+        )
 
         self.set_model(models.Category)
@@ -27,7 +27,9 @@ class CategoryNotBuilt(exception.LoggingErrorException):
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        updated_category = update_category(**event.body)
+        updated_category = update_category(
+            **{**event.body, "username": event.headers.get("username")}
+        )
 
         response = http.get_response(
             http.HttpCodes.SUCCESS,
@@ -41,20 +43,16 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def build_updated_category(category_id: str, **kwargs) -> models.Category:
+def build_category_changes(category_id: str, **kwargs) -> Dict[str, Any]:
+    ### Only the sent fields are validated and written
     try:
-        category: models.Category = CATEGORY_REPOSITORY.get_item_by_id(category_id)
-        category_data = category.dict()
-        category_data.update(**kwargs)
-        category_data.update({"id": category_id})
-        result = models.Category(**category_data)
+        changes = models.Category.parse_partial({**kwargs, "id": category_id})
     except Exception as e:
         raise CategoryNotBuilt(category_id, e)
 
-    return result
+    return changes.dict(include=changes.__fields_set__)
 
 
-def update_category(id: str, **kwargs) -> models.Category:
-    category = build_updated_category(id, **kwargs)
-    CATEGORY_REPOSITORY.save_on_table(category, update=True)
-    return category
+def update_category(id: str, username: str = None, **kwargs) -> models.Category:
+    changes = build_category_changes(id, **kwargs)
+    return CATEGORY_REPOSITORY.update_fields(id, changes, username=username)
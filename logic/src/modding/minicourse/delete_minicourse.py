@@ -17,7 +17,7 @@ MINICOURSE_REPOSITORY = repository.MinicourseRepository(_SETTINGS.minicourse_tab
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        delete_minicourse(**event.body)
+        delete_minicourse(**{**event.body, "username": event.headers.get("username")})
 
         response = http.get_standard_success_response()
 
@@ -28,5 +28,5 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def delete_minicourse(id: str, **kwargs) -> None:
-    MINICOURSE_REPOSITORY.delete_data(id)
+def delete_minicourse(id: str, username: str = None, **kwargs) -> None:
+    MINICOURSE_REPOSITORY.delete_data(id, username=username)
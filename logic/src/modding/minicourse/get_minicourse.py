@@ -1,6 +1,10 @@
+import asyncio
 from typing import Any, Dict, List
-from modding.common import http, logging, settings, exception
+from modding.aggregate import counters, details
+from modding.common import async_repo, cache, http, logging, settings, exception
+from modding.common import pagination
 from modding.minicourse import repository, models
+from modding.video import repository as video_repository
 from modding.utils import files, function
 from modding.common.aws_cli import AwsCustomClient as aws_client
 
@@ -13,6 +17,12 @@ class _Settings(settings.Settings):
     multiple_minicourse_retrival_limit: str
     minicourse_username_index_name: str
     minicourse_category_index_name: str
+    minicourse_detail_table_name: str
+    aggregate_table_name: str
+    video_bucket_name: str
+    video_download_expire_time: str
+    cache_max_entries: str = str(cache.DEFAULT_MAX_ENTRIES)
+    cache_ttl_seconds: str = str(cache.DEFAULT_TTL_SECONDS)
 
 
 _SETTINGS = _Settings()
@@ -22,7 +32,17 @@ _LOGGER = logging.Logger()
 MINICOURSE_REPOSITORY = repository.MinicourseRepository(
     table_name=_SETTINGS.minicourse_table_name,
     bucket_name=_SETTINGS.minicourse_bucket_name,
+    items_cache=cache.TTLCache(
+        max_entries=int(_SETTINGS.cache_max_entries),
+        ttl_seconds=float(_SETTINGS.cache_ttl_seconds),
+    ),
 )
+ASYNC_MINICOURSE_REPOSITORY = async_repo.AsyncRepository(MINICOURSE_REPOSITORY)
+VIDEO_REPOSITORY = video_repository.VideoRepository(
+    bucket_name=_SETTINGS.video_bucket_name
+)
+COURSE_DETAILS = details.CourseDetails(_SETTINGS.minicourse_detail_table_name)
+AGGREGATE_COUNTERS = counters.AggregateCounters(_SETTINGS.aggregate_table_name)
 
 
 class TooManyMinicoursesRetrival(exception.LoggingErrorException):
@@ -30,24 +50,33 @@ class TooManyMinicoursesRetrival(exception.LoggingErrorException):
         super().__init__("Too many minicourses to retrieve at once")
 
 
+class MinicourseDetailNotFound(exception.LoggingErrorException):
+    def __init__(self, id: str):
+        super().__init__("Detail of minicourse %s not found" % (id))
+
+
 @function.decorator_builder(
     aws_client.ApiGateway.include_repos_action, MINICOURSE_REPOSITORY
 )
 @aws_client.ApiGateway.pre_handler
-def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]):
+async def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]):
     try:
-        result = actions(**event.body)
+        result = await actions(**event.body)
 
         response = http.get_response(http.HttpCodes.SUCCESS, body=result)
+    except pagination.InvalidPagination as e:
+        response = http.get_bad_request_response(str(e))
     except Exception as e:
         _LOGGER.error(e)
         response = http.get_standard_error_response()
+    _LOGGER.info("Minicourse cache stats %s" % (MINICOURSE_REPOSITORY.cache_stats()))
     return response
 
 
-def get_minicourse(id: str, get_thumb: bool = False, **kwargs) -> Dict[str, Any]:
-    minicourse: models.Minicourse = MINICOURSE_REPOSITORY.get_item_by_id(id)
-    object_name = f"{id}.{files.clean_extension(minicourse.ext)}"
+def _build_minicourse_result(
+    minicourse: models.Minicourse, get_thumb: bool
+) -> Dict[str, Any]:
+    object_name = f"{minicourse.id}.{files.clean_extension(minicourse.ext)}"
     if get_thumb:
         thumb_download_url = MINICOURSE_REPOSITORY.thumb_get_presigned_url(
             object_name, int(_SETTINGS.thumb_download_expire_time)
@@ -62,13 +91,21 @@ def get_minicourse(id: str, get_thumb: bool = False, **kwargs) -> Dict[str, Any]
     return result
 
 
+def get_minicourse(id: str, get_thumb: bool = False, **kwargs) -> Dict[str, Any]:
+    minicourse: models.Minicourse = MINICOURSE_REPOSITORY.get_item_by_id(id)
+    return _build_minicourse_result(minicourse, get_thumb)
+
+
 def get_multiple_minicourses(
-    ids: List[str], get_thumb: bool = False, **kwargs
+    ids: List[str], get_thumb: bool = False, usernames: List[str] = None, **kwargs
 ) -> Dict[str, Any]:
+    ### Owners usernames, in the same order as ids, allow a single batch read
     if len(ids) <= int(_SETTINGS.multiple_minicourse_retrival_limit):
-        result = []
-        for id in ids:
-            result.append(get_minicourse(id, get_thumb))
+        minicourses = MINICOURSE_REPOSITORY.get_items_by_ids(ids, usernames)
+        result = [
+            _build_minicourse_result(minicourse, get_thumb)
+            for minicourse in minicourses
+        ]
         return {"minicourses": result}
     else:
         raise TooManyMinicoursesRetrival()
@@ -90,35 +127,110 @@ def get_minicourses_by_username(**kwargs) -> Dict[str, Any]:
     return {"minicourses": [minicourse.dict() for minicourse in minicourses]}
 
 
-def get_minicourses_by_category(category_id: str, **kwargs) -> Dict[str, Any]:
-    ### TODO(Santiago): Add randomness and pagination
+def _category_query(
+    category_id: str, limit: int = None, cursor: str = None
+) -> Dict[str, Any]:
+    return {
+        "keys": {"category_id": category_id},
+        "index_name": _SETTINGS.minicourse_category_index_name,
+        "limit": limit,
+        "cursor": cursor,
+        "serialized": True,
+    }
+
+
+def _build_category_page(
+    minicourses: List[Dict[str, Any]], next_cursor: str
+) -> Dict[str, Any]:
     result = []
-    minicourses = MINICOURSE_REPOSITORY.query_items(
-        {"category_id": category_id},
-        index_name=_SETTINGS.minicourse_category_index_name,
-    )
     for minicourse in minicourses:
-        object_name = f"{minicourse.id}.{files.clean_extension(minicourse.ext)}"
+        object_name = f"{minicourse['id']}.{files.clean_extension(minicourse['ext'])}"
         thumb_download_url = MINICOURSE_REPOSITORY.thumb_get_presigned_url(
             object_name, int(_SETTINGS.thumb_download_expire_time)
         )
-        result.append({
-            **minicourse.dict(), 
-            "thumb_download_url": thumb_download_url
-        })
-    return {"minicourses": result}
+        result.append({**minicourse, "thumb_download_url": thumb_download_url})
+    return {"minicourses": result, "cursor": next_cursor}
+
+
+def get_minicourses_by_category(
+    category_id: str, limit: int = None, cursor: str = None, **kwargs
+) -> Dict[str, Any]:
+    ### TODO(Santiago): Add randomness
+    minicourses, next_cursor = MINICOURSE_REPOSITORY.query_page(
+        **_category_query(category_id, limit, cursor)
+    )
+    return _build_category_page(minicourses, next_cursor)
+
+
+async def get_minicourses_by_categories(
+    category_ids: List[str], limit: int = None, **kwargs
+) -> Dict[str, Any]:
+    ### First page of every category, the queries are awaited together
+    if len(category_ids) > int(_SETTINGS.multiple_minicourse_retrival_limit):
+        raise TooManyMinicoursesRetrival()
+    pages = await asyncio.gather(
+        *[
+            ASYNC_MINICOURSE_REPOSITORY.query_page(
+                **_category_query(category_id, limit)
+            )
+            for category_id in category_ids
+        ]
+    )
+    return {
+        "categories": {
+            category_id: _build_category_page(*page)
+            for category_id, page in zip(category_ids, pages)
+        }
+    }
+
+
+def get_minicourse_detail(id: str, **kwargs) -> Dict[str, Any]:
+    ### Materialized from the table streams, it can lag the last writes by a
+    ### few seconds. Urls are signed locally, the page costs a single query
+    detail = COURSE_DETAILS.get(id)
+    if not detail:
+        raise MinicourseDetailNotFound(id)
+
+    minicourse = detail["minicourse"]
+    thumb_name = f"{minicourse['id']}.{files.clean_extension(minicourse['ext'])}"
+    videos = []
+    for video in detail["videos"]:
+        video_name = f"{video['id']}.{files.clean_extension(video['ext'])}"
+        videos.append(
+            {
+                **video,
+                "video_download_url": VIDEO_REPOSITORY.video_download_presigned_url(
+                    video_name, int(_SETTINGS.video_download_expire_time)
+                ),
+            }
+        )
+    return {
+        "minicourse": minicourse,
+        "thumb_download_url": MINICOURSE_REPOSITORY.thumb_get_presigned_url(
+            thumb_name, int(_SETTINGS.thumb_download_expire_time)
+        ),
+        "videos": videos,
+        "problems": detail["problems"],
+    }
+
+
+def get_minicourse_counters(id: str, **kwargs) -> Dict[str, Any]:
+    return AGGREGATE_COUNTERS.get(counters.MINICOURSE_KIND, id)
 
 
-def actions(action: str, params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+async def actions(action: str, params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     mapped_actions = {
         "get_minicourse": get_minicourse,
         "get_multiple_minicourses": get_multiple_minicourses,
         "get_minicourse_thumb_upload_url": get_minicourse_thumb_upload_url,
         "get_minicourses_by_username": get_minicourses_by_username,
         "get_randomized_minicourses": get_minicourses_by_category,
+        "get_minicourses_by_categories": get_minicourses_by_categories,
+        "get_minicourse_detail": get_minicourse_detail,
+        "get_minicourse_counters": get_minicourse_counters,
     }
 
     def empty(**kwargs):
         _LOGGER.error("No registered action given")
 
-    return (mapped_actions.get(action) or empty)(**params)
+    return await function.resolve((mapped_actions.get(action) or empty)(**params))
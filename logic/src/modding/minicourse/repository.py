@@ -1,15 +1,24 @@
-from typing import List
-from modding.common import repo
+from typing import Iterator
+from modding.common import cache, repo
 from modding.minicourse import models
 
 
 class MinicourseRepository(repo.Repository):
 
     THUMBNAILS_PATH = "thumbs"
-
-    def __init__(self, table_name: str = str(), bucket_name: str = str()):
+    ACTIVE_INDEX_KEYS = ["category_id"]
+
+    def __init__(
+        self,
+        table_name: str = str(),
+        bucket_name: str = str(),
+        items_cache: cache.TTLCache = None,
+    ):
         super().__init__(
-            name="Minicourse", table_name=table_name, bucket_name=bucket_name
+            name="Minicourse",
+            table_name=table_name,
+            bucket_name=bucket_name,
+            items_cache=items_cache,
         )
 
         self.set_model(models.Minicourse)
@@ -20,6 +29,8 @@ class MinicourseRepository(repo.Repository):
     def thumb_get_presigned_url(self, thumb_id: str, expire_time: int) -> str:
         return self.get_presigned_url(self.THUMBNAILS_PATH, thumb_id, expire_time)
 
-    def query_by_username(self, username_index_name: str) -> List[models.Minicourse]:
+    def query_by_username(
+        self, username_index_name: str
+    ) -> Iterator[models.Minicourse]:
         keys = {"username": self._username}
         return self.query_items(keys, index_name=username_index_name)
@@ -26,7 +26,9 @@ class MinicourseNotBuilt(exception.LoggingErrorException):
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        updated_minicourse = update_minicourse(**event.body)
+        updated_minicourse = update_minicourse(
+            **{**event.body, "username": event.headers.get("username")}
+        )
 
         response = http.get_response(
             http.HttpCodes.SUCCESS,
@@ -40,22 +42,16 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def build_updated_minicourse(minicourse_id: str, **kwargs) -> models.Minicourse:
+def build_minicourse_changes(minicourse_id: str, **kwargs) -> Dict[str, Any]:
+    ### Only the sent fields are validated and written
     try:
-        minicourse: models.Minicourse = MINICOURSE_REPOSITORY.get_item_by_id(
-            minicourse_id
-        )
-        minicourse_data = minicourse.dict()
-        minicourse_data.update(**kwargs)
-        minicourse_data.update({"id": minicourse_id})
-        result = models.Minicourse(**minicourse_data)
+        changes = models.Minicourse.parse_partial({**kwargs, "id": minicourse_id})
     except Exception as e:
         raise MinicourseNotBuilt(minicourse_id, e)
 
-    return result
+    return changes.dict(include=changes.__fields_set__)
 
 
-def update_minicourse(id: str, **kwargs) -> models.Minicourse:
-    minicourse = build_updated_minicourse(id, **kwargs)
-    MINICOURSE_REPOSITORY.save_on_table(minicourse, update=True)
-    return minicourse
+def update_minicourse(id: str, username: str = None, **kwargs) -> models.Minicourse:
+    changes = build_minicourse_changes(id, **kwargs)
+    return MINICOURSE_REPOSITORY.update_fields(id, changes, username=username)
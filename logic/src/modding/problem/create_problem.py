@@ -62,6 +62,7 @@ def build_problem(minicourse_id: str, name: str, difficulty: int) -> models.Prob
         "minicourse_id": minicourse.id,
         "name": name,
         "difficulty": difficulty,
+        "test_case_count": 0,
     }
     result = id_generator.retrier_with_generator(
         minicourse.id,
@@ -17,7 +17,7 @@ PROBLEM_REPOSITORY = repository.ProblemRepository(_SETTINGS.problem_table_name)
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        delete_problem(**event.body)
+        delete_problem(**{**event.body, "username": event.headers.get("username")})
 
         response = http.get_standard_success_response()
 
@@ -28,5 +28,5 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def delete_problem(id: str, **kwargs) -> None:
-    PROBLEM_REPOSITORY.delete_data(id)
+def delete_problem(id: str, username: str = None, **kwargs) -> None:
+    PROBLEM_REPOSITORY.delete_data(id, username=username)
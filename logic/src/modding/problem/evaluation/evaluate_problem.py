@@ -1,9 +1,10 @@
-from typing import Any, Dict
+import itertools
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from modding.problem.evaluation import repository
+from modding.problem.evaluation import repository, scheduler, submission
 from modding.problem import models, repository as problem_repository
-from modding.utils import id_generator, function
-from modding.common import settings, logging, http, exception
+from modding.utils import id_generator, function, disk_cache
+from modding.common import settings, logging, http, exception, admission
 from modding.common.aws_cli import AwsCustomClient as aws_client
 from modding.utils import analizer
 
@@ -11,7 +12,21 @@ from modding.utils import analizer
 class _Settings(settings.Settings):
     problem_table_name: str
     problem_bucket_name: str
+    problem_test_case_table_name: str
     problem_evaluation_table_name: str
+    cases_cache_directory: str = disk_cache.DEFAULT_DIRECTORY
+    cases_cache_max_bytes: str = str(disk_cache.DEFAULT_MAX_BYTES)
+    admission_table_name: str
+    evaluation_user_burst: str = "5"
+    evaluation_user_per_minute: str = "6"
+    evaluation_global_burst: str = "40"
+    evaluation_global_per_minute: str = "120"
+    evaluation_queue_table_name: str
+    evaluation_queue_state_index_name: str
+    sandbox_slots: str = "4"
+    evaluation_aging_seconds: str = "20"
+    evaluation_max_wait_seconds: str = "30"
+    evaluation_stale_seconds: str = "90"
 
 
 _SETTINGS = _Settings()
@@ -20,20 +35,49 @@ _LOGGER = logging.Logger()
 BUILD_EVALUATION_MAX_TRIES = 1
 
 
+CASES_CACHE = disk_cache.DiskCache(
+    directory=_SETTINGS.cases_cache_directory,
+    max_bytes=int(_SETTINGS.cases_cache_max_bytes),
+)
+
 PROBLEM_REPOSITORY = problem_repository.ProblemRepository(
-    table_name=_SETTINGS.problem_table_name, bucket_name=_SETTINGS.problem_bucket_name
+    table_name=_SETTINGS.problem_table_name,
+    bucket_name=_SETTINGS.problem_bucket_name,
+    files_cache=CASES_CACHE,
+)
+
+TEST_CASE_REPOSITORY = problem_repository.ProblemTestCaseRepository(
+    table_name=_SETTINGS.problem_test_case_table_name
 )
 
 PROBLEM_EVALUATION_REPOSITORY = repository.ProblemEvaluationRepository(
     table_name=_SETTINGS.problem_evaluation_table_name
 )
 
+ADMISSION_CONTROLLER = admission.AdmissionController(
+    table_name=_SETTINGS.admission_table_name,
+    user_bucket=admission.TokenBucket(
+        capacity=int(_SETTINGS.evaluation_user_burst),
+        refill_per_second=int(_SETTINGS.evaluation_user_per_minute) / 60,
+    ),
+    global_bucket=admission.TokenBucket(
+        capacity=int(_SETTINGS.evaluation_global_burst),
+        refill_per_second=int(_SETTINGS.evaluation_global_per_minute) / 60,
+    ),
+)
 
-EVALUATION_ID_LENGTH = 10
+EVALUATION_SCHEDULER = scheduler.EvaluationScheduler(
+    table_name=_SETTINGS.evaluation_queue_table_name,
+    state_index_name=_SETTINGS.evaluation_queue_state_index_name,
+    slots=int(_SETTINGS.sandbox_slots),
+    aging_seconds=float(_SETTINGS.evaluation_aging_seconds),
+    max_wait_seconds=float(_SETTINGS.evaluation_max_wait_seconds),
+    stale_seconds=float(_SETTINGS.evaluation_stale_seconds),
+)
 
 
-CACHED_INPUTS = {}
-CACHED_OUTPUTS = {}
+EVALUATION_ID_LENGTH = 10
+VEREDICT_FIELDS = {"veredict", "veredict_reason", "inputs_veredict"}
 
 
 class EvaluationFailedError(exception.LoggingException):
@@ -47,12 +91,20 @@ class EvaluationFailedError(exception.LoggingException):
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
+        ADMISSION_CONTROLLER.admit(event.headers.get("username"))
+
         evaluated = evaluate_problem(**event.body)
 
         response = http.get_response(
             http.HttpCodes.SUCCESS, body=evaluated.dict(exclude_none=True)
         )
 
+    except (admission.RateLimited, scheduler.SchedulingTimeout) as e:
+        response = http.get_retry_after_response(e.retry_after)
+
+    except (submission.SubmissionError, admission.MissingUsername) as e:
+        response = http.get_bad_request_response(str(e))
+
     except Exception as e:
         _LOGGER.error(e)
         response = http.get_standard_error_response()
@@ -60,41 +112,54 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def _get_problem_test_case_upload_urls(problem: models.Problem) -> Dict[str, Any]:
-    for i in range(len(problem.test_case)):
-        file = problem.test_case[i]
+def _stream_test_cases(problem: models.Problem) -> Iterator[models.ProblemInputFile]:
+    ### Cases embedded on older problems go first, then the ones on their table.
+    ### Their contents are opened by the analizer as it stages each case
+    return itertools.chain(
+        problem.test_case or [], TEST_CASE_REPOSITORY.stream_test_cases(problem.id)
+    )
 
-        input_content = (
-            CACHED_INPUTS.get(file.input_id)
-            if file.input_id in CACHED_INPUTS
-            else PROBLEM_REPOSITORY.get_file_content(file.input_id)
-        )
-        output_content = (
-            CACHED_OUTPUTS.get(file.output_id)
-            if file.output_id in CACHED_OUTPUTS
-            else PROBLEM_REPOSITORY.get_file_content(file.output_id)
-        )
-        CACHED_INPUTS[file.input_id] = input_content
-        CACHED_OUTPUTS[file.output_id] = output_content
 
-        problem.test_case[i].input_data = input_content
-        problem.test_case[i].output_data = output_content
+def build_submission(
+    file_type: str,
+    file_input: Optional[str] = None,
+    files: Optional[List[Dict[str, str]]] = None,
+    archive: Optional[str] = None,
+    entry_point: Optional[str] = None,
+    previous_evaluation_id: Optional[str] = None,
+) -> Tuple[bytes, str, Dict[str, str]]:
+    default_name = "code.%s" % (analizer.Language.get_by_type(file_type).ext)
+    submission_files = submission.build_files(
+        default_name, file_input=file_input, files=files, archive=archive
+    )
+    previous_manifest = (
+        PROBLEM_EVALUATION_REPOSITORY.get_own_files_manifest(previous_evaluation_id)
+        if previous_evaluation_id
+        else dict()
+    )
+    contents, manifest = submission.resolve_contents(
+        submission_files, previous_manifest, PROBLEM_REPOSITORY
+    )
+    checked_entry_point = submission.check_entry_point(
+        entry_point or default_name, contents
+    )
+    return submission.pack_archive(contents), checked_entry_point, manifest
 
 
 def send_input_to_analyze(
-    file_input: str,
+    archive: bytes,
     file_type: str,
     evaluation: models.ProblemEvaluation,
     problem: models.Problem,
 ) -> models.ProblemEvaluation:
 
-    _get_problem_test_case_upload_urls(problem)
-
     analizer.Analizer().analyze(
         evaluation=evaluation,
-        file_input=file_input,
+        archive=archive,
+        entry_point=evaluation.entry_point,
         file_type=file_type,
-        files=problem.test_case,
+        files=_stream_test_cases(problem),
+        open_content=PROBLEM_REPOSITORY.open_file_content,
     )
     return evaluation
 
@@ -102,45 +167,65 @@ def send_input_to_analyze(
 def evaluate(
     evaluation_data: Dict[str, Any],
     id: str,
-    file_input: str,
+    archive: bytes,
     file_type: str,
     problem: models.Problem,
 ) -> models.ProblemEvaluation:
     evaluation_data.update({"id": id, "veredict": models.ProblemVeredict.SENT})
     evaluation = models.ProblemEvaluation.parse_obj(evaluation_data)
+    ### Stored before the analysis so it is seen while running and kept when
+    ### the lambda times out, a taken id is raised here and retried
     PROBLEM_EVALUATION_REPOSITORY.save_on_table(evaluation)
     try:
-        return send_input_to_analyze(file_input, file_type, evaluation, problem)
+        return send_input_to_analyze(archive, file_type, evaluation, problem)
     except Exception as e:
         raise EvaluationFailedError(e)
 
 
 def build_evaluation(
-    problem_id: str, file_input: str, file_type: str
+    problem_id: str, file_type: str, **kwargs: Any
 ) -> models.ProblemEvaluation:
-    problem = PROBLEM_REPOSITORY.get_item_by_id(problem_id)
-    evaluation_data = {"problem_id": problem.id}
-    result = id_generator.retrier_with_generator(
-        problem.id,
-        EVALUATION_ID_LENGTH,
-        func=evaluate,
-        params=(
-            [],
-            {
-                "evaluation_data": evaluation_data,
-                "file_input": file_input,
-                "file_type": file_type,
-                "problem": problem,
-            },
-        ),
-        tries=BUILD_EVALUATION_MAX_TRIES,
-        logging_method=_LOGGER.warning,
-        failed_message="Could not evaluate problem",
+    problem = PROBLEM_REPOSITORY.get_item_by_id(
+        problem_id, fields=["priority", "test_case"]
     )
+    archive, entry_point, manifest = build_submission(file_type, **kwargs)
+    job_id = id_generator.generate_id(problem.id, EVALUATION_ID_LENGTH)
+    queue_wait = EVALUATION_SCHEDULER.acquire(job_id, problem.priority)
+    evaluation_data = {
+        "problem_id": problem.id,
+        "entry_point": entry_point,
+        "files_manifest": manifest,
+        "priority": problem.priority,
+        "queue_wait_ms": int(queue_wait * 1000),
+    }
+    try:
+        result = id_generator.retrier_with_generator(
+            problem.id,
+            EVALUATION_ID_LENGTH,
+            func=evaluate,
+            params=(
+                [],
+                {
+                    "evaluation_data": evaluation_data,
+                    "archive": archive,
+                    "file_type": file_type,
+                    "problem": problem,
+                },
+            ),
+            tries=BUILD_EVALUATION_MAX_TRIES,
+            logging_method=_LOGGER.warning,
+            failed_message="Could not evaluate problem",
+        )
+    finally:
+        EVALUATION_SCHEDULER.release(job_id)
     return result
 
 
 def evaluate_problem(**kwargs: Any) -> models.ProblemEvaluation:
+    ### Only the results of the analysis are written over the sent evaluation
     evaluation = build_evaluation(**kwargs)
-    PROBLEM_EVALUATION_REPOSITORY.save_on_table(evaluation)
-    return evaluation
+    return PROBLEM_EVALUATION_REPOSITORY.update_fields(
+        evaluation.id,
+        evaluation.dict(include=VEREDICT_FIELDS, exclude_none=True),
+        username=evaluation.username,
+    )
@@ -1,5 +1,5 @@
 from typing import Any, Dict, List
-from modding.common import http, logging, settings
+from modding.common import exception, http, logging, pagination, settings
 from modding.problem.evaluation import repository
 from modding.utils import function
 from modding.common.aws_cli import AwsCustomClient as aws_client
@@ -7,18 +7,25 @@ from modding.common.aws_cli import AwsCustomClient as aws_client
 
 class _Settings(settings.Settings):
     problem_evaluation_table_name: str
-    evaluation_problem_index_name: str
+    evaluation_problem_username_index_name: str
 
 
 _SETTINGS = _Settings()
 _LOGGER = logging.Logger()
 
+LATEST_EVALUATIONS_LIMIT = 10
+
 
 PROBLEM_EVALUATION_REPOSITORY = repository.ProblemEvaluationRepository(
     table_name=_SETTINGS.problem_evaluation_table_name
 )
 
 
+class InvalidSince(exception.LoggingErrorException):
+    def __init__(self, since: Any):
+        super().__init__("The provided since %s is not a unix time" % (since))
+
+
 @function.decorator_builder(
     aws_client.ApiGateway.include_repos_action, PROBLEM_EVALUATION_REPOSITORY
 )
@@ -28,21 +35,53 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]):
         result = actions(**event.body)
 
         response = http.get_response(http.HttpCodes.SUCCESS, body=result)
+    except (pagination.InvalidPagination, InvalidSince) as e:
+        response = http.get_bad_request_response(str(e))
     except Exception as e:
         _LOGGER.error(e)
         response = http.get_standard_error_response()
     return response
 
 
-def get_evaluations_by_username(problem_id: str, **kwargs) -> Dict[str, Any]:
+def get_evaluations_by_username(
+    problem_id: str, limit: int = None, cursor: str = None, **kwargs
+) -> Dict[str, Any]:
+    evaluations, next_cursor = PROBLEM_EVALUATION_REPOSITORY.query_page(
+        {"problem_id": problem_id},
+        index_name=_SETTINGS.evaluation_problem_username_index_name,
+        limit=limit,
+        cursor=cursor,
+        by_username=True,
+        serialized=True,
+    )
+    return {"evaluations": evaluations, "cursor": next_cursor}
+
+
+def get_latest_evaluations(
+    problem_id: str, limit: int = LATEST_EVALUATIONS_LIMIT, since: int = None, **kwargs
+) -> Dict[str, Any]:
+    ### Newest first on the creation_date sort key, only limit items are read
+    sort_key = None
+    if since is not None:
+        try:
+            sort_key = {"creation_date": ("gt", int(since))}
+        except (TypeError, ValueError):
+            raise InvalidSince(since)
     evaluations = PROBLEM_EVALUATION_REPOSITORY.query_items_by_username(
-        {"problem_id": problem_id}, index_name=_SETTINGS.evaluation_problem_index_name
+        {"problem_id": problem_id},
+        index_name=_SETTINGS.evaluation_problem_username_index_name,
+        limit=pagination.clean_limit(limit),
+        sort_key=sort_key,
+        ascending=False,
     )
     return {"evaluations": [evaluation.dict() for evaluation in evaluations]}
 
 
 def actions(action: str, params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-    mapped_actions = {"get_evaluations_by_username": get_evaluations_by_username}
+    mapped_actions = {
+        "get_evaluations_by_username": get_evaluations_by_username,
+        "get_latest_evaluations": get_latest_evaluations,
+    }
 
     def empty(**kwargs):
         _LOGGER.error("No registered action given")
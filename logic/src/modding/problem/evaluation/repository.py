@@ -1,11 +1,27 @@
-from modding.common import repo
+from typing import Dict
+from modding.common import exception, repo
 from modding.problem import models
 
 
 class ProblemEvaluationRepository(repo.Repository):
+    class NotOwnedEvaluation(exception.LoggingErrorException):
+        def __init__(self, id: str):
+            super().__init__("Evaluation %s does not belong to the user" % (id))
+
+    COMPOSITE_KEYS = {"problem_id_username": ["problem_id", "username"]}
+    ACTIVE_INDEX_KEYS = ["problem_id_username"]
+
     def __init__(self, table_name: str = str(), bucket_name: str = str()):
         super().__init__(
             name="ProblemEvaluation", table_name=table_name, bucket_name=bucket_name
         )
 
         self.set_model(models.ProblemEvaluation)
+
+    def get_own_files_manifest(self, id: str) -> Dict[str, str]:
+        evaluation: models.ProblemEvaluation = self.get_item_by_id(
+            id, username=self._username
+        )
+        if evaluation.username != self._username:
+            raise self.NotOwnedEvaluation(id)
+        return evaluation.files_manifest or dict()
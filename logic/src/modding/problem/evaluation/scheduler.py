@@ -0,0 +1,157 @@
+import decimal
+import enum
+import time
+from typing import Any, Callable, Dict, List
+from boto3.dynamodb.conditions import Attr
+from modding.common import aws_cli, exception, logging
+from modding.problem import models
+
+
+_LOGGER = logging.Logger()
+
+PRIORITY_WEIGHTS = {
+    models.PriorityClass.EXAM.value: 0,
+    models.PriorityClass.ASSIGNMENT.value: 1,
+    models.PriorityClass.PRACTICE.value: 2,
+}
+
+
+class JobState(enum.Enum):
+    WAITING = "WAITING"
+    RUNNING = "RUNNING"
+
+
+class SchedulingTimeout(exception.LoggingErrorException):
+    def __init__(self, id: str, retry_after: int):
+        super().__init__("Evaluation %s could not be scheduled in time" % (id))
+        self.retry_after = retry_after
+
+
+class EvaluationScheduler:
+    ### Evaluations wait on a shared queue table before taking sandboxes. Jobs
+    ### are served by due time, their enqueue time pushed aging_seconds back
+    ### for every class below the highest, so a waiting job climbs one class
+    ### every aging_seconds and lower classes are never starved. Waiters only
+    ### read the running jobs and the head of the queue, from an index by
+    ### state and due time, and claim their job with a conditional update
+
+    def __init__(
+        self,
+        table_name: str,
+        state_index_name: str,
+        slots: int,
+        aging_seconds: float,
+        max_wait_seconds: float,
+        stale_seconds: float,
+        poll_seconds: float = 0.5,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.table = aws_cli.AwsCustomClient.dynamo(table_name)
+        self.state_index_name = state_index_name
+        self.slots = slots
+        self.aging_seconds = aging_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.stale_seconds = stale_seconds
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self.sleep = sleep
+
+    def due_at(self, priority: str, enqueued_at: float) -> float:
+        return enqueued_at + PRIORITY_WEIGHTS.get(priority) * self.aging_seconds
+
+    def __jobs(self, state: JobState, limit: int = None) -> List[Dict[str, Any]]:
+        return list(
+            self.table.query_items(
+                {"state": state.value},
+                dict(),
+                index_name=self.state_index_name,
+                limit=limit,
+            )
+        )
+
+    def __live_jobs(
+        self, jobs: List[Dict[str, Any]], now: float
+    ) -> List[Dict[str, Any]]:
+        ### Jobs of lambdas that died without releasing are removed after a while
+        live = []
+        for job in jobs:
+            if now - float(job.get("enqueued_at")) > self.stale_seconds:
+                self.release(job.get("id"))
+            else:
+                live.append(job)
+        return live
+
+    def __is_next(self, id: str, now: float) -> bool:
+        ### Only as many jobs as free slots are read from the head of the queue
+        running = self.__live_jobs(self.__jobs(JobState.RUNNING), now)
+        free_slots = self.slots - len(running)
+        if free_slots <= 0:
+            return False
+        ahead = self.__live_jobs(self.__jobs(JobState.WAITING, free_slots), now)
+        return id in [job.get("id") for job in ahead]
+
+    def __claim(self, job: Dict[str, Any]) -> bool:
+        try:
+            self.table.update_item(
+                {"id": job.get("id")},
+                {"state": JobState.RUNNING.value},
+                condition=Attr("state").eq(JobState.WAITING.value),
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            ### Removed as stale meanwhile, it waits again
+            self.table.put_item(job)
+            return False
+        return True
+
+    def metrics(self, jobs: List[Dict[str, Any]], now: float) -> Dict[str, Any]:
+        result = {
+            priority: {"depth": 0, "running": 0, "max_wait": 0}
+            for priority in PRIORITY_WEIGHTS
+        }
+        for job in jobs:
+            metric = result.get(job.get("priority"))
+            if job.get("state") == JobState.RUNNING.value:
+                metric["running"] += 1
+            else:
+                metric["depth"] += 1
+                waited = now - float(job.get("enqueued_at"))
+                metric["max_wait"] = max(metric["max_wait"], round(waited, 3))
+        return result
+
+    def __log_metrics(self, now: float) -> None:
+        ### The whole queue is read once per acquired job, not on every poll
+        jobs = self.__jobs(JobState.WAITING) + self.__jobs(JobState.RUNNING)
+        metrics = self.metrics(jobs, now)
+        for priority in metrics:
+            metric = metrics[priority]
+            _LOGGER.info(
+                "Evaluation queue class=%s depth=%s running=%s max_wait=%s"
+                % (priority, metric["depth"], metric["running"], metric["max_wait"])
+            )
+
+    def acquire(self, id: str, priority: str) -> float:
+        enqueued_at = self.clock()
+        job = {
+            "id": id,
+            "priority": priority,
+            "state": JobState.WAITING.value,
+            "enqueued_at": decimal.Decimal(str(enqueued_at)),
+            "due_at": decimal.Decimal(str(self.due_at(priority, enqueued_at))),
+        }
+        self.table.put_item(job)
+
+        while True:
+            now = self.clock()
+            if self.__is_next(id, now) and self.__claim(job):
+                self.__log_metrics(now)
+                return now - enqueued_at
+
+            if now - enqueued_at > self.max_wait_seconds:
+                self.release(id)
+                raise SchedulingTimeout(id, int(self.aging_seconds))
+
+            self.sleep(self.poll_seconds)
+
+    def release(self, id: str) -> None:
+        self.table.delete_item({"id": id})
@@ -0,0 +1,180 @@
+import base64
+import binascii
+import hashlib
+import io
+import posixpath
+import zipfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+from modding.common import exception
+from modding.problem import models, repository
+
+
+ENCODING = "utf-8"
+MAX_SUBMISSION_FILES = 200
+MAX_SUBMISSION_BYTES = 2 * 1024 * 1024
+
+
+class SubmissionError(exception.LoggingErrorException):
+    ### Problems of the sent files, answered as a bad request
+    pass
+
+
+class InvalidSubmissionPath(SubmissionError):
+    def __init__(self, path: str):
+        super().__init__("Submission path %s is not allowed" % (path))
+
+
+class MissingSubmissionContent(SubmissionError):
+    def __init__(self, path: str):
+        super().__init__(
+            "Submission file %s has no content and was not sent before" % (path)
+        )
+
+
+class EntryPointNotFound(SubmissionError):
+    def __init__(self, entry_point: str):
+        super().__init__("Entry point %s is not part of the submission" % (entry_point))
+
+
+class TooManySubmissionFiles(SubmissionError):
+    def __init__(self):
+        super().__init__(
+            "Submission can not have more than %s files" % (MAX_SUBMISSION_FILES)
+        )
+
+
+class SubmissionTooLarge(SubmissionError):
+    def __init__(self):
+        super().__init__(
+            "Submission can not have more than %s bytes" % (MAX_SUBMISSION_BYTES)
+        )
+
+
+class InvalidSubmissionArchive(SubmissionError):
+    def __init__(self, message: str):
+        super().__init__("Submission archive is not valid, %s" % (message))
+
+
+class InvalidSubmissionEncoding(SubmissionError):
+    def __init__(self, path: str):
+        super().__init__("Submission file %s is not %s text" % (path, ENCODING))
+
+
+def digest(content: str) -> str:
+    return hashlib.sha256(content.encode(ENCODING)).hexdigest()
+
+
+def clean_path(path: str) -> str:
+    cleaned = posixpath.normpath(path.replace("\\", "/"))
+    if cleaned.startswith("/") or cleaned == "." or cleaned.split("/")[0] == "..":
+        raise InvalidSubmissionPath(path)
+    return cleaned
+
+
+def _read_member(zipped: zipfile.ZipFile, info: zipfile.ZipInfo, limit: int) -> bytes:
+    ### Declared sizes can lie, no more than the remaining budget is inflated
+    with zipped.open(info) as member:
+        data = member.read(limit + 1)
+    if len(data) > limit:
+        raise SubmissionTooLarge()
+    return data
+
+
+def unpack_archive(archive: str) -> List[models.SubmissionFile]:
+    ### Archives are received as base64 encoded zip files, the file count and
+    ### declared sizes are checked before anything is decompressed
+    result = []
+    try:
+        with zipfile.ZipFile(io.BytesIO(base64.b64decode(archive))) as zipped:
+            infos = [info for info in zipped.infolist() if not info.is_dir()]
+            if len(infos) > MAX_SUBMISSION_FILES:
+                raise TooManySubmissionFiles()
+            if sum(info.file_size for info in infos) > MAX_SUBMISSION_BYTES:
+                raise SubmissionTooLarge()
+
+            remaining = MAX_SUBMISSION_BYTES
+            for info in infos:
+                data = _read_member(zipped, info, remaining)
+                remaining -= len(data)
+                try:
+                    content = data.decode(ENCODING)
+                except UnicodeDecodeError:
+                    raise InvalidSubmissionEncoding(info.filename)
+                result.append(
+                    models.SubmissionFile(path=info.filename, content=content)
+                )
+    except (
+        binascii.Error,
+        zipfile.BadZipFile,
+        zlib.error,
+        NotImplementedError,
+        RuntimeError,
+    ) as e:
+        ### Corrupt data, unknown compression methods and encrypted members
+        raise InvalidSubmissionArchive(str(e))
+    return result
+
+
+def build_files(
+    default_name: str,
+    file_input: Optional[str] = None,
+    files: Optional[List[Dict[str, str]]] = None,
+    archive: Optional[str] = None,
+) -> List[models.SubmissionFile]:
+    result = []
+    if file_input is not None:
+        result.append(models.SubmissionFile(path=default_name, content=file_input))
+    if archive:
+        result.extend(unpack_archive(archive))
+    for file in files or []:
+        result.append(models.SubmissionFile.parse_obj(file))
+
+    if len(result) > MAX_SUBMISSION_FILES:
+        raise TooManySubmissionFiles()
+
+    return result
+
+
+def resolve_contents(
+    files: List[models.SubmissionFile],
+    previous_manifest: Dict[str, str],
+    problem_repository: repository.ProblemRepository,
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    ### Files already sent on the previous submission can come without content,
+    ### only their hash, and files with an already stored hash are not uploaded
+
+    stored_digests = set(previous_manifest.values())
+    contents, manifest = dict(), dict()
+    for file in files:
+        path = clean_path(file.path)
+        if file.content is not None:
+            file_digest = digest(file.content)
+            if file_digest not in stored_digests:
+                problem_repository.put_submission_content(file_digest, file.content)
+                stored_digests.add(file_digest)
+            contents[path] = file.content
+        elif file.hash and file.hash in stored_digests:
+            file_digest = file.hash
+            contents[path] = problem_repository.get_submission_content(file_digest)
+        else:
+            raise MissingSubmissionContent(path)
+
+        manifest[path] = file_digest
+
+    return contents, manifest
+
+
+def check_entry_point(entry_point: str, contents: Dict[str, str]) -> str:
+    cleaned = clean_path(entry_point)
+    if cleaned not in contents:
+        raise EntryPointNotFound(entry_point)
+    return cleaned
+
+
+def pack_archive(contents: Dict[str, str]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipped:
+        for path in contents:
+            zipped.writestr(path, contents[path])
+    return buffer.getvalue()
@@ -1,5 +1,6 @@
 from typing import Any, Dict
-from modding.common import http, logging, settings
+from modding.aggregate import counters
+from modding.common import http, logging, pagination, settings
 from modding.problem import repository
 from modding.utils import function
 from modding.common.aws_cli import AwsCustomClient as aws_client
@@ -7,7 +8,9 @@ from modding.common.aws_cli import AwsCustomClient as aws_client
 
 class _Settings(settings.Settings):
     problem_table_name: str
+    problem_test_case_table_name: str
     problem_minicourse_index_name: str
+    aggregate_table_name: str
 
 
 _SETTINGS = _Settings()
@@ -17,6 +20,22 @@ _LOGGER = logging.Logger()
 PROBLEM_REPOSITORY = repository.ProblemRepository(
     table_name=_SETTINGS.problem_table_name,
 )
+TEST_CASE_REPOSITORY = repository.ProblemTestCaseRepository(
+    _SETTINGS.problem_test_case_table_name
+)
+AGGREGATE_COUNTERS = counters.AggregateCounters(_SETTINGS.aggregate_table_name)
+
+### Lists do not need the description nor the test cases
+PROBLEM_LIST_FIELDS = [
+    "name",
+    "minicourse_id",
+    "difficulty",
+    "status",
+    "priority",
+    "visible",
+    "creation_date",
+    "updated_date",
+]
 
 
 @function.decorator_builder(
@@ -28,18 +47,26 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]):
         result = actions(**event.body)
 
         response = http.get_response(http.HttpCodes.SUCCESS, body=result)
+    except pagination.InvalidPagination as e:
+        response = http.get_bad_request_response(str(e))
     except Exception as e:
         _LOGGER.error(e)
         response = http.get_standard_error_response()
     return response
 
 
-def get_problems_by_minicourse(minicourse_id: str, **kwargs) -> Dict[str, Any]:
-    problems = PROBLEM_REPOSITORY.query_items(
+def get_problems_by_minicourse(
+    minicourse_id: str, limit: int = None, cursor: str = None, **kwargs
+) -> Dict[str, Any]:
+    problems, next_cursor = PROBLEM_REPOSITORY.query_page(
         {"minicourse_id": minicourse_id},
         index_name=_SETTINGS.problem_minicourse_index_name,
+        limit=limit,
+        cursor=cursor,
+        fields=PROBLEM_LIST_FIELDS,
+        serialized=True,
     )
-    return {"problems": [problem.dict() for problem in problems]}
+    return {"problems": problems, "cursor": next_cursor}
 
 
 def get_problem_by_id(id: str, **kwargs) -> Dict[str, Any]:
@@ -47,10 +74,27 @@ def get_problem_by_id(id: str, **kwargs) -> Dict[str, Any]:
     return problem.dict()
 
 
+def get_problem_test_cases(
+    problem_id: str, limit: int = None, cursor: str = None, **kwargs
+) -> Dict[str, Any]:
+    ### Cases uploaded to their table, by index. Older problems keep theirs
+    ### embedded on the problem
+    test_cases, next_cursor = TEST_CASE_REPOSITORY.query_page(
+        {"problem_id": problem_id}, limit=limit, cursor=cursor, serialized=True
+    )
+    return {"test_cases": test_cases, "cursor": next_cursor}
+
+
+def get_problem_counters(id: str, **kwargs) -> Dict[str, Any]:
+    return AGGREGATE_COUNTERS.get(counters.PROBLEM_KIND, id)
+
+
 def actions(action: str, params: Dict[str, Any], **kwargs) -> Dict[str, Any]:
     mapped_actions = {
         "get_problems_by_minicourse": get_problems_by_minicourse,
         "get_problem_by_id": get_problem_by_id,
+        "get_problem_test_cases": get_problem_test_cases,
+        "get_problem_counters": get_problem_counters,
     }
 
     def empty(**kwargs):
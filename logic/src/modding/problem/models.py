@@ -1,5 +1,5 @@
 import enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import pydantic
 
@@ -12,6 +12,12 @@ class ProblemStatus(enum.Enum):
     COMPLETED = "COMPLETED"
 
 
+class PriorityClass(enum.Enum):
+    EXAM = "EXAM"
+    ASSIGNMENT = "ASSIGNMENT"
+    PRACTICE = "PRACTICE"
+
+
 class ProblemDescription(pydantic.BaseModel):
     description: Optional[str]
     sample_input: Optional[str]
@@ -29,13 +35,22 @@ class ProblemInputFile(model.Model):
     output_data: Optional[str]
 
 
+class ProblemTestCase(ProblemInputFile):
+    problem_id: str
+    case_index: int
+
+
 class Problem(model.Model):
     name: str
     minicourse_id: str
     description: Optional[ProblemDescription]
+    ### Test cases live on their own table, the embedded list is only kept
+    ### for problems created before it
     test_case: Optional[List[ProblemInputFile]]
+    test_case_count: Optional[int]
     difficulty: int
     status: ProblemStatus
+    priority: PriorityClass = PriorityClass.PRACTICE
 
     class Config:
         use_enum_values = True
@@ -55,11 +70,21 @@ class InputVeredict(pydantic.BaseModel):
         use_enum_values = True
 
 
+class SubmissionFile(pydantic.BaseModel):
+    path: str
+    hash: Optional[str]
+    content: Optional[str]
+
+
 class ProblemEvaluation(model.ModelShown):
     problem_id: str
     veredict: ProblemVeredict
     veredict_reason: Optional[List[str]]
     inputs_veredict: Optional[List[InputVeredict]]
+    entry_point: Optional[str]
+    files_manifest: Optional[Dict[str, str]]
+    priority: PriorityClass = PriorityClass.PRACTICE
+    queue_wait_ms: Optional[int]
 
     class Config:
         use_enum_values = True
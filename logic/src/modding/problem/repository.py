@@ -1,18 +1,113 @@
-from modding.common import repo
+import contextlib
+from typing import BinaryIO, Iterator, List, Optional
+from boto3.dynamodb.conditions import Attr
+from modding.common import aws_cli, repo
 from modding.problem import models
+from modding.utils import disk_cache
 
 
 class ProblemRepository(repo.Repository):
 
     FILES_PATH = "cases"
+    SUBMISSIONS_PATH = "submissions"
+    TEST_CASE_FIELD = "test_case"
+    TEST_CASE_COUNT_FIELD = "test_case_count"
+    ACTIVE_INDEX_KEYS = ["minicourse_id"]
 
-    def __init__(self, table_name: str = str(), bucket_name: str = str()):
+    def __init__(
+        self,
+        table_name: str = str(),
+        bucket_name: str = str(),
+        files_cache: disk_cache.DiskCache = None,
+    ):
         super().__init__(name="Problem", table_name=table_name, bucket_name=bucket_name)
 
         self.set_model(models.Problem)
+        self.files_cache = files_cache
+
+    def next_test_case_index(self, problem_id: str, username: str = None) -> int:
+        ### Problems created before the counter start it from their list size,
+        ### if_not_exists keeps concurrent first uploads from sharing an index
+        key = self._resolve_key(problem_id, username, self.UpdatingNotExistentEntity)
+        username = key.get("username")
+        try:
+            count = self.increment_field(
+                problem_id, self.TEST_CASE_COUNT_FIELD, username=username
+            )
+        except self.UpdatingNotExistentEntity:
+            problem: models.Problem = self.get_item_by_id(
+                problem_id, username, fields=[self.TEST_CASE_FIELD]
+            )
+            count = self.increment_field(
+                problem_id,
+                self.TEST_CASE_COUNT_FIELD,
+                start=len(problem.test_case or []),
+                username=username,
+            )
+        return count - 1
 
     def file_put_presigned_url(self, file_id: str, expire_time: int) -> str:
         return self.put_presigned_url(self.FILES_PATH, file_id, expire_time)
 
+    def __get_cached_content(self, path: str, id: str) -> str:
+        if self.files_cache is None:
+            return self.get_content(path, id)
+
+        cache_key = f"{path}/{id}"
+        content = self.files_cache.get(cache_key)
+        if content is None:
+            content = self.get_content(path, id)
+            self.files_cache.put(cache_key, content)
+
+        return content
+
     def get_file_content(self, file_id: str) -> str:
-        return self.get_content(self.FILES_PATH, file_id)
+        return self.__get_cached_content(self.FILES_PATH, file_id)
+
+    def open_file_content(self, file_id: str) -> BinaryIO:
+        ### Read from the cached blob, or straight from the bucket when it does
+        ### not fit the cache, so the content is never held whole
+        if self.files_cache is None:
+            return self.get_content_stream(self.FILES_PATH, file_id)
+
+        cache_key = f"{self.FILES_PATH}/{file_id}"
+        file = self.files_cache.open(cache_key)
+        if file is None:
+            stream = self.get_content_stream(self.FILES_PATH, file_id)
+            with contextlib.closing(stream):
+                self.files_cache.put_stream(cache_key, stream)
+            file = self.files_cache.open(cache_key)
+        return file or self.get_content_stream(self.FILES_PATH, file_id)
+
+    def put_submission_content(self, digest: str, content: str) -> None:
+        self.put_content(self.SUBMISSIONS_PATH, digest, content)
+
+    def get_submission_content(self, digest: str) -> str:
+        return self.__get_cached_content(self.SUBMISSIONS_PATH, digest)
+
+
+class ProblemTestCaseRepository(repo.Repository):
+    ### Test cases are keyed by (problem_id, case_index) so a problem is not
+    ### limited by the item size and reading it does not load its cases
+
+    def __init__(self, table_name: str = str()):
+        super().__init__(
+            name="ProblemTestCase", table_name=table_name, bucket_name=str()
+        )
+
+        self.set_model(models.ProblemTestCase)
+
+    def put_test_case(self, test_case: models.ProblemTestCase) -> None:
+        test_case.username = self._username
+        try:
+            self.table.put_item(
+                test_case.dict(), condition=Attr("case_index").not_exists()
+            )
+        except aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed:
+            raise self.NotSavingIdAlreadyExistsOnTableException(test_case.id)
+
+    def stream_test_cases(
+        self, problem_id: str, fields: Optional[List[str]] = None
+    ) -> Iterator[models.ProblemTestCase]:
+        ### Ordered by case index, pages are only read as they are consumed
+        return self.query_items({"problem_id": problem_id}, fields=fields)
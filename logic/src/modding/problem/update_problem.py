@@ -26,7 +26,9 @@ class ProblemNotBuilt(exception.LoggingErrorException):
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        updated_problem = update_problem(**event.body)
+        updated_problem = update_problem(
+            **{**event.body, "username": event.headers.get("username")}
+        )
 
         response = http.get_response(
             http.HttpCodes.SUCCESS,
@@ -40,20 +42,16 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def build_updated_problem(problem_id: str, **kwargs) -> models.Problem:
+def build_problem_changes(problem_id: str, **kwargs) -> Dict[str, Any]:
+    ### Only the sent fields are validated and written
     try:
-        problem: models.Problem = PROBLEM_REPOSITORY.get_item_by_id(problem_id)
-        problem_data = problem.dict()
-        problem_data.update(**kwargs)
-        problem_data.update({"id": problem_id})
-        result = models.Problem(**problem_data)
+        changes = models.Problem.parse_partial({**kwargs, "id": problem_id})
     except Exception as e:
         raise ProblemNotBuilt(problem_id, e)
 
-    return result
+    return changes.dict(include=changes.__fields_set__)
 
 
-def update_problem(id: str, **kwargs) -> models.Problem:
-    problem = build_updated_problem(id, **kwargs)
-    PROBLEM_REPOSITORY.save_on_table(problem, update=True)
-    return problem
+def update_problem(id: str, username: str = None, **kwargs) -> models.Problem:
+    changes = build_problem_changes(id, **kwargs)
+    return PROBLEM_REPOSITORY.update_fields(id, changes, username=username)
@@ -8,6 +8,7 @@ from modding.common.aws_cli import AwsCustomClient as aws_client
 class _Settings(settings.Settings):
     problem_table_name: str
     problem_bucket_name: str
+    problem_test_case_table_name: str
     upload_url_expire_time: str
 
 
@@ -18,6 +19,10 @@ PROBLEM_REPOSITORY = repository.ProblemRepository(
     _SETTINGS.problem_table_name, _SETTINGS.problem_bucket_name
 )
 
+TEST_CASE_REPOSITORY = repository.ProblemTestCaseRepository(
+    _SETTINGS.problem_test_case_table_name
+)
+
 
 class ProblemNotBuilt(exception.LoggingErrorException):
     def __init__(self, id: str, message: str):
@@ -25,12 +30,16 @@ class ProblemNotBuilt(exception.LoggingErrorException):
 
 
 @function.decorator_builder(
-    aws_client.ApiGateway.include_repos_action, PROBLEM_REPOSITORY
+    aws_client.ApiGateway.include_repos_action,
+    PROBLEM_REPOSITORY,
+    TEST_CASE_REPOSITORY,
 )
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        problem_and_generated_urls = update_problem_and_generate_urls(**event.body)
+        problem_and_generated_urls = update_problem_and_generate_urls(
+            **{**event.body, "username": event.headers.get("username")}
+        )
 
         response = http.get_response(
             http.HttpCodes.SUCCESS,
@@ -44,50 +53,68 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def build_updated_problem(
-    problem_id: str, input_name: str, output_name: str, **kwargs
-) -> models.Problem:
+def build_test_case(
+    problem_id: str, index: int, input_name: str, output_name: str
+) -> models.ProblemTestCase:
+    common_id = lambda _name: f"{problem_id}-{index}_{_name}"
+    common_file_id = lambda _type: f"{common_id(_type)}.txt"
+    return models.ProblemTestCase(
+        id=common_id("test"),
+        problem_id=problem_id,
+        case_index=index,
+        input_name=input_name,
+        output_name=output_name,
+        input_id=common_file_id("input"),
+        output_id=common_file_id("output"),
+        creation_date=date.get_unix_time_from_now(),
+    )
+
+
+def add_test_case(
+    problem_id: str,
+    input_name: str,
+    output_name: str,
+    username: str = None,
+    **kwargs,
+) -> models.ProblemTestCase:
     try:
-        problem: models.Problem = PROBLEM_REPOSITORY.get_item_by_id(problem_id)
-        common_id = lambda _name: f"{problem.id}-{len(problem.test_case or [])}_{_name}"
-        common_file_id = lambda _type: f"{common_id(_type)}.txt"
-        problem_data = problem.dict()
-        new_test_case = models.ProblemInputFile(
-            id=common_id("test"),
-            input_name=input_name,
-            output_name=output_name,
-            input_id=common_file_id("input"),
-            output_id=common_file_id("output"),
-            creation_date=date.get_unix_time_from_now(),
-        )
-        problem_data.update(
-            {
-                "id": problem_id,
-                "test_case": [
-                    *(problem.test_case if problem.test_case is not None else []),
-                    new_test_case,
-                ],
-            }
-        )
-        result = models.Problem(**problem_data)
+        index = PROBLEM_REPOSITORY.next_test_case_index(problem_id, username)
+        test_case = build_test_case(problem_id, index, input_name, output_name)
+        TEST_CASE_REPOSITORY.put_test_case(test_case)
     except Exception as e:
         raise ProblemNotBuilt(problem_id, e)
 
-    return result
+    return test_case
 
 
-def get_problem_test_case_upload_urls(problem: models.Problem) -> Dict[str, Any]:
+def get_problem_test_case_upload_urls(
+    test_case: models.ProblemInputFile,
+) -> Dict[str, Any]:
     input_upload_url = PROBLEM_REPOSITORY.file_put_presigned_url(
-        problem.test_case[-1].input_id, int(_SETTINGS.upload_url_expire_time)
+        test_case.input_id, int(_SETTINGS.upload_url_expire_time)
     )
     output_upload_url = PROBLEM_REPOSITORY.file_put_presigned_url(
-        problem.test_case[-1].output_id, int(_SETTINGS.upload_url_expire_time)
+        test_case.output_id, int(_SETTINGS.upload_url_expire_time)
     )
     return {"input_url": input_upload_url, "output_url": output_upload_url}
 
 
-def update_problem_and_generate_urls(id: str, **kwargs) -> Dict[str, Any]:
-    problem = build_updated_problem(id, **kwargs)
-    PROBLEM_REPOSITORY.save_on_table(problem, update=True)
-    upload_urls = get_problem_test_case_upload_urls(problem)
-    return {**problem.dict(), **upload_urls}
+def update_problem_and_generate_urls(
+    id: str, username: str = None, **kwargs
+) -> Dict[str, Any]:
+    ### Answered as before the test case table, the problem with all of its
+    ### cases, the new one last, and the upload urls of the new one
+    test_case = add_test_case(id, username=username, **kwargs)
+    problem: models.Problem = PROBLEM_REPOSITORY.get_item_by_id(id, username)
+    uploaded = [
+        case
+        for case in TEST_CASE_REPOSITORY.stream_test_cases(id)
+        if case.id != test_case.id
+    ]
+    test_cases = [*(problem.test_case or []), *uploaded, test_case]
+    upload_urls = get_problem_test_case_upload_urls(test_case)
+    return {
+        **problem.dict(),
+        "test_case": [case.dict() for case in test_cases],
+        **upload_urls,
+    }
@@ -1,9 +1,12 @@
+import contextlib
 import enum
-from typing import List, Optional, Tuple
+from concurrent import futures
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple
 import paramiko
-from io import StringIO
+from io import BytesIO, StringIO
 from modding.problem import models
 from modding.common import settings
+from modding.utils import sandbox
 
 
 class LanguageTypes(enum.Enum):
@@ -29,12 +32,24 @@ class Analizer:
         instance_public_dns: str
         instance_username: str
         instance_private_key: str
+        sandbox_slots: str = "4"
+        sandbox_cpu_quota: str = "1"
+        sandbox_memory_limit: str = "256M"
+        sandbox_workdir_size: str = "64M"
+        sandbox_timeout_seconds: str = "10"
 
     def __init__(self):
         self._settings = self._Settings()
         self.ssh_client = paramiko.SSHClient()
         self.private_key = self.__set_private_key()
         self.__connect_ssh()
+        self.sandbox_pool = sandbox.SandboxPool(
+            slots=int(self._settings.sandbox_slots),
+            cpu_quota=float(self._settings.sandbox_cpu_quota),
+            memory_limit=self._settings.sandbox_memory_limit,
+            workdir_size=self._settings.sandbox_workdir_size,
+            timeout_seconds=int(self._settings.sandbox_timeout_seconds),
+        )
 
     def __set_private_key(self):
         self.ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -50,7 +65,8 @@ class Analizer:
             pkey=self.private_key,
         )
 
-    def _store_file(self, folder: str, file_name: str, file_value: str) -> None:
+    def _store_file(self, folder: str, file_name: str, file: BinaryIO) -> None:
+        ### Sent by chunks as it is read, the content is never held whole
         self.sftp_client = self.ssh_client.open_sftp()
         try:
             self.sftp_client.chdir(folder)
@@ -58,51 +74,79 @@ class Analizer:
             self.sftp_client.mkdir(folder)
             self.sftp_client.chdir(folder)
         finally:
-            file = self.sftp_client.file(file_name, "a", -1)
-            file.write(file_value)
-            file.flush()
+            self.sftp_client.putfo(file, file_name)
 
         self.sftp_client.close()
 
+    def _store_archive(self, folder: str, file_name: str, archive: bytes) -> None:
+        self._store_file(folder, file_name, BytesIO(archive))
+
     def _exec_command(
-        self, command: str, case_id: str = str()
+        self, command: str, case_id: str = str(), wait: bool = False
     ) -> Optional[Tuple[str, str]]:
         stdin, stdout, stderr = self.ssh_client.exec_command(command)
         stdin.flush()
         if case_id:
             return (case_id, stdout.read().decode())
+        if wait:
+            stdout.channel.recv_exit_status()
 
     def _run(
-        self, id: str, lang: Language, code: str, files: List[models.ProblemInputFile]
+        self,
+        id: str,
+        lang: Language,
+        archive: bytes,
+        entry_point: str,
+        files: Iterable[models.ProblemInputFile],
+        open_content: Callable[[str], BinaryIO],
     ) -> List[Tuple[str, str]]:
         results = []
 
         wrap_folder = lambda name: f"{id}/{name}"
 
-        code_name = "code.%s" % (lang.ext)
-        self._store_file(id, code_name, code)
+        ### The whole submission is staged as one archive and extracted on
+        ### its own folder, cases are run from there
+        archive_name = "submission.zip"
+        code_folder = "code"
+        self._store_archive(id, archive_name, archive)
+        self._exec_command(
+            "cd %s && python3 -m zipfile -e %s %s" % (id, archive_name, code_folder),
+            wait=True,
+        )
 
         output_name = lambda i: wrap_folder("%s_code.out" % (i))
         in_name = lambda i: "%s.in" % (i)
         out_name = lambda i: "%s.out" % (i)
 
-        for i in range(len(files)):
-            file = files[i]
-            if file.input_data and file.output_data:
-                self._store_file(id, in_name(i), file.input_data)
-                self._store_file(id, out_name(i), file.output_data)
-
-        for i in range(len(files)):
-            file = files[i]
-            running = "%s %s < %s > %s" % (
-                lang.command,
-                wrap_folder(code_name),
-                wrap_folder(in_name(i)),
-                output_name(i),
+        ### Cases are staged as they come, each content is copied from its
+        ### opened file to the evaluator without being loaded in memory
+        case_ids = []
+        for i, file in enumerate(files):
+            staged = [(in_name(i), file.input_id), (out_name(i), file.output_id)]
+            for name, content_id in staged:
+                with contextlib.closing(open_content(content_id)) as content:
+                    self._store_file(id, name, content)
+            case_ids.append(file.id)
+
+        self._exec_command(self.sandbox_pool.provision_command(), wait=True)
+
+        def run_case(i: int) -> Tuple[str, str]:
+            ### Each case takes the first free sandbox of the pool
+            running = self.sandbox_pool.run_command(
+                command=lang.command,
+                entry_point=entry_point,
+                code_folder=wrap_folder(code_folder),
+                input_file=wrap_folder(in_name(i)),
+                output_file=output_name(i),
             )
             comparing = "diff %s %s" % (output_name(i), wrap_folder(out_name(i)))
-            self._exec_command(running)
-            results.append(self._exec_command(comparing, file.id))
+            self._exec_command(running, wait=True)
+            return self._exec_command(comparing, case_ids[i])
+
+        with futures.ThreadPoolExecutor(
+            max_workers=self.sandbox_pool.slots
+        ) as executor:
+            results.extend(executor.map(run_case, range(len(case_ids))))
 
         self._exec_command("rm -r %s" % (id))
 
@@ -145,16 +189,20 @@ class Analizer:
     def analyze(
         self,
         evaluation: models.ProblemEvaluation,
-        file_input: str,
+        archive: bytes,
+        entry_point: str,
         file_type: str,
-        files: List[models.ProblemInputFile],
+        files: Iterable[models.ProblemInputFile],
+        open_content: Callable[[str], BinaryIO],
     ):
         language = Language.get_by_type(file_type)
         kwargs = {
             "id": evaluation.id,
-            "code": file_input,
+            "archive": archive,
+            "entry_point": entry_point,
             "lang": language,
             "files": files,
+            "open_content": open_content,
         }
 
         results = self._run(**kwargs)
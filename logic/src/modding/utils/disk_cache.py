@@ -0,0 +1,156 @@
+import collections
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Dict, Optional, Tuple
+
+
+DEFAULT_DIRECTORY = "/tmp/modding_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENCODING = "utf-8"
+CHUNK_BYTES = 64 * 1024
+
+
+class DiskCache:
+    ### Content addressed cache living on the lambda ephemeral storage, keys are
+    ### mapped to the hash of their content so equal files are stored once, and
+    ### the least recently used keys are evicted when the size budget is exceeded
+
+    def __init__(
+        self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.__keys: "collections.OrderedDict[str, str]" = collections.OrderedDict()
+        self.__blobs: Dict[str, Tuple[int, int]] = dict()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def digest(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def __blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest)
+
+    def __forget(self, key: str) -> None:
+        digest = self.__keys.pop(key, None)
+        if digest is None:
+            return
+
+        size, references = self.__blobs.get(digest)
+        if references > 1:
+            self.__blobs[digest] = (size, references - 1)
+        else:
+            self.__blobs.pop(digest)
+            self.size -= size
+            try:
+                os.remove(self.__blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def __evict(self) -> None:
+        while self.size > self.max_bytes and self.__keys:
+            oldest = next(iter(self.__keys))
+            self.__forget(oldest)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__keys
+
+    def path(self, key: str) -> Optional[str]:
+        digest = self.__keys.get(key)
+        return self.__blob_path(digest) if digest is not None else None
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        ### The blob is read from disk as it is consumed, an eviction while it
+        ### is open only unlinks the file
+        path = self.path(key)
+        if path is None:
+            self.misses += 1
+            return None
+
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            ### Ephemeral storage could have been wiped on a new sandbox
+            self.__forget(key)
+            self.misses += 1
+            return None
+
+        self.__keys.move_to_end(key)
+        self.hits += 1
+        return file
+
+    def read(self, key: str) -> Optional[bytes]:
+        file = self.open(key)
+        if file is None:
+            return None
+        with file:
+            return file.read()
+
+    def get(self, key: str) -> Optional[str]:
+        content = self.read(key)
+        return content.decode(ENCODING) if content is not None else None
+
+    def __store(
+        self, key: str, digest: str, size: int, temporal_path: Optional[str]
+    ) -> None:
+        if digest in self.__blobs:
+            if temporal_path is not None:
+                os.remove(temporal_path)
+            size, references = self.__blobs[digest]
+            self.__blobs[digest] = (size, references + 1)
+        else:
+            os.replace(temporal_path, self.__blob_path(digest))
+            self.__blobs[digest] = (size, 1)
+            self.size += size
+
+        self.__keys[key] = digest
+        self.__evict()
+
+    def put(self, key: str, content: bytes) -> str:
+        if isinstance(content, str):
+            content = content.encode(ENCODING)
+
+        digest = self.digest(content)
+        if self.__keys.get(key) == digest:
+            self.__keys.move_to_end(key)
+            return digest
+
+        self.__forget(key)
+
+        temporal_path = None
+        if digest not in self.__blobs:
+            descriptor, temporal_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+        self.__store(key, digest, len(content), temporal_path)
+        return digest
+
+    def put_stream(self, key: str, stream: BinaryIO) -> str:
+        ### Written and hashed by chunks, the content is never held whole
+        hasher = hashlib.sha256()
+        size = 0
+        descriptor, temporal_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(descriptor, "wb") as file:
+            for chunk in iter(lambda: stream.read(CHUNK_BYTES), b""):
+                hasher.update(chunk)
+                file.write(chunk)
+                size += len(chunk)
+
+        self.__forget(key)
+        digest = hasher.hexdigest()
+        self.__store(key, digest, size, temporal_path)
+        return digest
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self.__keys),
+            "blobs": len(self.__blobs),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
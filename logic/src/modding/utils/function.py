@@ -1,4 +1,5 @@
-from typing import Callable
+import inspect
+from typing import Any, Callable
 
 
 def decorator_builder(middleware: Callable, *args, **kwargs):
@@ -14,3 +15,10 @@ def decorator_builder(middleware: Callable, *args, **kwargs):
         return wrapper
 
     return decorator
+
+
+async def resolve(value: Any) -> Any:
+    ### Lets sync and async actions share the same dispatch
+    if inspect.isawaitable(value):
+        return await value
+    return value
@@ -0,0 +1,152 @@
+import shlex
+from typing import List
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+POOL_NAME = "modding"
+WORKDIR_ROOT = "/srv/modding"
+LOCKS_ROOT = "/run/modding"
+SANDBOX_USER = "modding-sandbox"
+SLOT_BUSY_CODE = 75
+PROGRAM_FAILED_CODE = 1
+CPU_PERIOD = 100000
+
+
+class SandboxPool:
+    ### Pool of pre created sandboxes on the evaluator host, each slot has its
+    ### own cgroup limiting cpu, memory and processes, a private tmpfs working
+    ### directory and runs without network as an unprivileged user. A slot is
+    ### taken with an exclusive flock so concurrent evaluations never share one.
+
+    def __init__(
+        self,
+        slots: int,
+        cpu_quota: float,
+        memory_limit: str,
+        workdir_size: str,
+        timeout_seconds: int,
+        max_processes: int = 64,
+    ):
+        self.slots = slots
+        self.cpu_quota = cpu_quota
+        self.memory_limit = memory_limit
+        self.workdir_size = workdir_size
+        self.timeout_seconds = timeout_seconds
+        self.max_processes = max_processes
+
+    @property
+    def cgroup_root(self) -> str:
+        return f"{CGROUP_ROOT}/{POOL_NAME}"
+
+    def cgroup(self, slot: int) -> str:
+        return f"{self.cgroup_root}/slot{slot}"
+
+    def workdir(self, slot: int) -> str:
+        return f"{WORKDIR_ROOT}/slot{slot}"
+
+    def lock(self, slot: int) -> str:
+        return f"{LOCKS_ROOT}/slot{slot}.lock"
+
+    @property
+    def provisioned_mark(self) -> str:
+        return f"{LOCKS_ROOT}/provisioned_{self.slots}"
+
+    def _provision_slot(self, slot: int) -> List[str]:
+        cgroup, workdir = self.cgroup(slot), self.workdir(slot)
+        cpu_max = "%s %s" % (int(self.cpu_quota * CPU_PERIOD), CPU_PERIOD)
+        return [
+            f"mkdir -p {cgroup} {workdir}",
+            f"echo '{cpu_max}' > {cgroup}/cpu.max",
+            f"echo {self.memory_limit} > {cgroup}/memory.max",
+            f"echo 0 > {cgroup}/memory.swap.max",
+            f"echo {self.max_processes} > {cgroup}/pids.max",
+            f"mountpoint -q {workdir} || mount -t tmpfs -o "
+            f"size={self.workdir_size},mode=0770,nosuid,nodev tmpfs {workdir}",
+            f"chown {SANDBOX_USER}:{SANDBOX_USER} {workdir}",
+            f"touch {self.lock(slot)}",
+        ]
+
+    def provision_command(self) -> str:
+        ### Idempotent, only does work the first time on a host
+        commands = [
+            f"id -u {SANDBOX_USER} > /dev/null 2>&1 || "
+            f"useradd --system --no-create-home --shell /usr/sbin/nologin {SANDBOX_USER}",
+            f"mkdir -p {self.cgroup_root} {WORKDIR_ROOT} {LOCKS_ROOT}",
+            f"echo '+cpu +memory +pids' > {CGROUP_ROOT}/cgroup.subtree_control",
+            f"echo '+cpu +memory +pids' > {self.cgroup_root}/cgroup.subtree_control",
+        ]
+        for slot in range(self.slots):
+            commands.extend(self._provision_slot(slot))
+        commands.append(f"chmod 0666 {LOCKS_ROOT}/*.lock")
+        commands.append(f"touch {self.provisioned_mark}")
+
+        script = " && ".join(commands)
+        return "test -f %s || sudo sh -c %s" % (
+            self.provisioned_mark,
+            shlex.quote(script),
+        )
+
+    def _reset_command(self, slot: int) -> str:
+        return f"sudo find {self.workdir(slot)} -mindepth 1 -delete"
+
+    def _slot_command(self, slot: int, code_folder: str, input_file: str) -> str:
+        workdir = self.workdir(slot)
+        inner = (
+            f"echo $$ > {self.cgroup(slot)}/cgroup.procs && "
+            f"exec unshare --net setpriv --reuid={SANDBOX_USER} "
+            f"--regid={SANDBOX_USER} --clear-groups --no-new-privs "
+            f"timeout --kill-after=1 {self.timeout_seconds} sh -c "
+            f'"cd {workdir} && $0 \\"$1\\" < case.in"'
+        )
+        return " && ".join(
+            [
+                self._reset_command(slot),
+                f"sudo cp -r {code_folder}/. {workdir}/",
+                f"sudo cp {input_file} {workdir}/case.in",
+                f"sudo chown -R {SANDBOX_USER}:{SANDBOX_USER} {workdir}",
+                '{ sudo sh -c %s "$COMMAND" "$ENTRY"; status=$?; %s; exit $status; }'
+                % (shlex.quote(inner), self._reset_command(slot)),
+            ]
+        )
+
+    def run_command(
+        self,
+        command: str,
+        entry_point: str,
+        code_folder: str,
+        input_file: str,
+        output_file: str,
+        retry_seconds: float = 0.2,
+    ) -> str:
+        ### Tries every slot without blocking until one is free, the program
+        ### stdout is written to output_file outside of the sandbox. A program
+        ### exiting with the busy code is reported as a plain failure so only
+        ### flock can ask for another try
+        attempts = []
+        for slot in range(self.slots):
+            slot_script = (
+                "(%s); status=$?; [ $status -eq %s ] && exit %s; exit $status"
+                % (
+                    self._slot_command(slot, code_folder, input_file),
+                    SLOT_BUSY_CODE,
+                    PROGRAM_FAILED_CODE,
+                )
+            )
+            attempts.append(
+                "flock -n -E %s %s sh -c %s > %s; status=$?; "
+                "[ $status -ne %s ] && exit $status"
+                % (
+                    SLOT_BUSY_CODE,
+                    self.lock(slot),
+                    shlex.quote(slot_script),
+                    output_file,
+                    SLOT_BUSY_CODE,
+                )
+            )
+
+        return "export COMMAND=%s ENTRY=%s; while true; do %s; sleep %s; done" % (
+            shlex.quote(command),
+            shlex.quote(entry_point),
+            "; ".join(attempts),
+            retry_seconds,
+        )
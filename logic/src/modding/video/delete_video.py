@@ -17,7 +17,7 @@ VIDEO_REPOSITORY = repository.VideoRepository(_SETTINGS.video_table_name)
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        delete_video(**event.body)
+        delete_video(**{**event.body, "username": event.headers.get("username")})
 
         response = http.get_standard_success_response()
 
@@ -28,5 +28,5 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def delete_video(id: str, **kwargs) -> None:
-    VIDEO_REPOSITORY.delete_data(id)
+def delete_video(id: str, username: str = None, **kwargs) -> None:
+    VIDEO_REPOSITORY.delete_data(id, username=username)
@@ -1,5 +1,5 @@
 from typing import Any, Dict
-from modding.common import http, logging, settings
+from modding.common import http, logging, pagination, settings
 from modding.video import repository, models
 from modding.utils import function, files
 from modding.common.aws_cli import AwsCustomClient as aws_client
@@ -30,18 +30,25 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]):
         result = actions(**event.body)
 
         response = http.get_response(http.HttpCodes.SUCCESS, body=result)
+    except pagination.InvalidPagination as e:
+        response = http.get_bad_request_response(str(e))
     except Exception as e:
         _LOGGER.error(e)
         response = http.get_standard_error_response()
     return response
 
 
-def get_videos_by_minicourse(minicourse_id: str, **kwargs) -> Dict[str, Any]:
-    videos = VIDEO_REPOSITORY.query_items(
+def get_videos_by_minicourse(
+    minicourse_id: str, limit: int = None, cursor: str = None, **kwargs
+) -> Dict[str, Any]:
+    videos, next_cursor = VIDEO_REPOSITORY.query_page(
         {"minicourse_id": minicourse_id},
         index_name=_SETTINGS.video_minicourse_index_name,
+        limit=limit,
+        cursor=cursor,
+        serialized=True,
     )
-    return {"videos": [video.dict() for video in videos]}
+    return {"videos": videos, "cursor": next_cursor}
 
 
 def _get_video_download_url(video: models.Video) -> str:
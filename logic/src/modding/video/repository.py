@@ -3,6 +3,8 @@ from modding.video import models
 
 
 class VideoRepository(repo.Repository):
+    ACTIVE_INDEX_KEYS = ["minicourse_id"]
+
     def __init__(self, table_name: str = str(), bucket_name: str = str()):
         super().__init__("Video", table_name=table_name, bucket_name=bucket_name)
 
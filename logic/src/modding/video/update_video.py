@@ -26,7 +26,9 @@ class VideoNotBuilt(exception.LoggingErrorException):
 @aws_client.ApiGateway.pre_handler
 def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> Any:
     try:
-        updated_video = update_video(**event.body)
+        updated_video = update_video(
+            **{**event.body, "username": event.headers.get("username")}
+        )
 
         response = http.get_response(
             http.HttpCodes.SUCCESS,
@@ -40,20 +42,16 @@ def handler(event: aws_client.ApiGateway.AGWEvent, context: Dict[str, Any]) -> A
     return response
 
 
-def build_updated_video(video_id: str, **kwargs) -> models.Video:
+def build_video_changes(video_id: str, **kwargs) -> Dict[str, Any]:
+    ### Only the sent fields are validated and written
     try:
-        video: models.Video = VIDEO_REPOSITORY.get_item_by_id(video_id)
-        video_data = video.dict()
-        video_data.update(**kwargs)
-        video_data.update({"id": video_id})
-        result = models.Video(**video_data)
+        changes = models.Video.parse_partial({**kwargs, "id": video_id})
     except Exception as e:
         raise VideoNotBuilt(video_id, e)
 
-    return result
+    return changes.dict(include=changes.__fields_set__)
 
 
-def update_video(id: str, **kwargs) -> models.Video:
-    video = build_updated_video(id, **kwargs)
-    VIDEO_REPOSITORY.save_on_table(video, update=True)
-    return video
+def update_video(id: str, username: str = None, **kwargs) -> models.Video:
+    changes = build_video_changes(id, **kwargs)
+    return VIDEO_REPOSITORY.update_fields(id, changes, username=username)
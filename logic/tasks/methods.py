@@ -1,3 +1,4 @@
+import importlib
 import os
 import sys
 import subprocess
@@ -43,6 +44,97 @@ def hello_there(name: str, **kwargs):
     print(f"Hello there {name}!")
 
 
+def backfill_active_indexes(
+    repository: str, table_name: str, segments: str = "4", **kwargs
+):
+    ### Run once after deploying active only or composite indexes on an
+    ### existing table, then deploy again with ACTIVE_INDEXES_BACKFILLED set.
+    ### The repository is given as module.Class below modding
+    load_dotenv()
+    sys.path.append("%s/src" % (os.path.dirname(os.path.dirname(__file__))))
+
+    module_name, class_name = repository.rsplit(".", 1)
+    module = importlib.import_module(f"modding.{module_name}")
+    repository_class = getattr(module, class_name)
+    count = repository_class(table_name=table_name).backfill_active_indexes(
+        segments=int(segments)
+    )
+    print(f"Backfilled {count} items of {table_name}")
+
+
+def rebuild_course_details(segments: str = "4", batch: str = "100", **kwargs):
+    ### Run once after deploying the detail table, active rows written before
+    ### it existed are replayed as stream inserts of their tables
+    load_dotenv()
+    sys.path.append("%s/src" % (os.path.dirname(os.path.dirname(__file__))))
+    from modding.aggregate import consume_streams
+    from modding.common import aws_cli, model, stream
+
+    active = {"data_state": ("eq", model.DataState.ACTIVE.value)}
+    for table_name, section in consume_streams.DETAIL_SECTIONS.items():
+        consume = consume_streams.COURSE_DETAILS.consumer(section)
+        table = aws_cli.AwsCustomClient.dynamo(table_name)
+        pending, count = [], 0
+        for item in table.scan_items(active, segments=int(segments)):
+            pending.append(
+                stream.StreamRecord(table_name, stream.StreamRecord.INSERT, None, item)
+            )
+            if len(pending) >= int(batch):
+                consume(pending)
+                count, pending = count + len(pending), []
+        if pending:
+            consume(pending)
+        print(f"Replayed {count + len(pending)} items of {table_name}")
+
+
+def benchmark_hydration(items: str = "1000", repeat: str = "5", **kwargs):
+    ### Compares validated and trusted hydration of a list endpoint page
+    sys.path.append("%s/src" % (os.path.dirname(os.path.dirname(__file__))))
+    import decimal
+    import timeit
+    from modding.common import model
+    from modding.problem import models
+
+    rows = [
+        {
+            "id": f"problem-{index}",
+            "username": "benchmark",
+            "creation_date": decimal.Decimal(1600000000 + index),
+            "data_state": model.DataState.ACTIVE.value,
+            "name": f"Problem {index}",
+            "minicourse_id": "minicourse-1",
+            "description": {"description": "Sum two numbers", "sample_input": "1 2"},
+            "test_case": [
+                {
+                    "id": f"case-{case}",
+                    "input_name": "in",
+                    "output_name": "out",
+                    "input_id": f"in-{case}",
+                    "output_id": f"out-{case}",
+                }
+                for case in range(3)
+            ],
+            "difficulty": decimal.Decimal(3),
+            "status": models.ProblemStatus.COMPLETED.value,
+        }
+        for index in range(int(items))
+    ]
+    candidates = {
+        "parse_obj + dict": lambda: [
+            models.Problem.parse_obj(row).dict() for row in rows
+        ],
+        "parse_trusted + dict": lambda: [
+            models.Problem.parse_trusted(row).dict() for row in rows
+        ],
+        "serialize_trusted": lambda: [
+            model.serialize_trusted(models.Problem, row) for row in rows
+        ],
+    }
+    for name, candidate in candidates.items():
+        best = min(timeit.repeat(candidate, number=1, repeat=int(repeat)))
+        print(f"{name}: {best * 1000:.1f} ms for {items} items")
+
+
 def clean(**kwargs):
     commands = ["black ."]
     for command in commands:
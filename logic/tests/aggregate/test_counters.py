@@ -0,0 +1,174 @@
+from unittest.mock import Mock, patch
+import pytest
+
+
+def build_record(table_name, event_name, old=None, new=None, event_id=None):
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+
+    def image(values):
+        return {key: serializer.serialize(values[key]) for key in values}
+
+    images = dict()
+    if old:
+        images["OldImage"] = image(old)
+    if new:
+        images["NewImage"] = image(new)
+    return {
+        "eventID": event_id,
+        "eventName": event_name,
+        "eventSourceARN": "arn:aws:dynamodb:us-east-1:1:table/%s/stream/2022"
+        % (table_name),
+        "dynamodb": images,
+    }
+
+
+class FakeAggregateTable:
+    ### Transactions are all or none, a marker already written cancels them
+    def __init__(self):
+        from modding.common import aws_cli
+
+        self.canceled = aws_cli.AwsCustomClient.DynamoDB.TransactionCanceled
+        self.items = dict()
+        self.transactions = []
+
+    def transact_write_items(self, operations):
+        self.transactions.append(operations)
+        for index, operation in enumerate(operations):
+            if "Put" in operation and operation["Put"]["Item"]["id"] in self.items:
+                raise self.canceled(index)
+        for operation in operations:
+            if "Put" in operation:
+                item = operation["Put"]["Item"]
+                self.items[item["id"]] = item
+                continue
+            update = operation["Update"]
+            item = self.items.setdefault(update["Key"]["id"], dict(update["Key"]))
+            names = update["ExpressionAttributeNames"]
+            values = update["ExpressionAttributeValues"]
+            for name, value in [
+                part.split(" ") for part in update["UpdateExpression"][4:].split(", ")
+            ]:
+                item[names[name]] = item.get(names[name], 0) + values[value]
+
+
+@pytest.mark.disable_aws_mock
+def test_stream_counters_are_coalesced_per_batch() -> None:
+    from modding.aggregate import counters as subject
+    from modding.common import stream
+
+    video = {"id": "video-1", "minicourse_id": "mc-1", "data_state": "ACTIVE"}
+    moved = {**video, "minicourse_id": "mc-2"}
+    deleted = {**moved, "data_state": "INACTIVE"}
+    other = {"id": "video-2", "minicourse_id": "mc-1", "data_state": "ACTIVE"}
+
+    table = FakeAggregateTable()
+    with patch(
+        "modding.common.aws_cli.AwsCustomClient.DynamoDB.transact_write_items",
+        side_effect=table.transact_write_items,
+    ):
+        aggregates = subject.AggregateCounters("aggregate_table", clock=lambda: 100)
+        consumer = stream.StreamConsumer()
+        consumer.register(
+            "video_table",
+            aggregates.consumer(
+                [subject.CounterRule("minicourse", "minicourse_id", "video_count")]
+            ),
+        )
+
+        consumed = consumer.consume(
+            {
+                "Records": [
+                    build_record("video_table", "INSERT", new=video, event_id="e-1"),
+                    build_record("video_table", "INSERT", new=other, event_id="e-2"),
+                    build_record(
+                        "video_table", "MODIFY", old=video, new=moved, event_id="e-3"
+                    ),
+                    build_record(
+                        "video_table", "MODIFY", old=moved, new=deleted, event_id="e-4"
+                    ),
+                    build_record("other_table", "INSERT", new=other, event_id="e-5"),
+                ]
+            }
+        )
+
+    assert consumed == 5
+    assert len(table.transactions) == 2
+    assert table.items["minicourse#mc-1"]["video_count"] == 1
+    ### Both moves of the batch cancel out, only their markers are written
+    assert "minicourse#mc-2" not in table.items
+    assert [operation["Put"]["Item"] for operation in table.transactions[1]] == [
+        {"id": "applied#e-3#minicourse#mc-2", "expires_at": 100 + 2 * 24 * 60 * 60},
+        {"id": "applied#e-4#minicourse#mc-2", "expires_at": 100 + 2 * 24 * 60 * 60},
+    ]
+
+
+@pytest.mark.disable_aws_mock
+def test_retried_stream_events_are_counted_once() -> None:
+    from modding.aggregate import counters as subject
+    from modding.common import stream
+
+    def record(event_id, problem_id):
+        new = {"problem_id": problem_id, "data_state": "ACTIVE", "veredict": "SENT"}
+        return stream.StreamRecord("evaluation_table", "INSERT", None, new, event_id)
+
+    table = FakeAggregateTable()
+    with patch(
+        "modding.common.aws_cli.AwsCustomClient.DynamoDB.transact_write_items",
+        side_effect=table.transact_write_items,
+    ):
+        consume = subject.AggregateCounters("aggregate_table").consumer(
+            [subject.CounterRule("problem", "problem_id", "submission_count")]
+        )
+        ### A bisected retry, then the whole batch again
+        consume([record("e-2", "p-1")])
+        consume([record("e-1", "p-1"), record("e-2", "p-1"), record("e-3", "p-2")])
+        consume([record("e-1", "p-1"), record("e-2", "p-1"), record("e-3", "p-2")])
+
+    assert table.items["problem#p-1"]["submission_count"] == 2
+    assert table.items["problem#p-2"]["submission_count"] == 1
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_item_no_filters")
+def test_aggregate_counters_are_read_at_once(get_item_no_filters: Mock) -> None:
+    from modding.aggregate import counters as subject
+
+    get_item_no_filters.return_value = {"id": "minicourse#mc-1", "video_count": 3}
+
+    result = subject.AggregateCounters("aggregate_table").get(
+        subject.MINICOURSE_KIND, "mc-1"
+    )
+
+    get_item_no_filters.assert_called_once_with(
+        {"id": "minicourse#mc-1"}, fields=["video_count", "problem_count"]
+    )
+    assert result == {"video_count": 3, "problem_count": 0}
+
+
+def test_counter_rule_predicates() -> None:
+    from modding.aggregate import counters as subject
+    from modding.common import stream
+
+    def is_solved(image):
+        return subject.is_active(image) and image.get("veredict") == "SOLVED"
+
+    rules = [
+        subject.CounterRule("problem", "problem_id", "submission_count"),
+        subject.CounterRule("problem", "problem_id", "solved_count", is_solved),
+    ]
+    sent = {"problem_id": "p-1", "data_state": "ACTIVE", "veredict": "SENT"}
+    solved = {**sent, "veredict": "SOLVED"}
+
+    changes = subject.deltas(
+        [
+            stream.StreamRecord("evaluation_table", "INSERT", None, sent, "e-1"),
+            stream.StreamRecord("evaluation_table", "MODIFY", sent, solved, "e-2"),
+        ],
+        rules,
+    )
+
+    assert changes == {
+        "problem#p-1": {"e-1": {"submission_count": 1}, "e-2": {"solved_count": 1}}
+    }
@@ -0,0 +1,108 @@
+from decimal import Decimal
+from unittest.mock import Mock, patch
+import pytest
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.batch_write_items")
+def test_detail_rows_are_coalesced_per_batch(batch_write_items: Mock) -> None:
+    from modding.aggregate import details as subject
+    from modding.common import stream
+
+    video = {
+        "id": "video-1",
+        "minicourse_id": "mc-1",
+        "data_state": "ACTIVE",
+        "name": "Intro",
+        "ext": "mp4",
+        "section": "CONTEXT",
+        "active_minicourse_id": "mc-1",
+    }
+    renamed = {**video, "name": "Introduction"}
+    moved = {**renamed, "minicourse_id": "mc-2"}
+    deleted = {**moved, "data_state": "INACTIVE"}
+
+    course_details = subject.CourseDetails("detail_table")
+    consume = course_details.consumer(subject.VIDEO_SECTION)
+    consume(
+        [
+            stream.StreamRecord("video_table", "INSERT", None, video),
+            stream.StreamRecord("video_table", "MODIFY", video, renamed),
+        ]
+    )
+
+    assert batch_write_items.call_count == 1
+    items, delete_keys = batch_write_items.call_args.args
+    assert [(item["id"], item["row"]) for item in items] == [("mc-1", "videos#video-1")]
+    assert items[0]["value"]["name"] == "Introduction"
+    assert "active_minicourse_id" not in items[0]["value"]
+    assert delete_keys == []
+
+    batch_write_items.reset_mock()
+    consume(
+        [
+            stream.StreamRecord("video_table", "MODIFY", renamed, moved),
+            stream.StreamRecord("video_table", "MODIFY", moved, deleted),
+        ]
+    )
+
+    assert batch_write_items.call_count == 1
+    items, delete_keys = batch_write_items.call_args.args
+    assert items == []
+    assert delete_keys == [
+        {"id": "mc-1", "row": "videos#video-1"},
+        {"id": "mc-2", "row": "videos#video-1"},
+    ]
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.query_items")
+def test_detail_rows_are_read_with_one_query(query_items: Mock) -> None:
+    from modding.aggregate import details as subject
+
+    def video(id, section, order):
+        return {
+            "id": id,
+            "minicourse_id": "mc-1",
+            "name": id,
+            "ext": "mp4",
+            "section": section,
+            "order": Decimal(order),
+        }
+
+    def rows(values):
+        return iter(
+            [{"id": "mc-1", "row": key, "value": values[key]} for key in values]
+        )
+
+    query_items.return_value = rows(
+        {
+            "minicourse": {
+                "id": "mc-1",
+                "category_id": "c-1",
+                "name": "Graphs",
+                "ext": "png",
+                "rate": Decimal(4),
+            },
+            "videos#v-3": video("v-3", "EXAMPLES", 1),
+            "videos#v-2": video("v-2", "CONTEXT", 2),
+            "videos#v-1": video("v-1", "CONTEXT", 1),
+            "problems#p-1": {
+                "id": "p-1",
+                "name": "Paths",
+                "minicourse_id": "mc-1",
+                "difficulty": Decimal(2),
+                "status": "COMPLETED",
+            },
+        }
+    )
+
+    detail = subject.CourseDetails("detail_table").get("mc-1")
+
+    query_items.assert_called_once_with({"id": "mc-1"}, {})
+    assert detail["minicourse"]["rate"] == 4
+    assert [video["id"] for video in detail["videos"]] == ["v-1", "v-2", "v-3"]
+    assert detail["problems"][0]["difficulty"] == 2
+
+    query_items.return_value = rows({"videos#v-1": video("v-1", "CONTEXT", 1)})
+    assert subject.CourseDetails("detail_table").get("mc-1") is None
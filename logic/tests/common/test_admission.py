@@ -0,0 +1,115 @@
+from decimal import Decimal
+from typing import Any, Dict
+from unittest.mock import patch
+import pytest
+
+
+def holds(condition: Any, item: Dict[str, Any]) -> bool:
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "OR":
+        return any(holds(value, item) for value in values)
+    name = values[0].name
+    if operator == "attribute_not_exists":
+        return name not in item
+    if operator == "attribute_exists":
+        return name in item
+    if name not in item:
+        return False
+    if operator == "<":
+        return item[name] < values[1]
+    if operator == "BETWEEN":
+        return values[1] <= item[name] <= values[2]
+    raise NotImplementedError(operator)
+
+
+class FakeTable:
+    ### Conditional updates are atomic, as on dynamodb
+    def __init__(self):
+        from modding.common import aws_cli
+
+        self.failed = aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed
+        self.items: Dict[str, Dict[str, Any]] = dict()
+        self.reads = 0
+
+    def get_item_no_filters(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        self.reads += 1
+        return self.items.get(values.get("id"))
+
+    def update_item(self, key, values, condition=None, adds=None) -> Dict[str, Any]:
+        item = dict(self.items.get(key.get("id")) or key)
+        if condition is not None and not holds(condition, item):
+            raise self.failed()
+        item.update(values)
+        for field, amount in (adds or {}).items():
+            item[field] = item.get(field, Decimal(0)) + amount
+        self.items[key.get("id")] = item
+        return item
+
+
+@pytest.mark.disable_aws_mock
+def test_admission_rejects_after_user_burst() -> None:
+    from modding.common import admission as subject
+
+    table = FakeTable()
+    now = [1000.0]
+
+    with patch("modding.common.aws_cli.AwsCustomClient.dynamo", return_value=table):
+        controller = subject.AdmissionController(
+            table_name="admission",
+            user_bucket=subject.TokenBucket(capacity=2, refill_per_second=0.5),
+            global_bucket=subject.TokenBucket(capacity=10, refill_per_second=1),
+            clock=lambda: now[0],
+        )
+
+    controller.admit("user1")
+    controller.admit("user1")
+
+    with pytest.raises(subject.RateLimited) as rate_limited:
+        controller.admit("user1")
+
+    assert rate_limited.value.retry_after == 2
+
+    reads = table.reads
+    with pytest.raises(subject.RateLimited):
+        controller.admit("user1")
+    assert table.reads == reads
+
+    controller.admit("user2")
+
+    now[0] += 2
+    controller.admit("user1")
+
+    with pytest.raises(subject.MissingUsername):
+        controller.admit(None)
+
+
+@pytest.mark.disable_aws_mock
+def test_admission_gives_back_user_token_when_global_rejects() -> None:
+    from modding.common import admission as subject
+
+    table = FakeTable()
+    now = [1000.0]
+
+    def build_controller():
+        return subject.AdmissionController(
+            table_name="admission",
+            user_bucket=subject.TokenBucket(capacity=2, refill_per_second=0.5),
+            global_bucket=subject.TokenBucket(capacity=1, refill_per_second=0.25),
+            clock=lambda: now[0],
+        )
+
+    with patch("modding.common.aws_cli.AwsCustomClient.dynamo", return_value=table):
+        controller, other_lambda = build_controller(), build_controller()
+
+    controller.admit("user2")
+
+    with pytest.raises(subject.RateLimited) as rate_limited:
+        other_lambda.admit("user1")
+
+    assert rate_limited.value.retry_after == 4
+    assert table.items["user#user1"]["arrival_at"] == Decimal("1000.0")
+
+    now[0] += 4
+    other_lambda.admit("user1")
+    assert table.items["user#user1"]["arrival_at"] == Decimal("1006.0")
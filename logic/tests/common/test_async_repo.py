@@ -0,0 +1,44 @@
+import pytest
+
+
+@pytest.mark.disable_aws_mock
+def test_async_repository_awaits_calls_together() -> None:
+    import asyncio
+    import time
+    from modding.common import async_repo as subject
+
+    class SlowRepository:
+        name = "slow"
+
+        def get_item_by_id(self, id: str) -> str:
+            time.sleep(0.1)
+            return id
+
+        def query_items(self, keys):
+            yield from keys
+
+    repository = subject.AsyncRepository(SlowRepository())
+
+    async def fan_out():
+        return await asyncio.gather(
+            *[repository.get_item_by_id(str(index)) for index in range(5)]
+        )
+
+    started = time.monotonic()
+    result = asyncio.run(fan_out())
+
+    assert result == ["0", "1", "2", "3", "4"]
+    assert time.monotonic() - started < 0.3
+    assert asyncio.run(repository.query_items({"a": 1})) == ["a"]
+    assert repository.name == "slow"
+
+
+@pytest.mark.disable_aws_mock
+def test_apigateway_prehandler_runs_async_handlers() -> None:
+    from modding.common import aws_cli as subject
+
+    @subject.AwsCustomClient.ApiGateway.pre_handler
+    async def mock(event, context):
+        return event.body
+
+    assert mock({"body": '{"action": "any"}', "headers": {}}, {}) == {"action": "any"}
@@ -62,3 +62,307 @@ def test_apigateway_prehandler_setting_username_on_repo() -> None:
     mock(mock_event, {})
 
     assert mock_repo._username == MOCK_USERNAME
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_query_items_follows_pages() -> None:
+    from unittest.mock import MagicMock, patch
+    from modding.common import aws_cli as subject
+
+    pages = [
+        {"Items": [{"id": "1"}, {"id": "2"}], "LastEvaluatedKey": {"id": "2"}},
+        {"Items": [], "LastEvaluatedKey": {"id": "3"}},
+        {"Items": [{"id": "4"}]},
+    ]
+    mock_table = MagicMock()
+    mock_table.query.side_effect = pages
+
+    with patch("boto3.resource") as resource:
+        resource.return_value.Table.return_value = mock_table
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        items = dynamo.query_items({"category_id": "cat-1"}, {})
+
+        assert mock_table.query.call_count == 0
+        assert [item.get("id") for item in items] == ["1", "2", "4"]
+        assert mock_table.query.call_args.kwargs.get("ExclusiveStartKey") == {"id": "3"}
+
+        mock_table.query.reset_mock()
+        mock_table.query.side_effect = pages
+
+        limited = list(dynamo.query_items({"category_id": "cat-1"}, {}, limit=2))
+
+        assert len(limited) == 2
+        assert mock_table.query.call_count == 1
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_query_items_range_and_order() -> None:
+    from unittest.mock import MagicMock, patch
+    from boto3.dynamodb.conditions import Key
+    from modding.common import aws_cli as subject
+
+    mock_table = MagicMock()
+    mock_table.query.return_value = {
+        "Items": [{"id": "3"}, {"id": "2"}],
+        "LastEvaluatedKey": {"id": "2"},
+    }
+
+    with patch("boto3.resource") as resource:
+        resource.return_value.Table.return_value = mock_table
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        items = list(
+            dynamo.query_items(
+                {"problem_id": "problem-1", "creation_date": ("between", (10, 20))},
+                {},
+                limit=2,
+                ascending=False,
+            )
+        )
+
+        params = mock_table.query.call_args.kwargs
+        assert [item.get("id") for item in items] == ["3", "2"]
+        assert mock_table.query.call_count == 1
+        assert params.get("Limit") == 2
+        assert params.get("ScanIndexForward") is False
+        assert params.get("KeyConditionExpression") == Key("problem_id").eq(
+            "problem-1"
+        ) & Key("creation_date").between(10, 20)
+
+        list(
+            dynamo.query_items(
+                {"problem_id": "problem-1", "creation_date": ("gt", 10)},
+                {"data_state": ("eq", "ACTIVE")},
+                limit=2,
+            )
+        )
+
+        params = mock_table.query.call_args.kwargs
+        assert "Limit" not in params
+        assert "ScanIndexForward" not in params
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_batch_get_items_retries_unprocessed() -> None:
+    from unittest.mock import MagicMock, patch
+    from modding.common import aws_cli as subject
+
+    keys = [{"id": str(index), "username": "user"} for index in range(150)]
+
+    def batch_get_item(RequestItems):
+        chunk = RequestItems["any"]["Keys"]
+        if len(chunk) == 100:
+            return {
+                "Responses": {"any": chunk[:60]},
+                "UnprocessedKeys": {"any": {"Keys": chunk[60:]}},
+            }
+        return {"Responses": {"any": chunk}}
+
+    with patch("boto3.resource") as resource, patch("time.sleep") as sleep:
+        resource.return_value.batch_get_item.side_effect = batch_get_item
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        items = dynamo.batch_get_items(keys)
+
+        assert sorted(item.get("id") for item in items) == sorted(
+            key.get("id") for key in keys
+        )
+        assert resource.return_value.batch_get_item.call_count == 3
+        assert sleep.call_count == 1
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_batch_put_items_in_chunks() -> None:
+    from unittest.mock import patch
+    from modding.common import aws_cli as subject
+
+    items = [{"id": str(index), "username": "user"} for index in range(60)]
+    written, first_call = [], {"done": False}
+
+    def batch_write_item(RequestItems):
+        requests = RequestItems["any"]
+        assert len(requests) <= 25
+        if not first_call["done"]:
+            first_call["done"] = True
+            written.extend(requests[1:])
+            return {"UnprocessedItems": {"any": requests[:1]}}
+        written.extend(requests)
+        return {"UnprocessedItems": {}}
+
+    with patch("boto3.resource") as resource, patch("time.sleep"):
+        client = resource.return_value.meta.client
+        client.batch_write_item.side_effect = batch_write_item
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        dynamo.batch_put_items(items)
+
+        assert sorted(
+            request["PutRequest"]["Item"]["id"] for request in written
+        ) == sorted(item["id"] for item in items)
+        assert client.batch_write_item.call_count == 4
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_query_page_with_projection() -> None:
+    from unittest.mock import MagicMock, patch
+    from modding.common import aws_cli as subject
+
+    mock_table = MagicMock()
+    mock_table.query.return_value = {"Items": [{"id": "1", "name": "first"}]}
+
+    with patch("boto3.resource") as resource:
+        resource.return_value.Table.return_value = mock_table
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        items, last_key = dynamo.query_page(
+            {"minicourse_id": "minicourse-1"}, {}, fields=["id", "name"]
+        )
+
+        params = mock_table.query.call_args.kwargs
+        assert params.get("ProjectionExpression") == "#p0, #p1"
+        assert params.get("ExpressionAttributeNames") == {"#p0": "id", "#p1": "name"}
+        assert items == [{"id": "1", "name": "first"}]
+        assert last_key is None
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_update_item_expression() -> None:
+    from unittest.mock import MagicMock, patch
+    from modding.common import aws_cli as subject
+
+    mock_table = MagicMock()
+    mock_table.update_item.return_value = {"Attributes": {"id": "1"}}
+
+    with patch("boto3.resource") as resource:
+        resource.return_value.Table.return_value = mock_table
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        dynamo.update_item(
+            {"id": "1", "username": "user"},
+            {"updated_date": 10},
+            increments={"test_case_count": (3, 1)},
+            appends={"test_case": [{"id": "case"}]},
+        )
+
+        params = mock_table.update_item.call_args.kwargs
+        assert params.get("UpdateExpression") == (
+            "SET #u0 = :u0, #u1 = if_not_exists(#u1, :u1s) + :u1, "
+            "#u2 = list_append(if_not_exists(#u2, :empty), :u2)"
+        )
+        assert params.get("ExpressionAttributeNames") == {
+            "#u0": "updated_date",
+            "#u1": "test_case_count",
+            "#u2": "test_case",
+        }
+        assert params.get("ExpressionAttributeValues") == {
+            ":u0": 10,
+            ":u1": 1,
+            ":u1s": 3,
+            ":u2": [{"id": "case"}],
+            ":empty": [],
+        }
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_parallel_scan_merges_segments() -> None:
+    from unittest.mock import patch
+    from modding.common import aws_cli as subject
+
+    def scan(**params):
+        segment = params["Segment"]
+        assert params["TotalSegments"] == 3
+        if "ExclusiveStartKey" not in params:
+            return {
+                "Items": [{"id": f"{segment}-0"}],
+                "LastEvaluatedKey": {"id": f"{segment}-0"},
+            }
+        return {"Items": [{"id": f"{segment}-1"}]}
+
+    with patch("boto3.resource") as resource:
+        resource.return_value.meta.client.scan.side_effect = scan
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        items = list(dynamo.scan_items({}, segments=3))
+        limited = list(dynamo.scan_items({}, limit=2, segments=3))
+
+        assert sorted(item["id"] for item in items) == [
+            f"{segment}-{page}" for segment in range(3) for page in range(2)
+        ]
+        assert len(limited) == 2
+
+
+@pytest.mark.disable_aws_mock
+def test_clients_are_created_lazily_and_shared() -> None:
+    from unittest.mock import patch
+    from modding.common import repo
+
+    with patch("boto3.resource") as resource, patch("boto3.client") as client:
+        first = repo.Repository("first", "first_table", "first_bucket")
+        second = repo.Repository("second", "second_table", "second_bucket")
+
+        assert resource.call_count == 0
+        assert client.call_count == 0
+
+        first.table.table
+        second.table.table
+
+        assert resource.call_count == 1
+        assert client.call_count == 0
+        assert first.table.resource is second.table.resource
+
+
+@pytest.mark.disable_aws_mock
+def test_dynamodb_transact_put_items_reports_failed_put() -> None:
+    from unittest.mock import patch
+    from botocore.exceptions import ClientError
+    from modding.common import aws_cli as subject
+
+    class TransactionCanceledException(ClientError):
+        pass
+
+    with patch("boto3.resource") as resource:
+        client = resource.return_value.meta.client
+        client.exceptions.TransactionCanceledException = TransactionCanceledException
+        client.transact_write_items.side_effect = TransactionCanceledException(
+            {
+                "Error": {"Code": "TransactionCanceledException"},
+                "CancellationReasons": [
+                    {"Code": "None"},
+                    {"Code": "ConditionalCheckFailed"},
+                ],
+            },
+            "TransactWriteItems",
+        )
+        dynamo = subject.AwsCustomClient.DynamoDB("any")
+
+        with pytest.raises(subject.AwsCustomClient.DynamoDB.TransactionCanceled) as e:
+            dynamo.transact_put_items([{"Item": {"id": "1"}}, {"Item": {"id": "2"}}])
+
+    assert e.value.index == 1
+    assert client.transact_write_items.call_args.kwargs["TransactItems"] == [
+        {"Put": {"TableName": "any", "Item": {"id": "1"}}},
+        {"Put": {"TableName": "any", "Item": {"id": "2"}}},
+    ]
+
+
+@pytest.mark.disable_aws_mock
+def test_resources_are_not_shared_between_threads() -> None:
+    from concurrent import futures
+    from unittest.mock import patch
+    from modding.common import aws_cli as subject
+
+    dynamo = subject.AwsCustomClient.DynamoDB("any")
+    with patch("boto3.resource", side_effect=lambda service: object()), patch(
+        "boto3.client", side_effect=lambda service: object()
+    ):
+        resource = dynamo.resource
+        client = subject.AwsCustomClient.Clients.client("s3")
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            other_resource, other_client = executor.submit(
+                lambda: (dynamo.resource, subject.AwsCustomClient.Clients.client("s3"))
+            ).result()
+
+        assert dynamo.resource is resource
+        assert other_resource is not resource
+        assert other_client is client
@@ -0,0 +1,73 @@
+from unittest.mock import Mock, patch
+import pytest
+
+
+def test_ttl_cache_expires_and_evicts() -> None:
+    from modding.common import cache as subject
+
+    now = {"value": 0.0}
+    ttl_cache = subject.TTLCache(
+        max_entries=2, ttl_seconds=10, clock=lambda: now["value"]
+    )
+
+    ttl_cache.put("a", 1)
+    ttl_cache.put("b", 2)
+    assert ttl_cache.get("a") == 1
+
+    ttl_cache.put("c", 3)
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("c") == 3
+
+    now["value"] = 11
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.stats() == {"entries": 1, "hits": 2, "misses": 2, "evictions": 1}
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.query_items")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_item")
+def test_repository_cache_returns_copies_until_expired(
+    get_item: Mock, query_items: Mock
+) -> None:
+    from modding.common import cache, repo, model
+
+    now = {"value": 0.0}
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(repo.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity",
+                table_name="entity_table",
+                bucket_name="entity_bucket",
+                items_cache=cache.TTLCache(ttl_seconds=10, clock=lambda: now["value"]),
+            )
+            self.set_model(CustomEntity)
+
+    MOCK_ENTITY_ID = "prefix-123"
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    get_item.return_value = CustomEntity(
+        id=MOCK_ENTITY_ID, name="entity", username="owner"
+    ).dict()
+
+    first = mock_custom_entity_repo.get_item_by_id(MOCK_ENTITY_ID)
+    first.name = "changed by the caller"
+    second = mock_custom_entity_repo.get_item_by_id(MOCK_ENTITY_ID)
+
+    assert second.name == "entity"
+    assert get_item.call_count == 1
+
+    now["value"] = 11
+    mock_custom_entity_repo.get_item_by_id(MOCK_ENTITY_ID)
+
+    assert get_item.call_count == 2
+    assert mock_custom_entity_repo.cache_stats().get("hits") == 1
+
+    ### Unbounded queries are not cached, their items stay lazy
+    query_items.return_value = iter([])
+    items = mock_custom_entity_repo.query_items({"name": "entity"})
+    assert not isinstance(items, list)
+    assert len(mock_custom_entity_repo.items_cache) == 1
@@ -0,0 +1,61 @@
+import pytest
+
+
+def test_parse_partial_only_sets_present_fields() -> None:
+    from modding.common import model as subject
+
+    class CustomEntity(subject.Model):
+        name: str
+        difficulty: int
+
+    entity = CustomEntity.parse_partial({"id": "prefix-1", "difficulty": "3"})
+
+    assert entity.difficulty == 3
+    assert entity.dict(exclude_unset=True) == {"id": "prefix-1", "difficulty": 3}
+
+
+def test_parse_partial_validates_present_fields() -> None:
+    import pydantic
+    from modding.common import model as subject
+
+    class CustomEntity(subject.Model):
+        difficulty: int
+
+    with pytest.raises(pydantic.ValidationError):
+        CustomEntity.parse_partial({"id": "prefix-1", "difficulty": "hard"})
+
+
+def test_trusted_hydration_matches_validated_models() -> None:
+    import decimal
+    from modding.problem import models
+    from modding.common import model as subject
+
+    row = {
+        "id": "problem-1",
+        "creation_date": decimal.Decimal(1600000000),
+        "data_state": "ACTIVE",
+        "name": "Problem",
+        "minicourse_id": "minicourse-1",
+        "test_case": [
+            {
+                "id": "case-1",
+                "input_name": "in",
+                "output_name": "out",
+                "input_id": "in-1",
+                "output_id": "out-1",
+            }
+        ],
+        "difficulty": decimal.Decimal(3),
+        "status": "COMPLETED",
+        "active_minicourse_id": "minicourse-1",
+    }
+
+    trusted = models.Problem.parse_trusted(row)
+
+    assert trusted.dict() == models.Problem.parse_obj(row).dict()
+    assert isinstance(trusted.difficulty, int)
+    assert isinstance(trusted.test_case[0], models.ProblemInputFile)
+    assert subject.serialize_trusted(models.Problem, row) == trusted.dict()
+    assert subject.serialize_trusted(
+        models.Problem, {"id": "problem-1", "difficulty": decimal.Decimal(3)}, True
+    ) == {"id": "problem-1", "difficulty": 3}
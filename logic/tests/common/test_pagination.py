@@ -0,0 +1,43 @@
+import decimal
+import pytest
+from modding.common import pagination as subject
+
+
+def test_cursor_round_trip() -> None:
+    last_key = {
+        "id": "video-1",
+        "minicourse_id": "minicourse-1",
+        "order": decimal.Decimal("3"),
+    }
+
+    cursor = subject.encode_cursor(last_key)
+
+    assert subject.decode_cursor(cursor) == last_key
+    assert subject.encode_cursor(None) is None
+    assert subject.decode_cursor(None) is None
+
+
+def test_invalid_cursor() -> None:
+    with pytest.raises(subject.InvalidCursor):
+        subject.decode_cursor("not a cursor")
+
+
+def test_clean_limit() -> None:
+    assert subject.clean_limit(None) == subject.DEFAULT_LIMIT
+    assert subject.clean_limit(0) == 1
+    assert subject.clean_limit(10_000) == subject.MAX_LIMIT
+
+
+def test_cursor_key_names() -> None:
+    cursor = subject.encode_cursor({"id": "video-1", "minicourse_id": "m-1"})
+
+    assert subject.decode_cursor(cursor, ["id", "minicourse_id"])
+    with pytest.raises(subject.InvalidCursor):
+        subject.decode_cursor(cursor, ["id", "username"])
+    with pytest.raises(subject.InvalidCursor):
+        subject.decode_cursor(subject.encode_cursor({"id": ["video-1"]}), ["id"])
+
+
+def test_invalid_limit() -> None:
+    with pytest.raises(subject.InvalidLimit):
+        subject.clean_limit("ten")
@@ -52,3 +52,490 @@ def test_get_item_by_id_not_found(get_item: Mock) -> None:
 
     with pytest.raises(subject.Repository._NotFoundEntityException):
         item_retrieved = mock_custom_entity_repo.get_item_by_id(MOCK_ENTITY_ID)
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_item")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_item_no_filters")
+def test_get_item_by_id_with_username(
+    get_item_no_filters: Mock, get_item: Mock
+) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    MOCK_ENTITY_ID = "prefix-123"
+    MOCK_USERNAME = "owner"
+
+    mock_entity = CustomEntity(id=MOCK_ENTITY_ID, name="entity", username=MOCK_USERNAME)
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    get_item_no_filters.return_value = mock_entity.dict()
+
+    item_retrieved = mock_custom_entity_repo.get_item_by_id(
+        MOCK_ENTITY_ID, username=MOCK_USERNAME
+    )
+
+    assert item_retrieved == mock_entity
+    get_item_no_filters.assert_called_once_with(
+        {"id": MOCK_ENTITY_ID, "username": MOCK_USERNAME}, fields=None
+    )
+    get_item.assert_not_called()
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_item")
+def test_get_item_by_id_inactive(get_item: Mock) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    MOCK_ENTITY_ID = "prefix-123"
+
+    mock_entity = CustomEntity(
+        id=MOCK_ENTITY_ID, name="entity", data_state=model.DataState.INACTIVE
+    )
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    get_item.return_value = mock_entity.dict()
+
+    with pytest.raises(subject.Repository._NotFoundEntityException):
+        mock_custom_entity_repo.get_item_by_id(MOCK_ENTITY_ID)
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.batch_get_items")
+def test_get_items_by_ids_keeps_order(batch_get_items: Mock) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    MOCK_IDS = ["prefix-1", "prefix-2", "prefix-3"]
+    MOCK_USERNAMES = ["owner", "owner", "other"]
+
+    mock_entities = [
+        CustomEntity(id=id, name="entity", username=username)
+        for id, username in zip(MOCK_IDS, MOCK_USERNAMES)
+    ]
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    batch_get_items.return_value = [entity.dict() for entity in reversed(mock_entities)]
+
+    items_retrieved = mock_custom_entity_repo.get_items_by_ids(
+        MOCK_IDS, usernames=MOCK_USERNAMES
+    )
+
+    assert items_retrieved == mock_entities
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.transact_put_items")
+def test_save_many_fills_creation_data(transact_put_items: Mock) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    MOCK_USERNAME = "owner"
+
+    mock_entities = [
+        CustomEntity(id=f"prefix{index}", name=str(index)) for index in range(3)
+    ]
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    mock_custom_entity_repo.set_username(MOCK_USERNAME)
+    mock_custom_entity_repo.save_many(mock_entities)
+
+    puts = transact_put_items.call_args.args[0]
+    assert [put["Item"].get("name") for put in puts] == ["0", "1", "2"]
+    for index, (entity, put) in enumerate(zip(mock_entities, puts)):
+        assert entity.id == f"prefix{index}-{entity.creation_date}"
+        assert put["Item"].get("id") == entity.id
+        assert put["Item"].get("username") == MOCK_USERNAME
+        assert put["ConditionExpression"] == "attribute_not_exists(#id)"
+
+    transact_put_items.reset_mock()
+    with pytest.raises(subject.Repository.NotSavingIdAlreadyExistsOnTableException):
+        mock_custom_entity_repo.save_many(
+            [CustomEntity(id="prefix", name=str(index)) for index in range(2)]
+        )
+    transact_put_items.assert_not_called()
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.update_items")
+def test_save_many_updates_active_items(update_items: Mock) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    mock_entities = [
+        CustomEntity(id=f"id-{index}", name=str(index), username="owner")
+        for index in range(2)
+    ]
+
+    update_items.return_value = [True, False]
+    with pytest.raises(subject.Repository.UpdatingNotExistentEntity):
+        CustomEntityRepo().save_many(mock_entities, update=True)
+
+    updates = update_items.call_args.args[0]
+    assert [update["key"] for update in updates] == [
+        {"id": "id-0", "username": "owner"},
+        {"id": "id-1", "username": "owner"},
+    ]
+    for entity, update in zip(mock_entities, updates):
+        assert update["values"].get("name") == entity.name
+        assert update["values"].get("updated_date") == entity.updated_date
+        assert update["condition"] is not None
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.update_item")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_item")
+def test_update_fields_is_conditional(get_item: Mock, update_item: Mock) -> None:
+    from modding.common import repo as subject, model, aws_cli
+
+    class CustomEntity(model.Model):
+        name: str
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    MOCK_ENTITY_ID = "prefix-123"
+    MOCK_USERNAME = "owner"
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    get_item.return_value = {"id": MOCK_ENTITY_ID, "username": MOCK_USERNAME}
+    update_item.return_value = CustomEntity(
+        id=MOCK_ENTITY_ID, name="new", username=MOCK_USERNAME
+    ).dict()
+
+    updated = mock_custom_entity_repo.update_fields(
+        MOCK_ENTITY_ID, {"name": "new", "username": "intruder"}
+    )
+
+    key, changes = update_item.call_args.args
+    assert updated.name == "new"
+    assert key == {"id": MOCK_ENTITY_ID, "username": MOCK_USERNAME}
+    assert changes.get("name") == "new"
+    assert "username" not in changes
+    assert "updated_date" in changes
+    assert update_item.call_args.kwargs.get("condition") is not None
+
+    ### With the owner of the caller the key is not read
+    get_item.reset_mock()
+    mock_custom_entity_repo.update_fields(
+        MOCK_ENTITY_ID, {"name": "new"}, username=MOCK_USERNAME
+    )
+    get_item.assert_not_called()
+    assert update_item.call_args.args[0] == {
+        "id": MOCK_ENTITY_ID,
+        "username": MOCK_USERNAME,
+    }
+
+    update_item.side_effect = aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed()
+
+    with pytest.raises(subject.Repository.DeletingNotExistentEntity):
+        mock_custom_entity_repo.delete_data(MOCK_ENTITY_ID, username=MOCK_USERNAME)
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.put_item")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.query_items")
+def test_active_indexes(query_items: Mock, put_item: Mock) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+        category_id: str
+
+    class CustomEntityRepo(subject.Repository):
+        ACTIVE_INDEX_KEYS = ["category_id"]
+
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    mock_custom_entity_repo.save_on_table(
+        CustomEntity(id="prefix", name="entity", category_id="category-1")
+    )
+
+    assert put_item.call_args.args[0].get("active_category_id") == "category-1"
+
+    query_items.return_value = iter([])
+    list(
+        mock_custom_entity_repo.query_items(
+            {"category_id": "category-1"},
+            index_name="active_category_id_creation_date_index",
+        )
+    )
+    keys, filters = query_items.call_args.args
+    assert keys == {"active_category_id": "category-1"}
+    assert "data_state" not in filters
+
+    list(
+        mock_custom_entity_repo.query_items(
+            {"category_id": "category-1"}, index_name="category_id_creation_date_index"
+        )
+    )
+    keys, filters = query_items.call_args.args
+    assert keys == {"category_id": "category-1"}
+    assert "data_state" in filters
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.query_items")
+def test_composite_index_fallback(query_items: Mock) -> None:
+    from modding.common import repo as subject
+
+    class CustomEntityRepo(subject.Repository):
+        COMPOSITE_KEYS = {"parent_id_username": ["parent_id", "username"]}
+        ACTIVE_INDEX_KEYS = ["parent_id_username"]
+
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    mock_custom_entity_repo.set_username("user")
+    query_items.return_value = iter([])
+
+    list(
+        mock_custom_entity_repo.query_items_by_username(
+            {"parent_id": "parent-1"},
+            index_name="active_parent_id_username_creation_date_index",
+        )
+    )
+    keys, filters = query_items.call_args.args
+    assert keys == {"active_parent_id_username": "parent-1#user"}
+    assert filters == {}
+
+    ### Before the backfill the plain parent index is read with filters
+    list(
+        mock_custom_entity_repo.query_items_by_username(
+            {"parent_id": "parent-1"}, index_name="parent_id_creation_date_index"
+        )
+    )
+    keys, filters = query_items.call_args.args
+    assert keys == {"parent_id": "parent-1"}
+    assert set(filters) == {"data_state", "username"}
+
+    ### Without an owner the query is not sent
+    query_items.reset_mock()
+    mock_custom_entity_repo.set_username(None)
+    assert not list(
+        mock_custom_entity_repo.query_items_by_username(
+            {"parent_id": "parent-1"},
+            index_name="active_parent_id_username_creation_date_index",
+        )
+    )
+    assert mock_custom_entity_repo.query_page(
+        {"parent_id": "parent-1"},
+        index_name="active_parent_id_username_creation_date_index",
+        by_username=True,
+    ) == ([], None)
+    query_items.assert_not_called()
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.update_items")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.get_items")
+def test_delete_many_deactivates_each_item(get_items: Mock, update_items: Mock) -> None:
+    from modding.common import repo as subject, model
+
+    class CustomEntity(model.Model):
+        name: str
+        category_id: str
+
+    class CustomEntityRepo(subject.Repository):
+        ACTIVE_INDEX_KEYS = ["category_id"]
+
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    mock_custom_entity_repo = CustomEntityRepo()
+    update_items.return_value = [True, True]
+
+    mock_custom_entity_repo.delete_many(["prefix-1", "prefix-2"], ["owner", "owner"])
+
+    get_items.assert_not_called()
+    updates = update_items.call_args.args[0]
+    assert [update["key"] for update in updates] == [
+        {"id": "prefix-1", "username": "owner"},
+        {"id": "prefix-2", "username": "owner"},
+    ]
+    for update in updates:
+        assert update["values"]["data_state"] == "INACTIVE"
+        assert update["removes"] == ["active_category_id"]
+        assert update["condition"].get_expression()["values"][1] == "ACTIVE"
+
+    get_items.return_value = [{"id": "prefix-1", "username": "owner"}, None]
+    with pytest.raises(subject.Repository.DeletingNotExistentEntity):
+        mock_custom_entity_repo.delete_many(["prefix-1", "prefix-2"])
+
+    get_items.return_value = [{"id": "prefix-1", "username": "owner"}]
+    update_items.return_value = [False]
+    with pytest.raises(subject.Repository.DeletingNotExistentEntity):
+        mock_custom_entity_repo.delete_many(["prefix-1"])
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.update_item")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.scan_items")
+def test_backfill_only_sets_missing_attributes(
+    scan_items: Mock, update_item: Mock
+) -> None:
+    from modding.common import repo as subject, model, aws_cli
+
+    class CustomEntity(model.Model):
+        name: str
+        category_id: str
+
+    class CustomEntityRepo(subject.Repository):
+        ACTIVE_INDEX_KEYS = ["category_id"]
+
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+            self.set_model(CustomEntity)
+
+    def item(id, **values):
+        return {
+            "id": id,
+            "username": "owner",
+            "name": "entity",
+            "category_id": "category-1",
+            "data_state": "ACTIVE",
+            **values,
+        }
+
+    scan_items.return_value = iter(
+        [
+            item("prefix-1"),
+            item("prefix-2", active_category_id="category-1"),
+            item("prefix-3", active_category_id="category-0"),
+            item("prefix-4"),
+        ]
+    )
+    update_item.side_effect = [
+        dict(),
+        dict(),
+        aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed(),
+    ]
+
+    count = CustomEntityRepo().backfill_active_indexes()
+
+    assert count == 2
+    assert [call.args for call in update_item.call_args_list] == [
+        (
+            {"id": "prefix-1", "username": "owner"},
+            {"active_category_id": "category-1"},
+        ),
+        (
+            {"id": "prefix-3", "username": "owner"},
+            {"active_category_id": "category-1"},
+        ),
+        (
+            {"id": "prefix-4", "username": "owner"},
+            {"active_category_id": "category-1"},
+        ),
+    ]
+    conditions = [
+        call.kwargs["condition"].get_expression()["values"][1].get_expression()
+        for call in update_item.call_args_list
+    ]
+    assert conditions[0]["operator"] == "attribute_not_exists"
+    assert conditions[1]["operator"] == "="
+    assert conditions[1]["values"][1] == "category-0"
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.key_names")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.query_page")
+def test_query_page_checks_cursor(query_page: Mock, key_names: Mock) -> None:
+    from modding.common import repo as subject, pagination
+
+    class CustomEntityRepo(subject.Repository):
+        def __init__(self):
+            super().__init__(
+                name="entity", table_name="entity_table", bucket_name="entity_bucket"
+            )
+
+    key_names.return_value = ["id", "username", "parent_id", "creation_date"]
+    query_page.return_value = ([], None)
+    start_key = {
+        "id": "id-1",
+        "username": "owner",
+        "parent_id": "parent-1",
+        "creation_date": 1,
+    }
+
+    CustomEntityRepo().query_page(
+        {"parent_id": "parent-1"},
+        index_name="parent_id_creation_date_index",
+        cursor=pagination.encode_cursor(start_key),
+    )
+    assert query_page.call_args.kwargs.get("start_key") == start_key
+
+    ### Cursors of another partition or with other attributes are rejected
+    for cursor in [
+        {**start_key, "parent_id": "parent-2"},
+        {**start_key, "name": "entity"},
+    ]:
+        with pytest.raises(pagination.InvalidCursor):
+            CustomEntityRepo().query_page(
+                {"parent_id": "parent-1"},
+                index_name="parent_id_creation_date_index",
+                cursor=pagination.encode_cursor(cursor),
+            )
@@ -24,4 +24,7 @@ def mock_aws_client(request, modding_module):
         with patch.object(modding.common.aws_cli, "AwsCustomClient") as _fixture:
             yield _fixture
     else:
+        ### Shared clients created by other tests could be mocks
+        modding.common.aws_cli.AwsCustomClient.Clients.clear()
         yield
+        modding.common.aws_cli.AwsCustomClient.Clients.clear()
@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import Mock, patch
+
+
+@pytest.mark.disable_aws_mock
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.put_item")
+@patch("modding.common.aws_cli.AwsCustomClient.DynamoDB.query_page")
+def test_evaluations_by_username_use_composite_key(
+    query_page: Mock, put_item: Mock
+) -> None:
+    from modding.problem import models
+    from modding.problem.evaluation import repository
+
+    evaluation_repository = repository.ProblemEvaluationRepository(
+        table_name="evaluation_table"
+    )
+    evaluation_repository.set_username("user-1")
+    evaluation_repository.save_on_table(
+        models.ProblemEvaluation(
+            id="evaluation", problem_id="problem-1", veredict="SOLVED"
+        )
+    )
+
+    item = put_item.call_args.args[0]
+    assert item.get("problem_id_username") == "problem-1#user-1"
+    assert item.get("active_problem_id_username") == "problem-1#user-1"
+
+    query_page.return_value = ([], None)
+    evaluation_repository.query_page(
+        {"problem_id": "problem-1"},
+        index_name="active_problem_id_username_creation_date_index",
+        by_username=True,
+    )
+
+    keys, filters = query_page.call_args.args
+    assert keys == {"active_problem_id_username": "problem-1#user-1"}
+    assert filters == {}
@@ -0,0 +1,138 @@
+from typing import Any, Dict
+from unittest.mock import patch
+import pytest
+
+
+class FakeQueueTable:
+    def __init__(self, jobs: Dict[str, Dict[str, Any]]):
+        self.jobs = jobs
+        self.read = 0
+
+    def query_items(self, keys, filters, index_name=None, limit=None) -> Any:
+        assert index_name == "state_due_at_index"
+        jobs = sorted(
+            [job for job in self.jobs.values() if job.get("state") == keys["state"]],
+            key=lambda job: job.get("due_at"),
+        )[:limit]
+        self.read += len(jobs)
+        return iter(jobs)
+
+    def put_item(self, item: Dict[str, Any], condition: Any = None) -> None:
+        self.jobs[item.get("id")] = item
+
+    def update_item(self, key, values, condition=None) -> Dict[str, Any]:
+        from modding.common import aws_cli
+
+        job = self.jobs.get(key.get("id"))
+        if not job or job.get("state") != condition.get_expression()["values"][1]:
+            raise aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed()
+        job.update(values)
+        return job
+
+    def delete_item(self, key: Dict[str, Any]) -> None:
+        self.jobs.pop(key.get("id"), None)
+
+
+def build_scheduler(subject: Any, table: FakeQueueTable, now: float) -> Any:
+    with patch("modding.common.aws_cli.AwsCustomClient.dynamo", return_value=table):
+        return subject.EvaluationScheduler(
+            table_name="queue",
+            state_index_name="state_due_at_index",
+            slots=1,
+            aging_seconds=10,
+            max_wait_seconds=5,
+            stale_seconds=60,
+            clock=lambda: now,
+            sleep=lambda seconds: None,
+        )
+
+
+@pytest.mark.disable_aws_mock
+def test_scheduler_serves_exams_before_practice() -> None:
+    from modding.problem.evaluation import scheduler as subject
+
+    table = FakeQueueTable(
+        {
+            "practice": {
+                "id": "practice",
+                "priority": "PRACTICE",
+                "state": "WAITING",
+                "enqueued_at": 95,
+                "due_at": 115,
+            }
+        }
+    )
+    scheduler = build_scheduler(subject, table, now=100)
+
+    scheduler.acquire("exam", "EXAM")
+
+    assert table.jobs["exam"].get("state") == "RUNNING"
+    assert table.jobs["practice"].get("state") == "WAITING"
+    assert scheduler.metrics(list(table.jobs.values()), 100).get("PRACTICE") == {
+        "depth": 1,
+        "running": 0,
+        "max_wait": 5,
+    }
+
+
+@pytest.mark.disable_aws_mock
+def test_scheduler_ages_waiting_jobs() -> None:
+    from modding.problem.evaluation import scheduler as subject
+
+    scheduler = build_scheduler(subject, FakeQueueTable({}), now=100)
+
+    assert scheduler.due_at("PRACTICE", 70) < scheduler.due_at("EXAM", 99)
+    assert scheduler.due_at("ASSIGNMENT", 95) < scheduler.due_at("PRACTICE", 95)
+
+
+@pytest.mark.disable_aws_mock
+def test_scheduler_times_out_when_slots_are_busy() -> None:
+    from modding.problem.evaluation import scheduler as subject
+
+    table = FakeQueueTable(
+        {
+            "other": {
+                "id": "other",
+                "priority": "EXAM",
+                "state": "RUNNING",
+                "enqueued_at": 99,
+                "due_at": 99,
+            }
+        }
+    )
+    scheduler = build_scheduler(subject, table, now=100)
+    scheduler.clock = iter([100, 100, 106]).__next__
+
+    with pytest.raises(subject.SchedulingTimeout):
+        scheduler.acquire("practice", "PRACTICE")
+
+    assert "practice" not in table.jobs
+
+
+@pytest.mark.disable_aws_mock
+def test_scheduler_polls_only_the_head_of_the_queue() -> None:
+    from modding.problem.evaluation import scheduler as subject
+
+    def waiting(id, enqueued_at):
+        return {
+            "id": id,
+            "priority": "EXAM",
+            "state": "WAITING",
+            "enqueued_at": enqueued_at,
+            "due_at": enqueued_at,
+        }
+
+    table = FakeQueueTable(
+        {f"job-{index}": waiting(f"job-{index}", 99) for index in range(50)}
+    )
+    table.jobs["dead"] = {**waiting("dead", 10), "state": "RUNNING"}
+    scheduler = build_scheduler(subject, table, now=100)
+    scheduler.clock = iter([100, 100, 106]).__next__
+
+    with pytest.raises(subject.SchedulingTimeout):
+        scheduler.acquire("late", "PRACTICE")
+
+    ### The stale running job is read once and removed, then one waiting job
+    ### is read per poll out of the fifty
+    assert table.read == 3
+    assert "dead" not in table.jobs
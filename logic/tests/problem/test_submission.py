@@ -0,0 +1,91 @@
+import io
+import zipfile
+from unittest.mock import Mock
+import pytest
+
+
+def test_resolve_contents_skips_already_stored_files() -> None:
+    from modding.problem.evaluation import submission as subject
+
+    MAIN_CONTENT = "import helper\n"
+    HELPER_CONTENT = "VALUE = 1\n"
+
+    mock_repository = Mock()
+    mock_repository.get_submission_content.return_value = HELPER_CONTENT
+    previous_manifest = {"helper.py": subject.digest(HELPER_CONTENT)}
+
+    files = subject.build_files(
+        "code.py",
+        files=[
+            {"path": "main.py", "content": MAIN_CONTENT},
+            {"path": "helper.py", "hash": subject.digest(HELPER_CONTENT)},
+        ],
+    )
+
+    contents, manifest = subject.resolve_contents(
+        files, previous_manifest, mock_repository
+    )
+
+    assert contents == {"main.py": MAIN_CONTENT, "helper.py": HELPER_CONTENT}
+    assert manifest.get("helper.py") == previous_manifest.get("helper.py")
+    mock_repository.put_submission_content.assert_called_once_with(
+        subject.digest(MAIN_CONTENT), MAIN_CONTENT
+    )
+
+
+def test_resolve_contents_without_content_not_sent_before() -> None:
+    from modding.problem.evaluation import submission as subject
+
+    files = subject.build_files("code.py", files=[{"path": "main.py", "hash": "123"}])
+
+    with pytest.raises(subject.MissingSubmissionContent):
+        subject.resolve_contents(files, {}, Mock())
+
+
+def test_pack_archive_rejects_paths_outside_submission() -> None:
+    from modding.problem.evaluation import submission as subject
+
+    with pytest.raises(subject.InvalidSubmissionPath):
+        subject.clean_path("../../etc/passwd")
+
+    archive = subject.pack_archive({"main.py": "print(1)\n"})
+    with zipfile.ZipFile(io.BytesIO(archive)) as zipped:
+        assert zipped.read("main.py") == b"print(1)\n"
+
+
+def build_archive(files) -> str:
+    import base64
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zipped:
+        for path in files:
+            zipped.writestr(path, files[path])
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def test_unpack_archive_checks_limits_before_decompressing() -> None:
+    from modding.problem.evaluation import submission as subject
+
+    bomb = build_archive({"bomb.txt": b"0" * (subject.MAX_SUBMISSION_BYTES + 1)})
+    with pytest.raises(subject.SubmissionTooLarge):
+        subject.unpack_archive(bomb)
+
+    many = build_archive(
+        {f"{index}.py": b"" for index in range(subject.MAX_SUBMISSION_FILES + 1)}
+    )
+    with pytest.raises(subject.TooManySubmissionFiles):
+        subject.unpack_archive(many)
+
+    files = subject.unpack_archive(build_archive({"main.py": b"print(1)\n"}))
+    assert [(file.path, file.content) for file in files] == [("main.py", "print(1)\n")]
+
+
+def test_unpack_archive_rejects_binary_and_broken_archives() -> None:
+    import base64
+    from modding.problem.evaluation import submission as subject
+
+    with pytest.raises(subject.InvalidSubmissionEncoding):
+        subject.unpack_archive(build_archive({"main.pyc": b"\xff\xfe\x00"}))
+
+    with pytest.raises(subject.InvalidSubmissionArchive):
+        subject.unpack_archive(base64.b64encode(b"not a zip").decode("utf-8"))
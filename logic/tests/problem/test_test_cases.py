@@ -0,0 +1,190 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+import pytest
+
+
+class NullArithmetic(Exception):
+    pass
+
+
+class FakeProblemTable:
+    ### Keeps one item and evaluates the conditions it is sent, adding to a
+    ### NULL fails as the ValidationException of DynamoDB does
+    TYPES = {"N": (int, Decimal), "NULL": (type(None),)}
+
+    def __init__(self, item: Optional[Dict[str, Any]] = None):
+        self.item = item
+        self.updates = 0
+
+    def check(self, condition: Any) -> bool:
+        if condition is None:
+            return True
+        expression = condition.get_expression()
+        operator, values = expression["operator"], expression["values"]
+        if operator == "AND":
+            return all(self.check(value) for value in values)
+        item = self.item or {}
+        name = values[0].name
+        if operator == "attribute_exists":
+            return name in item
+        if operator == "attribute_not_exists":
+            return name not in item
+        if operator == "attribute_type":
+            return name in item and isinstance(item[name], self.TYPES[values[1]])
+        if operator == "=":
+            return item.get(name) == values[1]
+        raise NotImplementedError(operator)
+
+    def put_item(self, item: Dict[str, Any], condition: Any = None) -> None:
+        from modding.common import aws_cli
+
+        if not self.check(condition):
+            raise aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed()
+        self.item = dict(item)
+
+    def get_item(self, keys: Dict[str, Any], fields: List[str] = None) -> Any:
+        return self.item
+
+    def get_item_no_filters(self, keys: Dict[str, Any], fields: List[str] = None):
+        return self.item
+
+    def update_item(
+        self,
+        key: Dict[str, Any],
+        values: Dict[str, Any],
+        condition: Any = None,
+        increments: Dict[str, Any] = None,
+        appends: Dict[str, Any] = None,
+        removes: List[str] = None,
+    ) -> Dict[str, Any]:
+        from modding.common import aws_cli
+
+        if not self.check(condition):
+            raise aws_cli.AwsCustomClient.DynamoDB.ConditionalCheckFailed()
+        self.updates += 1
+        for field in increments or {}:
+            start, amount = increments[field]
+            current = self.item[field] if field in self.item else start
+            if current is None:
+                raise NullArithmetic(field)
+            self.item[field] = current + amount
+        for field in appends or {}:
+            self.item[field] = [*self.item.get(field, []), *appends[field]]
+        for field in removes or []:
+            self.item.pop(field, None)
+        self.item.update(values)
+        return dict(self.item)
+
+
+def build_problem(test_cases: int) -> Dict[str, Any]:
+    return {
+        "id": "problem-1",
+        "username": "teacher",
+        "name": "problem",
+        "minicourse_id": "minicourse-1",
+        "difficulty": 1,
+        "status": "CREATED",
+        "data_state": "ACTIVE",
+        "test_case": [
+            {
+                "id": f"problem-1-{index}_test",
+                "input_name": "in",
+                "output_name": "out",
+                "input_id": f"problem-1-{index}_input.txt",
+                "output_id": f"problem-1-{index}_output.txt",
+            }
+            for index in range(test_cases)
+        ],
+    }
+
+
+@pytest.mark.disable_aws_mock
+def test_next_test_case_index_continues_legacy_problems() -> None:
+    from modding.problem import repository as subject
+
+    table = FakeProblemTable(build_problem(test_cases=2))
+    with patch("modding.common.aws_cli.AwsCustomClient.dynamo", return_value=table):
+        problem_repository = subject.ProblemRepository("problems", "bucket")
+
+    first_index = problem_repository.next_test_case_index("problem-1")
+    second_index = problem_repository.next_test_case_index("problem-1")
+
+    assert (first_index, second_index) == (2, 3)
+    assert len(table.item.get("test_case")) == 2
+    assert table.item.get("test_case_count") == 4
+
+
+@pytest.mark.disable_aws_mock
+@pytest.mark.parametrize("test_case_count", [0, None])
+def test_first_test_case_upload_after_creating_problem(test_case_count) -> None:
+    from modding.problem import models
+    from modding.problem import repository as subject
+
+    table = FakeProblemTable()
+    with patch("modding.common.aws_cli.AwsCustomClient.dynamo", return_value=table):
+        problem_repository = subject.ProblemRepository("problems", "bucket")
+    problem_repository.set_username("teacher")
+
+    problem_repository.save_on_table(
+        models.Problem(
+            id="problem-1",
+            name="problem",
+            minicourse_id="minicourse-1",
+            difficulty=1,
+            status=models.ProblemStatus.CREATED,
+            test_case_count=test_case_count,
+        )
+    )
+    first_index = problem_repository.next_test_case_index("problem-1", "teacher")
+    second_index = problem_repository.next_test_case_index("problem-1", "teacher")
+
+    assert (first_index, second_index) == (0, 1)
+    assert table.item.get("test_case_count") == 2
+
+
+@pytest.mark.disable_aws_mock
+def test_next_test_case_index_repairs_null_counters() -> None:
+    from modding.problem import repository as subject
+
+    table = FakeProblemTable({**build_problem(test_cases=0), "test_case_count": None})
+    with patch("modding.common.aws_cli.AwsCustomClient.dynamo", return_value=table):
+        problem_repository = subject.ProblemRepository("problems", "bucket")
+
+    assert problem_repository.next_test_case_index("problem-1") == 0
+    assert table.item.get("test_case_count") == 1
+
+
+@pytest.mark.disable_aws_mock
+def test_stream_test_cases_reads_pages_lazily() -> None:
+    from unittest.mock import MagicMock
+    from modding.problem import repository as subject
+
+    def build_case(index: int) -> Dict[str, Any]:
+        return {
+            "id": f"problem-1-{index}_test",
+            "problem_id": "problem-1",
+            "case_index": index,
+            "input_name": "in",
+            "output_name": "out",
+            "input_id": f"problem-1-{index}_input.txt",
+            "output_id": f"problem-1-{index}_output.txt",
+        }
+
+    mock_table = MagicMock()
+    mock_table.query.side_effect = [
+        {"Items": [build_case(0), build_case(1)], "LastEvaluatedKey": {"k": 1}},
+        {"Items": [build_case(2)]},
+    ]
+
+    with patch("boto3.resource") as resource:
+        resource.return_value.Table.return_value = mock_table
+        test_case_repository = subject.ProblemTestCaseRepository("cases")
+
+        stream = test_case_repository.stream_test_cases("problem-1")
+        first = next(stream)
+
+        assert first.case_index == 0
+        assert mock_table.query.call_count == 1
+        assert [test_case.case_index for test_case in stream] == [1, 2]
+        assert mock_table.query.call_count == 2
@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.mark.unit
+def test_disk_cache_stores_by_content(tmp_path) -> None:
+    from src.modding.utils import disk_cache as subject
+
+    cache = subject.DiskCache(directory=str(tmp_path), max_bytes=1024)
+
+    cache.put("case-0_input.txt", "1 2\n")
+    cache.put("case-1_input.txt", "1 2\n")
+
+    assert cache.get("case-0_input.txt") == "1 2\n"
+    assert cache.path("case-0_input.txt") == cache.path("case-1_input.txt")
+    assert cache.stats().get("blobs") == 1
+    assert cache.stats().get("size") == 4
+
+
+@pytest.mark.unit
+def test_disk_cache_evicts_least_recently_used(tmp_path) -> None:
+    from src.modding.utils import disk_cache as subject
+
+    cache = subject.DiskCache(directory=str(tmp_path), max_bytes=10)
+
+    cache.put("first", "aaaa")
+    cache.put("second", "bbbb")
+    cache.get("first")
+    cache.put("third", "cccc")
+
+    assert cache.get("second") is None
+    assert cache.get("first") == "aaaa"
+    assert cache.get("third") == "cccc"
+    assert cache.size <= 10
+
+
+@pytest.mark.unit
+def test_disk_cache_streams_blobs(tmp_path) -> None:
+    import io
+    from src.modding.utils import disk_cache as subject
+
+    cache = subject.DiskCache(directory=str(tmp_path), max_bytes=1024)
+
+    digest = cache.put_stream("streamed", io.BytesIO(b"3 4\n"))
+    cache.put("stored", "3 4\n")
+
+    assert digest == subject.DiskCache.digest(b"3 4\n")
+    assert cache.stats().get("blobs") == 1
+    with cache.open("streamed") as file:
+        assert file.read() == b"3 4\n"
+    assert cache.open("missing") is None
+    assert cache.stats().get("hits") == 1
+    assert cache.stats().get("misses") == 1
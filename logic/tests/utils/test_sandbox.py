@@ -0,0 +1,71 @@
+import pytest
+
+
+@pytest.mark.unit
+def test_sandbox_run_command_tries_every_slot() -> None:
+    from src.modding.utils import sandbox as subject
+
+    pool = subject.SandboxPool(
+        slots=3,
+        cpu_quota=0.5,
+        memory_limit="128M",
+        workdir_size="32M",
+        timeout_seconds=5,
+    )
+
+    command = pool.run_command(
+        "python3", "main.py", "eval-1/code", "eval-1/0.in", "eval-1/0_code.out"
+    )
+
+    for slot in range(3):
+        assert pool.lock(slot) in command
+        assert f"{pool.cgroup(slot)}/cgroup.procs" in command
+    assert "unshare --net" in command
+    assert "> eval-1/0_code.out" in command
+
+
+@pytest.mark.unit
+def test_sandbox_provision_sets_limits_once() -> None:
+    from src.modding.utils import sandbox as subject
+
+    pool = subject.SandboxPool(
+        slots=1,
+        cpu_quota=0.5,
+        memory_limit="128M",
+        workdir_size="32M",
+        timeout_seconds=5,
+    )
+
+    command = pool.provision_command()
+
+    assert command.startswith(f"test -f {pool.provisioned_mark} ||")
+    assert "50000 100000" in command
+    assert f"128M > {pool.cgroup(0)}/memory.max" in command
+
+
+@pytest.mark.unit
+def test_sandbox_program_busy_code_is_not_retried(tmp_path) -> None:
+    import subprocess
+    from src.modding.utils import sandbox as subject
+
+    class ProgramPool(subject.SandboxPool):
+        def lock(self, slot: int) -> str:
+            return str(tmp_path / f"slot{slot}.lock")
+
+        def _slot_command(self, slot: int, code_folder: str, input_file: str) -> str:
+            return "exit %s" % (subject.SLOT_BUSY_CODE)
+
+    pool = ProgramPool(
+        slots=2,
+        cpu_quota=0.5,
+        memory_limit="128M",
+        workdir_size="32M",
+        timeout_seconds=5,
+    )
+    command = pool.run_command(
+        "python3", "main.py", "code", "0.in", str(tmp_path / "0_code.out")
+    )
+
+    finished = subprocess.run(["sh", "-c", command], timeout=5)
+
+    assert finished.returncode == subject.PROGRAM_FAILED_CODE